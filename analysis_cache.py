@@ -0,0 +1,179 @@
+"""
+Persisted incident analysis results
+
+Each analysis is stored under the incident number together with the incident
+revision (a hash of the fields the analysis reads) and the knowledge base
+snapshot version it was computed against. Re-opening an incident whose
+revision and KB version still match returns the stored result without
+recomputing; when either side has changed the previous result is served as
+stale while a background worker recomputes it, so list views can show
+suggestions without waiting on analysis.
+
+Similar past incidents are not part of a stored analysis: the incident index
+changes with every resolve and sync, so callers search it at read time.
+
+Results are kept in an LRU bounded by max_entries and written through to
+SQLite when a path is given; entries evicted from memory (or stored by an
+earlier process) are read back from SQLite on lookup.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# Incident fields the analysis depends on; edits to any other field keep the cached result
+REVISION_FIELDS = ('short_description', 'description', 'priority')
+
+
+def incident_revision(incident, fields=REVISION_FIELDS):
+    return hashlib.sha1('|'.join(str(incident.get(f, '')) for f in fields).encode()).hexdigest()[:16]
+
+
+class AnalysisCache:
+    def __init__(self, analyze, path=None, workers=2, max_entries=10000):
+        self.analyze = analyze
+        self.path = path
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._inflight = set()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='analysis-refresh')
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'computed': 0, 'refresh_errors': 0,
+                      'evicted': 0, 'loaded_from_disk': 0}
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS analyses ("
+                "number TEXT PRIMARY KEY, revision TEXT, kb_version TEXT, analyzed_at TEXT, analysis TEXT)"
+            )
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remember(self, number, entry):
+        # Caller holds the lock
+        self._entries[number] = entry
+        self._entries.move_to_end(number)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats['evicted'] += 1
+
+    def _entry(self, number):
+        with self._lock:
+            entry = self._entries.get(number)
+            if entry is not None:
+                self._entries.move_to_end(number)
+                return entry
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                "SELECT revision, kb_version, analyzed_at, analysis FROM analyses WHERE number = ?", (number,)
+            ).fetchone()
+            if row is None:
+                return None
+            revision, kb_version, analyzed_at, analysis = row
+            entry = {
+                'revision': revision,
+                'kb_version': kb_version,
+                'analyzed_at': analyzed_at,
+                'analysis': json.loads(analysis)
+            }
+            self._remember(number, entry)
+            self.stats['loaded_from_disk'] += 1
+            return entry
+
+    def lookup(self, incident, kb_version):
+        """Return (stored entry or None, 'fresh' | 'stale' | 'missing')"""
+        entry = self._entry(incident['number'])
+        if entry is None:
+            return None, 'missing'
+        if entry['revision'] == incident_revision(incident) and entry['kb_version'] == kb_version:
+            return entry, 'fresh'
+        return entry, 'stale'
+
+    def status(self, incident, kb_version):
+        return self.lookup(incident, kb_version)[1]
+
+    @traced('analysis_cache.put')
+    def put(self, incident, kb_version, analysis):
+        entry = {
+            'revision': incident_revision(incident),
+            'kb_version': kb_version,
+            'analyzed_at': datetime.now().isoformat(),
+            'analysis': analysis
+        }
+        with self._lock:
+            self._remember(incident['number'], entry)
+            if self._db:
+                # default=dict: search results in an analysis are Mapping views, not dicts
+                self._db.execute(
+                    "INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?, ?)",
+                    (incident['number'], entry['revision'], kb_version, entry['analyzed_at'], json.dumps(analysis, default=dict))
+                )
+                self._db.commit()
+        return entry
+
+    def get(self, incident, kb_version):
+        """Return (entry, status) without ever computing inline.
+
+        A stale or missing entry schedules a background recompute; the stale
+        entry (or None) is returned meanwhile.
+        """
+        entry, status = self.lookup(incident, kb_version)
+        if status != 'fresh':
+            self.refresh([incident], kb_version)
+        return entry, status
+
+    def get_or_compute(self, incident, kb_version):
+        """Return (entry, status), computing synchronously only when nothing is stored"""
+        entry, status = self.lookup(incident, kb_version)
+        if status == 'fresh':
+            self.stats['hits'] += 1
+        elif status == 'stale':
+            self.stats['stale_hits'] += 1
+            self.refresh([incident], kb_version)
+        else:
+            self.stats['misses'] += 1
+            entry = self.put(incident, kb_version, self.analyze(incident))
+            self.stats['computed'] += 1
+        return entry, status
+
+    def refresh(self, incidents, kb_version):
+        """Recompute the given incidents in the background, once per number at a time"""
+        for incident in incidents:
+            with self._lock:
+                if incident['number'] in self._inflight:
+                    continue
+                self._inflight.add(incident['number'])
+            self._pool.submit(self._recompute, incident, kb_version)
+
+    def _recompute(self, incident, kb_version):
+        try:
+            if self.status(incident, kb_version) != 'fresh':
+                self.put(incident, kb_version, self.analyze(incident))
+                self.stats['computed'] += 1
+        except Exception as e:
+            logger.error(f"Analysis refresh for {incident['number']} failed: {e}")
+            self.stats['refresh_errors'] += 1
+        finally:
+            with self._lock:
+                self._inflight.discard(incident['number'])
+
+    def to_dict(self):
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'refreshing': len(self._inflight),
+            'persistent': self._db is not None,
+            **self.stats
+        }
@@ -0,0 +1,74 @@
+async function analyzeIncident() {
+    const incident = document.getElementById('incident').value;
+    const response = await fetch('/api/summarize', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({incident: incident})
+    });
+    const result = await response.json();
+    document.getElementById('incident-result').innerHTML = 
+        `<div class="result"><h4>📊 Incident Summary:</h4><p>${result.summary}</p></div>`;
+}
+
+async function searchKB() {
+    const query = document.getElementById('search').value;
+    const response = await fetch('/api/search', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({query: query})
+    });
+    const result = await response.json();
+    let html = '<div class="result"><h4>🔍 Search Results:</h4>';
+    result.results.forEach(article => {
+        html += `<div class="kb-article">
+            <h5>${article.title} (${(article.relevance_score * 100).toFixed(1)}% relevant)</h5>
+            <p><strong>Category:</strong> ${article.category}</p>
+            <p>${article.content}</p>
+        </div>`;
+    });
+    html += '</div>';
+    document.getElementById('search-result').innerHTML = html;
+}
+
+async function getSolution() {
+    const problem = document.getElementById('problem').value;
+    const response = await fetch('/api/solution', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({problem: problem})
+    });
+    const result = await response.json();
+    document.getElementById('solution-result').innerHTML = 
+        `<div class="result">
+            <h4>🎯 AI-Generated Solution:</h4>
+            <div class="kb-article"><h5>Summary:</h5><p>${result.summary}</p></div>
+            <div class="kb-article"><h5>Solution:</h5><p>${result.solution}</p></div>
+            <div class="kb-article"><h5>Referenced KB Articles:</h5>
+                ${result.kb_articles.map(kb => `<p>• ${kb.title} (${kb.category})</p>`).join('')}
+            </div>
+        </div>`;
+}
+
+let kbCursor = null;
+
+async function loadKB(more = false) {
+    const params = new URLSearchParams({fields: 'title,category,tags', limit: '50'});
+    if (more && kbCursor) params.set('cursor', kbCursor);
+    const response = await fetch(`/api/knowledge-base?${params}`);
+    const result = await response.json();
+    let html = '';
+    result.articles.forEach(article => {
+        html += `<div class="kb-article">
+            <h5>${article.id}: ${article.title}</h5>
+            <p><strong>Category:</strong> ${article.category}</p>
+            <p><strong>Tags:</strong> ${article.tags.join(', ')}</p>
+        </div>`;
+    });
+    kbCursor = result.next_cursor;
+    const list = document.getElementById('kb-list');
+    if (!more) {
+        list.innerHTML = `<div class="result"><h4>📚 Knowledge Base Articles (${result.total_articles}):</h4><div id="kb-articles"></div></div>`;
+    }
+    document.getElementById('kb-articles').insertAdjacentHTML('beforeend', html);
+    document.getElementById('kb-more').style.display = kbCursor ? 'inline-block' : 'none';
+}
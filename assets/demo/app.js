@@ -0,0 +1,626 @@
+function showLoading(id) {
+    document.getElementById(id).style.display = 'block';
+}
+
+function hideLoading(id) {
+    document.getElementById(id).style.display = 'none';
+}
+
+async function analyzeIncident() {
+    const incident = document.getElementById('incident').value;
+    if (!incident.trim()) {
+        alert('Please enter an incident description');
+        return;
+    }
+
+    showLoading('incident-loading');
+
+    try {
+        const response = await fetch('/api/summarize', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({incident: incident})
+        });
+        const result = await response.json();
+
+        document.getElementById('incident-result').innerHTML = 
+            `<div class="result">
+                <h4>📊 AI Incident Analysis</h4>
+                <pre style="white-space: pre-wrap; font-family: inherit; line-height: 1.5;">${result.summary}</pre>
+            </div>`;
+    } catch (error) {
+        document.getElementById('incident-result').innerHTML = 
+            `<div class="result" style="border-left-color: #dc3545;">
+                <h4>❌ Error</h4>
+                <p>Error analyzing incident: ${error.message}</p>
+            </div>`;
+    } finally {
+        hideLoading('incident-loading');
+    }
+}
+
+async function searchKB() {
+    const query = document.getElementById('search').value;
+    if (!query.trim()) {
+        alert('Please enter a search query');
+        return;
+    }
+
+    showLoading('search-loading');
+
+    try {
+        const response = await fetch('/api/search', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({query: query})
+        });
+        const result = await response.json();
+
+        let html = '<div class="result"><h4>🔍 RAG Search Results</h4>';
+
+        if (result.results.length === 0) {
+            html += '<p>No relevant articles found. Try different keywords.</p>';
+        } else {
+            result.results.forEach(article => {
+                html += `<div class="kb-article">
+                    <h5>
+                        <span class="category">${article.category}</span>
+                        ${article.title}
+                        <span style="color: #28a745; font-weight: normal;">(${(article.relevance_score * 100).toFixed(1)}% relevant)</span>
+                    </h5>
+                    <p style="margin: 8px 0; color: #666;"><strong>Tags:</strong> ${article.tags.join(', ')}</p>
+                    <p>${article.content}</p>
+                </div>`;
+            });
+        }
+
+        html += '</div>';
+        document.getElementById('search-result').innerHTML = html;
+    } catch (error) {
+        document.getElementById('search-result').innerHTML = 
+            `<div class="result" style="border-left-color: #dc3545;">
+                <h4>❌ Error</h4>
+                <p>Error searching knowledge base: ${error.message}</p>
+            </div>`;
+    } finally {
+        hideLoading('search-loading');
+    }
+}
+
+async function getSolution() {
+    const problem = document.getElementById('problem').value;
+    if (!problem.trim()) {
+        alert('Please describe your IT problem');
+        return;
+    }
+
+    showLoading('solution-loading');
+
+    try {
+        const response = await fetch('/api/solution', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({problem: problem})
+        });
+        const result = await response.json();
+
+        document.getElementById('solution-result').innerHTML = 
+            `<div class="result">
+                <h4>🎯 Complete RAG Solution</h4>
+
+                <div class="kb-article">
+                    <h5>📋 AI Analysis Summary</h5>
+                    <pre style="white-space: pre-wrap; font-family: inherit; line-height: 1.5;">${result.summary}</pre>
+                </div>
+
+                <div class="kb-article">
+                    <h5>💡 Generated Solution</h5>
+                    <pre style="white-space: pre-wrap; font-family: inherit; line-height: 1.5;">${result.solution}</pre>
+                </div>
+
+                <div class="kb-article">
+                    <h5>📚 Referenced Knowledge Base Articles</h5>
+                    ${result.kb_articles.map(kb => 
+                        `<p><strong>• ${kb.title}</strong> (${kb.category}) - ${(kb.relevance_score * 100).toFixed(1)}% relevant</p>`
+                    ).join('')}
+                </div>
+            </div>`;
+    } catch (error) {
+        document.getElementById('solution-result').innerHTML = 
+            `<div class="result" style="border-left-color: #dc3545;">
+                <h4>❌ Error</h4>
+                <p>Error generating solution: ${error.message}</p>
+            </div>`;
+    } finally {
+        hideLoading('solution-loading');
+    }
+}
+
+async function loadServiceNowIncidents() {
+    try {
+        const response = await fetch('/api/servicenow/incidents');
+        const result = await response.json();
+
+        let html = '<div class="result"><h4>📋 ServiceNow Incidents</h4>';
+        result.incidents.forEach(incident => {
+            html += `<div class="kb-article">
+                <h5>${incident.number}: ${incident.short_description}</h5>
+                <p><strong>Priority:</strong> ${incident.priority} | <strong>State:</strong> ${incident.state} | <strong>Assigned:</strong> ${incident.assigned_to}</p>
+                <p><strong>Description:</strong> ${incident.description}</p>
+                <p><strong>Caller:</strong> ${incident.caller} | <strong>Created:</strong> ${incident.created_on}</p>
+                ${incident.ai_suggestion && incident.ai_suggestion.status !== 'pending'
+                    ? `<p><strong>🤖 Suggestion:</strong> Assign to ${incident.ai_suggestion.assign_to}${incident.ai_suggestion.top_kb ? ` | See ${incident.ai_suggestion.top_kb.id}: ${incident.ai_suggestion.top_kb.title}` : ''}${incident.ai_suggestion.escalate ? ' | ⚠️ Escalate' : ''}</p>`
+                    : '<p><em>🤖 AI suggestion pending...</em></p>'}
+                <button class="button" onclick="analyzeIncident('${incident.number}')" style="margin-top: 8px; font-size: 12px; padding: 6px 12px;">🔍 Analyze</button>
+            </div>`;
+        });
+        html += '</div>';
+        document.getElementById('servicenow-result').innerHTML = html;
+    } catch (error) {
+        document.getElementById('servicenow-result').innerHTML = 
+            `<div class="result" style="border-left-color: #dc3545;"><h4>❌ Error</h4><p>${error.message}</p></div>`;
+    }
+}
+
+async function analyzeIncident(incidentNumber) {
+    try {
+        const response = await fetch(`/api/servicenow/incidents/${incidentNumber}/analyze`, {
+            method: 'POST'
+        });
+        const result = await response.json();
+
+        document.getElementById('servicenow-result').innerHTML = 
+            `<div class="result">
+                <h4>🔍 ServiceNow Incident Analysis: ${result.incident.number}</h4>
+
+                <div class="kb-article">
+                    <h5>📋 Incident Details</h5>
+                    <p><strong>Description:</strong> ${result.incident.description}</p>
+                    <p><strong>Priority:</strong> ${result.incident.priority} | <strong>Category:</strong> ${result.incident.category}</p>
+                </div>
+
+                <div class="kb-article">
+                    <h5>🤖 AI Analysis</h5>
+                    <pre style="white-space: pre-wrap; font-family: inherit;">${result.ai_analysis.summary}</pre>
+                </div>
+
+                <div class="kb-article">
+                    <h5>💡 AI Solution</h5>
+                    <pre style="white-space: pre-wrap; font-family: inherit;">${result.ai_analysis.solution}</pre>
+                </div>
+
+                ${(result.ai_analysis.similar_incidents || []).length ? `<div class="kb-article">
+                    <h5>🗂️ Similar Past Incidents</h5>
+                    ${result.ai_analysis.similar_incidents.map(match =>
+                        `<p><strong>${match.number}</strong> (${match.state}): ${match.short_description}${match.close_notes ? `<br><em>Resolution:</em> ${match.close_notes}` : ''}</p>`
+                    ).join('')}
+                </div>` : ''}
+
+                <div class="kb-article">
+                    <h5>📊 Recommendations</h5>
+                    <p><strong>Assign to:</strong> ${result.recommendations.assign_to}</p>
+                    <p><strong>Estimated resolution:</strong> ${result.recommendations.estimated_resolution}</p>
+                    <p><strong>Escalate:</strong> ${result.recommendations.escalate ? 'Yes' : 'No'}</p>
+                </div>
+            </div>`;
+    } catch (error) {
+        document.getElementById('servicenow-result').innerHTML = 
+            `<div class="result" style="border-left-color: #dc3545;"><h4>❌ Error</h4><p>${error.message}</p></div>`;
+    }
+}
+
+function showCreateIncident() {
+    document.getElementById('servicenow-result').innerHTML = 
+        `<div class="result">
+            <h4>➕ Create New ServiceNow Incident</h4>
+            <div style="margin: 15px 0;">
+                <input type="text" id="new-incident-title" placeholder="Short description" style="width: 100%; margin: 5px 0; padding: 8px;">
+                <textarea id="new-incident-desc" placeholder="Detailed description" style="width: 100%; height: 60px; margin: 5px 0; padding: 8px;"></textarea>
+                <select id="new-incident-priority" style="width: 100%; margin: 5px 0; padding: 8px;">
+                    <option>1 - Critical</option>
+                    <option>2 - High</option>
+                    <option selected>3 - Medium</option>
+                    <option>4 - Low</option>
+                </select>
+                <button class="button" onclick="createNewIncident()">Create Incident</button>
+            </div>
+        </div>`;
+}
+
+async function createNewIncident() {
+    const data = {
+        short_description: document.getElementById('new-incident-title').value,
+        description: document.getElementById('new-incident-desc').value,
+        priority: document.getElementById('new-incident-priority').value,
+        category: 'General',
+        caller: 'demo.user@company.com'
+    };
+
+    try {
+        const response = await fetch('/api/servicenow/create-incident', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify(data)
+        });
+        const result = await response.json();
+
+        document.getElementById('servicenow-result').innerHTML = 
+            `<div class="result">
+                <h4>✅ Incident Created Successfully</h4>
+                <div class="kb-article">
+                    <h5>New Incident: ${result.incident.number}</h5>
+                    <p><strong>Title:</strong> ${result.incident.short_description}</p>
+                    <p><strong>Priority:</strong> ${result.incident.priority}</p>
+                    <p><strong>State:</strong> ${result.incident.state}</p>
+                    <p><strong>Created:</strong> ${result.incident.created_on}</p>
+                </div>
+                <button class="button" onclick="loadServiceNowIncidents()" style="margin-top: 10px;">📋 View All Incidents</button>
+            </div>`;
+    } catch (error) {
+        document.getElementById('servicenow-result').innerHTML = 
+            `<div class="result" style="border-left-color: #dc3545;"><h4>❌ Error</h4><p>${error.message}</p></div>`;
+    }
+}
+
+// Quiz System Functions
+let currentQuiz = null;
+let userAnswers = {};
+// Stable per-browser id so quiz results build up a proficiency profile
+const engineerId = localStorage.getItem('engineer_id') || 'ENG_' + Math.random().toString(36).slice(2, 10).toUpperCase();
+localStorage.setItem('engineer_id', engineerId);
+
+async function loadQuizCategories() {
+    try {
+        const response = await fetch('/api/quiz/categories');
+        const result = await response.json();
+
+        let html = '<div class="result"><h4>📚 Available Quiz Categories</h4>';
+        result.categories.forEach(category => {
+            html += `<div class="kb-article">
+                <h5>${category === 'all' ? 'All Categories' : category}</h5>
+                <button class="button" onclick="generateSpecificQuiz('${category}')" style="margin-top: 5px; font-size: 12px; padding: 4px 8px;">Generate Quiz</button>
+            </div>`;
+        });
+        html += '</div>';
+        document.getElementById('quiz-result').innerHTML = html;
+    } catch (error) {
+        document.getElementById('quiz-result').innerHTML = 
+            `<div class="result" style="border-left-color: #dc3545;"><h4>❌ Error</h4><p>${error.message}</p></div>`;
+    }
+}
+
+async function generateQuiz() {
+    const category = document.getElementById('quiz-category').value;
+    await generateSpecificQuiz(category);
+}
+
+async function generateSpecificQuiz(category = 'all') {
+    try {
+        const response = await fetch('/api/quiz/generate', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({
+                category: category,
+                difficulty: 'medium',
+                engineer_id: engineerId
+            })
+        });
+        const result = await response.json();
+        currentQuiz = result.quiz;
+        userAnswers = {};
+
+        let html = `<div class="result">
+            <h4>🎯 ${result.quiz.title}</h4>
+            <p><strong>Questions:</strong> ${result.quiz.total_questions} | <strong>Time Limit:</strong> ${result.quiz.time_limit_minutes} minutes</p>
+            <div style="margin: 15px 0;">`;
+
+        result.quiz.questions.forEach((question, index) => {
+            html += `<div class="kb-article" style="margin: 10px 0;">
+                <h5>Question ${index + 1}: ${question.question}</h5>
+                <p><strong>Category:</strong> ${question.category} | <strong>Reference:</strong> ${question.kb_reference}</p>`;
+
+            if (question.type === 'multiple_choice') {
+                question.options.forEach((option, optIndex) => {
+                    html += `<div style="margin: 5px 0;">
+                        <input type="radio" name="q${question.id}" value="${optIndex}" onchange="recordAnswer('${question.id}', ${optIndex})">
+                        <label style="margin-left: 8px;">${option}</label>
+                    </div>`;
+                });
+            } else if (question.type === 'true_false') {
+                html += `<div style="margin: 5px 0;">
+                    <input type="radio" name="q${question.id}" value="true" onchange="recordAnswer('${question.id}', true)">
+                    <label style="margin-left: 8px;">True</label>
+                </div>
+                <div style="margin: 5px 0;">
+                    <input type="radio" name="q${question.id}" value="false" onchange="recordAnswer('${question.id}', false)">
+                    <label style="margin-left: 8px;">False</label>
+                </div>`;
+            } else if (question.type === 'fill_blank') {
+                html += `<input type="text" id="answer_${question.id}" placeholder="Your answer..." 
+                    style="width: 200px; padding: 6px; margin: 5px 0;" 
+                    onchange="recordAnswer('${question.id}', this.value)">`;
+            }
+
+            html += '</div>';
+        });
+
+        html += `</div>
+            <button class="button" onclick="submitQuiz()" style="background: #28a745; margin-top: 15px;">✅ Submit Quiz</button>
+        </div>`;
+
+        document.getElementById('quiz-result').innerHTML = html;
+    } catch (error) {
+        document.getElementById('quiz-result').innerHTML = 
+            `<div class="result" style="border-left-color: #dc3545;"><h4>❌ Error</h4><p>${error.message}</p></div>`;
+    }
+}
+
+function recordAnswer(questionId, answer) {
+    userAnswers[questionId] = answer;
+}
+
+async function submitQuiz() {
+    if (!currentQuiz || Object.keys(userAnswers).length === 0) {
+        alert('Please answer at least one question before submitting.');
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/quiz/submit', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({
+                quiz_id: currentQuiz.id,
+                engineer_id: engineerId,
+                answers: userAnswers
+            })
+        });
+        const result = await response.json();
+        if (!response.ok) {
+            throw new Error(result.error);
+        }
+
+        document.getElementById('quiz-result').innerHTML = 
+            `<div class="result">
+                <h4>📊 Quiz Results: ${result.result.quiz_id}</h4>
+
+                <div class="kb-article">
+                    <h5>🎯 Your Performance</h5>
+                    <p><strong>Score:</strong> ${result.result.score.toFixed(1)}% (${result.result.correct_answers}/${result.result.total_questions})</p>
+                    <p><strong>Performance Level:</strong> ${result.result.performance_level}</p>
+                </div>
+
+                <div class="kb-article">
+                    <h5>💡 Learning Recommendations</h5>
+                    ${result.result.learning_recommendations.map(rec => `<p>• ${rec}</p>`).join('')}
+                </div>
+
+                <div class="kb-article">
+                    <h5>📝 Detailed Feedback</h5>
+                    ${result.result.detailed_feedback.map(feedback => 
+                        `<p><strong>${feedback.question_id}:</strong> ${feedback.correct ? '✅' : '❌'} ${feedback.feedback}</p>`
+                    ).join('')}
+                </div>
+
+                <button class="button" onclick="generateQuiz()" style="margin-top: 10px;">🔄 Take Another Quiz</button>
+            </div>`;
+    } catch (error) {
+        document.getElementById('quiz-result').innerHTML = 
+            `<div class="result" style="border-left-color: #dc3545;"><h4>❌ Error</h4><p>${error.message}</p></div>`;
+    }
+}
+
+// Feedback System Functions
+function showFeedbackForm() {
+    document.getElementById('feedback-result').innerHTML = 
+        `<div class="result">
+            <h4>💬 Submit Feedback</h4>
+            <div style="margin: 15px 0;">
+                <select id="feedback-feature" style="width: 100%; margin: 5px 0; padding: 8px;">
+                    <option value="rag_search">RAG Search System</option>
+                    <option value="incident_analysis">Incident Analysis</option>
+                    <option value="servicenow">ServiceNow Integration</option>
+                    <option value="quiz">Quiz System</option>
+                    <option value="overall">Overall System</option>
+                </select>
+
+                <div style="margin: 10px 0;">
+                    <label style="display: block; margin-bottom: 5px;"><strong>Rating (1-5 stars):</strong></label>
+                    <div style="display: flex; gap: 5px;">
+                        ${[1,2,3,4,5].map(i => 
+                            `<button type="button" onclick="setRating(${i})" id="star-${i}" 
+                             style="background: #ddd; border: 1px solid #ccc; padding: 5px 10px; cursor: pointer;">⭐</button>`
+                        ).join('')}
+                    </div>
+                    <input type="hidden" id="feedback-rating" value="0">
+                </div>
+
+                <textarea id="feedback-comment" placeholder="What did you think about this feature?" 
+                    style="width: 100%; height: 60px; margin: 5px 0; padding: 8px;"></textarea>
+
+                <textarea id="feedback-suggestion" placeholder="Any suggestions for improvement?" 
+                    style="width: 100%; height: 60px; margin: 5px 0; padding: 8px;"></textarea>
+
+                <select id="feedback-experience" style="width: 100%; margin: 5px 0; padding: 8px;">
+                    <option value="beginner">Beginner IT Support</option>
+                    <option value="intermediate" selected>Intermediate IT Support</option>
+                    <option value="expert">Expert IT Support</option>
+                    <option value="manager">IT Manager</option>
+                </select>
+
+                <div style="margin: 10px 0;">
+                    <label>
+                        <input type="checkbox" id="feedback-helpful" checked> This feature was helpful
+                    </label>
+                </div>
+
+                <button class="button" onclick="submitFeedback()">📤 Submit Feedback</button>
+            </div>
+        </div>`;
+}
+
+function setRating(rating) {
+    document.getElementById('feedback-rating').value = rating;
+    // Update visual feedback
+    for (let i = 1; i <= 5; i++) {
+        const star = document.getElementById(`star-${i}`);
+        star.style.background = i <= rating ? '#ffc107' : '#ddd';
+    }
+}
+
+async function submitFeedback() {
+    const data = {
+        session_id: 'demo_session_' + Date.now(),
+        feature: document.getElementById('feedback-feature').value,
+        rating: parseInt(document.getElementById('feedback-rating').value),
+        comment: document.getElementById('feedback-comment').value,
+        suggestion: document.getElementById('feedback-suggestion').value,
+        helpful: document.getElementById('feedback-helpful').checked,
+        experience_level: document.getElementById('feedback-experience').value,
+        response_time: Math.random() * 2000 + 500,
+        accuracy_perceived: parseInt(document.getElementById('feedback-rating').value),
+        relevance_score: parseInt(document.getElementById('feedback-rating').value)
+    };
+
+    if (data.rating === 0) {
+        alert('Please provide a rating before submitting.');
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/feedback/submit', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify(data)
+        });
+        const result = await response.json();
+
+        document.getElementById('feedback-result').innerHTML = 
+            `<div class="result">
+                <h4>✅ Feedback Submitted Successfully</h4>
+                <div class="kb-article">
+                    <h5>Thank you for your feedback!</h5>
+                    <p><strong>Feedback ID:</strong> ${result.feedback_id}</p>
+                    <p><strong>Feature:</strong> ${data.feature}</p>
+                    <p><strong>Rating:</strong> ${'⭐'.repeat(data.rating)} (${data.rating}/5)</p>
+                    <p>Your feedback helps us improve the AI system continuously.</p>
+                </div>
+                <button class="button" onclick="showAnalytics()" style="margin-top: 10px;">📊 View Analytics</button>
+            </div>`;
+    } catch (error) {
+        document.getElementById('feedback-result').innerHTML = 
+            `<div class="result" style="border-left-color: #dc3545;"><h4>❌ Error</h4><p>${error.message}</p></div>`;
+    }
+}
+
+async function generateDemoFeedback() {
+    try {
+        const response = await fetch('/api/feedback/demo-data', {
+            method: 'POST'
+        });
+        const result = await response.json();
+
+        document.getElementById('feedback-result').innerHTML = 
+            `<div class="result">
+                <h4>📊 Demo Feedback Generated</h4>
+                <p>${result.message}</p>
+                <p><strong>Total feedback entries:</strong> ${result.total_feedback}</p>
+                <button class="button" onclick="showAnalytics()" style="margin-top: 10px;">📈 View Analytics</button>
+            </div>`;
+    } catch (error) {
+        document.getElementById('feedback-result').innerHTML = 
+            `<div class="result" style="border-left-color: #dc3545;"><h4>❌ Error</h4><p>${error.message}</p></div>`;
+    }
+}
+
+async function showAnalytics() {
+    try {
+        const response = await fetch('/api/feedback/analytics');
+        const result = await response.json();
+
+        if (!result.analytics || result.analytics.total_feedback === 0) {
+            document.getElementById('feedback-result').innerHTML = 
+                `<div class="result">
+                    <h4>📊 Feedback Analytics</h4>
+                    <p>No feedback data available yet. Submit some feedback or generate demo data first.</p>
+                    <button class="button" onclick="generateDemoFeedback()">📊 Generate Demo Data</button>
+                </div>`;
+            return;
+        }
+
+        const analytics = result.analytics;
+
+        let html = `<div class="result">
+            <h4>📊 AI System Analytics Dashboard</h4>
+
+            <div class="kb-article">
+                <h5>📈 Overall Performance</h5>
+                <p><strong>Total Feedback:</strong> ${analytics.total_feedback}</p>
+                <p><strong>Average Rating:</strong> ${'⭐'.repeat(Math.round(analytics.average_rating))} (${analytics.average_rating}/5)</p>
+                <p><strong>User Satisfaction:</strong></p>
+                <p>• Very Satisfied: ${analytics.user_satisfaction.very_satisfied}</p>
+                <p>• Satisfied: ${analytics.user_satisfaction.satisfied}</p>
+                <p>• Needs Improvement: ${analytics.user_satisfaction.needs_improvement}</p>
+            </div>
+
+            <div class="kb-article">
+                <h5>🎯 Feature Performance</h5>`;
+
+        Object.entries(analytics.features).forEach(([feature, stats]) => {
+            html += `<p><strong>${feature.replace('_', ' ').toUpperCase()}:</strong> 
+                ${stats.average_rating.toFixed(1)}/5 (${stats.count} reviews, ${stats.helpful_percentage.toFixed(1)}% helpful)</p>`;
+        });
+
+        html += `</div>
+
+            <div class="kb-article">
+                <h5>🚀 Key Insights</h5>
+                <p><strong>Most Used Feature:</strong> ${analytics.trends.most_used_feature}</p>
+                <p><strong>Highest Rated:</strong> ${analytics.trends.highest_rated_feature}</p>
+                <p><strong>Features Needing Attention:</strong> ${analytics.trends.needs_attention.length}</p>
+            </div>`;
+
+        if (analytics.improvement_recommendations.length > 0) {
+            html += `<div class="kb-article">
+                <h5>💡 Improvement Recommendations</h5>`;
+            analytics.improvement_recommendations.forEach(rec => {
+                html += `<p><strong>${rec.priority} Priority:</strong> ${rec.recommendation}</p>`;
+            });
+            html += `</div>`;
+        }
+
+        html += `<button class="button" onclick="showFeedbackForm()" style="margin-top: 10px;">💬 Submit More Feedback</button>
+        </div>`;
+
+        document.getElementById('feedback-result').innerHTML = html;
+    } catch (error) {
+        document.getElementById('feedback-result').innerHTML = 
+            `<div class="result" style="border-left-color: #dc3545;"><h4>❌ Error</h4><p>${error.message}</p></div>`;
+    }
+}
+
+// Auto-populate demo data for quick testing
+document.addEventListener('DOMContentLoaded', function() {
+    const demoTexts = {
+        incident: "My Windows computer suddenly shows blue screen error with message IRQL_NOT_LESS_OR_EQUAL and keeps restarting. This started after I installed new graphics drivers yesterday.",
+        search: "printer not responding",
+        problem: "Our office printer suddenly stopped working. It shows as offline in Windows, but the printer displays show it's ready. Users can't print any documents."
+    };
+
+    // Add demo buttons
+    const sections = document.querySelectorAll('.demo-section');
+    sections.forEach((section, index) => {
+        const textarea = section.querySelector('textarea');
+        if (textarea) {
+            const demoBtn = document.createElement('button');
+            demoBtn.textContent = '🎬 Load Demo Data';
+            demoBtn.className = 'button';
+            demoBtn.style.marginLeft = '10px';
+            demoBtn.style.background = '#6c757d';
+            demoBtn.onclick = () => {
+                textarea.value = Object.values(demoTexts)[index] || '';
+            };
+            section.appendChild(demoBtn);
+        }
+    });
+});
@@ -0,0 +1 @@
+"""Benchmarks for the IT Support Assistant retrieval and serving paths"""
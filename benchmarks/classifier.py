@@ -0,0 +1,92 @@
+"""
+Throughput of the rule-based incident classifier
+
+Classifies synthetic tickets with the legacy per-category substring checks
+from SimpleRAGDemo.summarize_incident and with IncidentClassifier, optionally
+padding the rule set with extra synthetic categories to show how each
+approach scales with the number of rules.
+
+Usage:
+    python -m benchmarks.classifier --tickets 100000 --extra-categories 100
+"""
+
+import argparse
+import json
+import random
+import string
+import time
+
+from incident_classifier import IncidentClassifier, DEFAULT_RULES_PATH
+
+TICKET_WORDS = (
+    "user reports computer very slow after update cannot connect to exchange server outlook "
+    "error please help urgent printer offline network drive missing vpn drops macbook fan noise "
+    "blue screen on startup email stuck in outbox internet down whole floor the and of on for"
+).split()
+
+
+def legacy_classify(rules, incident_text):
+    """The original approach: lowercase and substring-test per keyword"""
+    key_terms = []
+    for category in rules['categories']:
+        if any(keyword.rstrip('*') in incident_text.lower() for keyword in category['keywords']):
+            key_terms.append(category['label'])
+    return key_terms or ['General IT Issue']
+
+
+def synthetic_rules(base, extra, rng):
+    rules = json.loads(json.dumps(base))
+    for i in range(extra):
+        keywords = [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 9))) for _ in range(3)]
+        rules['categories'].append({'label': f'Synthetic {i}', 'priority': 'Low', 'keywords': keywords})
+    return rules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=int, default=100000)
+    parser.add_argument('--words', type=int, default=40, help='words per ticket')
+    parser.add_argument('--extra-categories', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=11)
+    parser.add_argument('--repeat', type=int, default=5, help='runs per approach, the fastest is reported')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with open(DEFAULT_RULES_PATH) as f:
+        rules = synthetic_rules(json.load(f), args.extra_categories, rng)
+    tickets = [
+        ' '.join(rng.choice(TICKET_WORDS) for _ in range(args.words)).capitalize()
+        for _ in range(args.tickets)
+    ]
+
+    classifier = IncidentClassifier(rules)
+    approaches = (('legacy_substring', lambda t: legacy_classify(rules, t)),
+                  ('incident_classifier', classifier.classify))
+    best = {}
+    # Interleave the runs so machine noise hits both approaches alike
+    for _ in range(args.repeat):
+        for name, classify in approaches:
+            start = time.perf_counter()
+            for ticket in tickets:
+                classify(ticket)
+            elapsed = time.perf_counter() - start
+            best[name] = min(best.get(name, elapsed), elapsed)
+
+    results = {}
+    for name, elapsed in best.items():
+        results[name] = {
+            'seconds': round(elapsed, 3),
+            'tickets_per_second': round(args.tickets / elapsed)
+        }
+
+    print(json.dumps({
+        'tickets': args.tickets,
+        'words_per_ticket': args.words,
+        'categories': len(rules['categories']),
+        'repeat': args.repeat,
+        'results': results
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
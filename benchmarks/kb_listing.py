@@ -0,0 +1,85 @@
+"""
+Response size and latency of /api/knowledge-base listing modes
+
+Loads bot.py against a synthetic KB built from its sample articles and
+compares the old full dump (every article, every field) with a projected
+page, gzip, and a conditional 304 revalidation.
+
+Usage:
+    python -m benchmarks.kb_listing --articles 20000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+
+def measure(client, url, headers=None, repeat=20):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url, headers=headers or {})
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        'status': response.status_code,
+        'bytes': len(response.get_data()),
+        'p50_ms': round(latencies[len(latencies) // 2], 3),
+        'etag': response.headers.get('ETag')
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--articles', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, repo)
+    # bot.py writes knowledge_base.json into the working directory on import
+    os.chdir(tempfile.mkdtemp())
+    import logging
+    logging.disable(logging.CRITICAL)
+    import bot
+
+    samples = bot.rag_system.knowledge_base
+    bot.rag_system.knowledge_base = [
+        dict(samples[i % len(samples)], id=f"KB{i:06d}") for i in range(args.articles)
+    ]
+    bot.rag_system.kb_revision = uuid.uuid4().hex[:12]
+
+    @bot.app.route('/bench/legacy-knowledge-base')
+    def legacy_knowledge_base():
+        # The listing as it was before pagination: every article in one response
+        return bot.jsonify({
+            'success': True,
+            'articles': bot.rag_system.knowledge_base,
+            'total_articles': len(bot.rag_system.knowledge_base),
+            'timestamp': bot.datetime.now().isoformat()
+        })
+
+    client = bot.app.test_client()
+    full_page = f'/api/knowledge-base?limit={bot.KB_MAX_PAGE_SIZE}'
+    page = '/api/knowledge-base?limit=100&fields=title,category'
+    results = {
+        'legacy_full_dump': measure(client, '/bench/legacy-knowledge-base', repeat=args.repeat),
+        'max_page': measure(client, full_page, repeat=args.repeat),
+        'max_page_gzip': measure(client, full_page, {'Accept-Encoding': 'gzip'}, args.repeat),
+        'projected_page': measure(client, page, repeat=args.repeat),
+        'projected_page_gzip': measure(client, page, {'Accept-Encoding': 'gzip'}, args.repeat)
+    }
+    etag = results['max_page']['etag']
+    results['max_page_304'] = measure(client, full_page, {'If-None-Match': etag}, args.repeat)
+    for result in results.values():
+        result.pop('etag')
+
+    print(json.dumps({'articles': args.articles, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
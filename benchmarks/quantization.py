@@ -0,0 +1,93 @@
+"""
+Recall, latency and memory of reduced-precision embedding storage
+
+Compares float16 and int8 matrices (with and without the exact re-rank step)
+against the float32 baseline on a synthetic clustered corpus.
+
+Usage:
+    python -m benchmarks.quantization --articles 50000 --queries 200
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import numpy as np
+
+from vector_store import EmbeddingMatrix
+
+
+def synthetic_corpus(n_articles, dimensions, n_clusters, rng):
+    """Clustered unit vectors, roughly how KB articles group by category"""
+    centers = rng.standard_normal((n_clusters, dimensions)).astype(np.float32)
+    assignment = rng.integers(0, n_clusters, n_articles)
+    noise = rng.standard_normal((n_articles, dimensions)).astype(np.float32)
+    return centers[assignment] + 0.6 * noise
+
+
+def synthetic_queries(corpus, n_queries, rng):
+    """Queries are perturbed copies of random articles"""
+    picks = rng.integers(0, len(corpus), n_queries)
+    noise = rng.standard_normal((n_queries, corpus.shape[1])).astype(np.float32)
+    return corpus[picks] + 0.8 * noise
+
+
+def run_config(matrix, queries, truth, top_k, rerank_candidates):
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        indices, _ = matrix.search(query, top_k, rerank_candidates=rerank_candidates)
+        latencies.append(time.perf_counter() - start)
+        hits += len(set(indices.tolist()) & set(expected.tolist()))
+    latencies = np.array(latencies) * 1000
+    return {
+        'precision': matrix.precision,
+        'rerank_candidates': rerank_candidates if matrix.exact is not None else 0,
+        'resident_mb': round(matrix.nbytes / 1e6, 2),
+        f'recall@{top_k}': round(hits / (len(queries) * top_k), 4),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--articles', type=int, default=20000)
+    parser.add_argument('--dimensions', type=int, default=1536)
+    parser.add_argument('--clusters', type=int, default=64)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--rerank-candidates', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    corpus = synthetic_corpus(args.articles, args.dimensions, args.clusters, rng)
+    queries = synthetic_queries(corpus, args.queries, rng)
+
+    baseline = EmbeddingMatrix.build(corpus, 'float32')
+    truth = [baseline.search(q, args.top_k)[0] for q in queries]
+    float64_mb = args.articles * args.dimensions * 8 / 1e6
+
+    results = [run_config(baseline, queries, truth, args.top_k, 0)]
+    with tempfile.TemporaryDirectory() as tmp:
+        for precision in ('float16', 'int8'):
+            codes_only = EmbeddingMatrix.build(corpus, precision)
+            results.append(run_config(codes_only, queries, truth, args.top_k, 0))
+            reranked = EmbeddingMatrix.build(corpus, precision, os.path.join(tmp, f'{precision}.npy'))
+            results.append(run_config(reranked, queries, truth, args.top_k, args.rerank_candidates))
+            del reranked
+
+    print(json.dumps({
+        'articles': args.articles,
+        'dimensions': args.dimensions,
+        'queries': args.queries,
+        'float64_mb': round(float64_mb, 2),
+        'results': results
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
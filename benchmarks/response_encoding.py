@@ -0,0 +1,171 @@
+"""
+Serialization CPU and bytes on the wire for /api/search and /api/knowledge-base
+
+Loads bot.py against a synthetic KB built from its sample articles, with a
+deterministic stand-in for the embeddings API, and compares:
+
+- encoding alone: copied result dicts through Flask's default JSON provider
+  (the previous path) against ScoredArticle views through responses.dumps
+  (orjson when installed)
+- end to end through the test client, before (stdlib JSON, no compression
+  hook) and after configure_responses, for identity, gzip and brotli
+
+Usage:
+    python -m benchmarks.response_encoding --articles 20000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+import zlib
+
+import numpy as np
+
+
+def embed(text, dimensions=1536):
+    """Deterministic unit vector per text, so repeated queries hit the same articles"""
+    rng = np.random.default_rng(zlib.crc32(text.encode()))
+    vector = rng.standard_normal(dimensions).astype(np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+class FakeEmbeddings:
+    class Item:
+        def __init__(self, embedding):
+            self.embedding = embedding
+
+    def create(self, input, model, **kwargs):
+        texts = [input] if isinstance(input, str) else input
+        response = type('Response', (), {})()
+        response.data = [self.Item(embed(text)) for text in texts]
+        return response
+
+
+def time_encoding(encode, build, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        body = encode(build())
+    return {
+        'cpu_us': round((time.process_time() - start) / repeat * 1e6, 1),
+        'bytes': len(body)
+    }
+
+
+def measure(client, method, url, headers, repeat, **kwargs):
+    latencies = []
+    cpu_start = time.process_time()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.open(url, method=method, headers=headers, **kwargs)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        'status': response.status_code,
+        'encoding': response.headers.get('Content-Encoding', 'identity'),
+        'bytes': len(response.get_data()),
+        'p50_ms': round(latencies[len(latencies) // 2], 3),
+        'cpu_ms': round((time.process_time() - cpu_start) / repeat * 1000, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--articles', type=int, default=20000)
+    # Results in the encoding comparison; /api/search itself returns its default top 3
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, repo)
+    # bot.py writes knowledge_base.json into the working directory on import
+    os.chdir(tempfile.mkdtemp())
+    import logging
+    logging.disable(logging.CRITICAL)
+    import openai
+    openai.embeddings = FakeEmbeddings()
+    from flask.json.provider import DefaultJSONProvider
+    import bot
+    import responses
+
+    rag = bot.rag_system
+    samples = rag.knowledge_base
+    rag.knowledge_base = [dict(samples[i % len(samples)], id=f"KB{i:06d}") for i in range(args.articles)]
+    rng = np.random.default_rng(7)
+    vectors = rng.standard_normal((args.articles, 1536)).astype(np.float32)
+    rag.embeddings = rag.build_index(vectors / np.linalg.norm(vectors, axis=1, keepdims=True), rag.embedding_meta['version'])
+    rag.facets = bot.FacetIndex(rag.knowledge_base)
+    rag.boosts.set_articles([a['id'] for a in rag.knowledge_base])
+    rag.kb_revision = uuid.uuid4().hex[:12]
+
+    query = 'Outlook keeps asking for my password after the update'
+    hits = rag.search_knowledge_base(query, top_k=args.top_k)
+    rows = [int(a['id'][2:]) for a in hits]
+    scores = [a['relevance_score'] for a in hits]
+    page = rag.knowledge_base[:bot.KB_MAX_PAGE_SIZE]
+    stdlib = DefaultJSONProvider(bot.app)
+
+    def copied_results():
+        results = []
+        for row, score in zip(rows, scores):
+            article = rag.knowledge_base[row].copy()
+            article['relevance_score'] = score
+            results.append(article)
+        return {'success': True, 'results': results, 'query': query}
+
+    def viewed_results():
+        return {
+            'success': True,
+            'results': [responses.ScoredArticle(rag.knowledge_base[row], relevance_score=score)
+                        for row, score in zip(rows, scores)],
+            'query': query
+        }
+
+    def kb_page():
+        return {'success': True, 'articles': page, 'total_articles': len(rag.knowledge_base)}
+
+    encoding = {
+        'search_copies_stdlib': time_encoding(lambda p: stdlib.dumps(p).encode(), copied_results, args.repeat * 20),
+        'search_views_fast': time_encoding(responses.dumps, viewed_results, args.repeat * 20),
+        'kb_page_stdlib': time_encoding(lambda p: stdlib.dumps(p).encode(), kb_page, args.repeat),
+        'kb_page_fast': time_encoding(responses.dumps, kb_page, args.repeat),
+    }
+
+    client = bot.app.test_client()
+    kb_url = f'/api/knowledge-base?limit={bot.KB_MAX_PAGE_SIZE}'
+    accepts = {'identity': {}, 'gzip': {'Accept-Encoding': 'gzip'}}
+    if responses.brotli is not None:
+        accepts['br'] = {'Accept-Encoding': 'br, gzip'}
+
+    def run():
+        results = {}
+        for name, headers in accepts.items():
+            results[f'search_{name}'] = measure(client, 'POST', '/api/search', headers, args.repeat, json={'query': query})
+            results[f'knowledge_base_{name}'] = measure(client, 'GET', kb_url, headers, args.repeat)
+        return results
+
+    wire = {'after': run()}
+    # Before: Flask's stdlib provider (taught about result views), no compression
+    # hook, stdlib json_response
+    bot.app.after_request_funcs[None].remove(responses.compress_response)
+    bot.app.json = DefaultJSONProvider(bot.app)
+    bot.app.json.default = responses.encode_default
+    orjson, responses.orjson = responses.orjson, None
+    wire['before'] = run()
+    responses.orjson = orjson
+
+    print(json.dumps({
+        'articles': args.articles,
+        'orjson': orjson is not None,
+        'brotli': responses.brotli is not None,
+        'encoding': encoding,
+        'wire': wire
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
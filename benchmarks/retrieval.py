@@ -0,0 +1,317 @@
+"""
+Search quality and speed of the demo and production retrieval paths
+
+Builds synthetic knowledge bases (1k to 500k articles) from the sample
+articles in bot.py and demo_app.py. Every synthetic article is a sample
+article plus a unique product code and a few words of another sample, and
+every query is a noisy subset of one article's title and content words plus
+its product code, so each query has exactly one relevant article. Both
+engines are run on the same KB and queries:
+
+- demo: SimpleRAGDemo.search_knowledge_base (keyword scoring)
+- bot: ITSupportRAG.search_knowledge_base, with the embeddings API replaced
+  by a deterministic hashed bag-of-words embedder
+
+Reported per engine and KB size: build time, memory retained and peak while
+building (tracemalloc, so build times are inflated and only comparable
+between runs of this script), single-threaded QPS, p50/p99 latency, recall@1,
+recall@k and MRR@k. Output is JSON; --baseline adds each metric's relative
+change against an earlier run, for comparing commits.
+
+Usage:
+    python -m benchmarks.retrieval --sizes 1000,10000,100000 --output bench.json
+    python -m benchmarks.retrieval --sizes 1000,10000,100000 --baseline bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+MAX_ARTICLES = 500000
+WARMUP_QUERIES = 10
+# Metrics where a larger value is better, for the direction of baseline deltas
+HIGHER_IS_BETTER = ('qps', 'recall_at_1', 'recall_at_k', 'mrr')
+# Relative change past which a metric is listed as a regression
+REGRESSION_THRESHOLD = 0.1
+
+
+class HashedEmbedder:
+    """Hashed bag of words: deterministic, offline, and close for texts sharing words"""
+
+    def __init__(self, dimensions):
+        self.dimensions = dimensions
+        self._buckets = {}
+
+    def buckets(self, text):
+        buckets = []
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            bucket = self._buckets.get(token)
+            if bucket is None:
+                bucket = self._buckets[token] = zlib.crc32(token.encode()) % self.dimensions
+            buckets.append(bucket)
+        return buckets
+
+    def embed_many(self, texts):
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        rows, columns = [], []
+        for row, text in enumerate(texts):
+            buckets = self.buckets(text)
+            rows.extend([row] * len(buckets))
+            columns.extend(buckets)
+        np.add.at(vectors, (np.array(rows, dtype=np.int64), np.array(columns, dtype=np.int64)), 1.0)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors
+
+
+class FakeEmbeddings:
+    """Stands in for openai.embeddings"""
+
+    class Item:
+        def __init__(self, embedding):
+            self.embedding = embedding
+
+    def __init__(self, embedder):
+        self.embedder = embedder
+
+    def create(self, input, model, **kwargs):
+        texts = [input] if isinstance(input, str) else input
+        response = type('Response', (), {})()
+        response.data = [self.Item(vector) for vector in self.embedder.embed_many(texts)]
+        return response
+
+
+def product_code(i):
+    # Letters and digits from the index, so codes are unique and tokenize as one word
+    return f"px{i:06d}{'abcdefghij'[i % 10]}"
+
+
+def synthetic_kb(templates, size, rng):
+    articles = []
+    for i in range(size):
+        template = templates[i % len(templates)]
+        other = templates[rng.randrange(len(templates))]
+        code = product_code(i)
+        extra = ' '.join(rng.sample(TOKEN_PATTERN.findall(other['content'].lower()), 3))
+        articles.append({
+            'id': f"KB{i:06d}",
+            'title': f"{template['title']} ({code})",
+            'category': template['category'],
+            'content': f"{template['content']} Applies to {code}. See also: {extra}.",
+            'tags': list(template['tags']),
+            'keywords': list(template.get('keywords') or TOKEN_PATTERN.findall(template['title'].lower())) + [code],
+            'created_at': template.get('created_at', '2024-01-01T00:00:00')
+        })
+    return articles
+
+
+def synthetic_queries(articles, count, rng):
+    """(query, relevant article id) pairs; queries reuse a few of the article's words plus its code"""
+    queries = []
+    for _ in range(count):
+        article = articles[rng.randrange(len(articles))]
+        code = product_code(int(article['id'][2:]))
+        title_words = [w for w in TOKEN_PATTERN.findall(article['title'].lower()) if w != code]
+        content_words = TOKEN_PATTERN.findall(article['content'].lower())
+        words = rng.sample(title_words, min(2, len(title_words))) + rng.sample(content_words, 2) + [code]
+        rng.shuffle(words)
+        queries.append((' '.join(words), article['id']))
+    return queries
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def evaluate(search, queries, top_k):
+    for query, _ in queries[:WARMUP_QUERIES]:
+        search(query, top_k)
+
+    latencies = []
+    hits_at_1 = hits_at_k = reciprocal_ranks = 0.0
+    for query, relevant in queries:
+        start = time.perf_counter()
+        results = search(query, top_k)
+        latencies.append(time.perf_counter() - start)
+        ids = [article['id'] for article in results]
+        if relevant in ids:
+            rank = ids.index(relevant) + 1
+            hits_at_1 += rank == 1
+            hits_at_k += 1
+            reciprocal_ranks += 1 / rank
+
+    latencies.sort()
+    n = len(queries)
+    return {
+        'qps': round(n / sum(latencies), 1),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.5) * 1000, 3),
+            'p99': round(percentile(latencies, 0.99) * 1000, 3),
+            'mean': round(sum(latencies) / n * 1000, 3)
+        },
+        'recall_at_1': round(hits_at_1 / n, 4),
+        'recall_at_k': round(hits_at_k / n, 4),
+        'mrr': round(reciprocal_ranks / n, 4)
+    }
+
+
+def measure_build(build):
+    """Run build under tracemalloc; returns (result, build seconds, retained bytes, peak bytes)"""
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - start
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, after - before, peak - before
+
+
+def build_demo(demo_app, articles):
+    demo_app.KNOWLEDGE_BASE = articles
+    return demo_app.SimpleRAGDemo()
+
+
+def build_bot(bot, articles, vectors):
+    rag = bot.rag_system
+    rag.knowledge_base = articles
+    rag.embeddings = rag.build_index(vectors, rag.embedding_meta['version'])
+    rag.facets = bot.FacetIndex(articles)
+    rag.boosts.set_articles([article['id'] for article in articles])
+    return rag
+
+
+def current_commit(repo):
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=repo, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """Relative change of each metric against the baseline run's matching engine and size"""
+    previous = {(r['engine'], r['articles']): r for r in baseline.get('results', [])}
+    for result in results:
+        before = previous.get((result['engine'], result['articles']))
+        if before is None:
+            continue
+        flat = {**{k: result[k] for k in HIGHER_IS_BETTER}, **result['latency_ms'], 'retained_bytes': result['memory']['retained_bytes']}
+        old = {**{k: before[k] for k in HIGHER_IS_BETTER}, **before['latency_ms'], 'retained_bytes': before['memory']['retained_bytes']}
+        result['change'] = {
+            key: round((value - old[key]) / old[key], 4) if old[key] else None
+            for key, value in flat.items()
+        }
+        result['regressions'] = [
+            key for key, change in result['change'].items()
+            if change is not None and (change < -REGRESSION_THRESHOLD if key in HIGHER_IS_BETTER else change > REGRESSION_THRESHOLD)
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,10000,100000', help='comma-separated KB sizes, up to 500000')
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--engines', default='demo,bot')
+    parser.add_argument('--dimensions', type=int, default=1536, help='hashed embedding size for the bot engine; lower it for the largest KBs')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    parser.add_argument('--baseline', help='JSON report of an earlier run to compare against')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    if any(size < 1 or size > MAX_ARTICLES for size in sizes):
+        parser.error(f'sizes must be between 1 and {MAX_ARTICLES}')
+    engines = args.engines.split(',')
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    output = os.path.abspath(args.output) if args.output else None
+
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, repo)
+    # Both apps write their databases and knowledge_base.json into the working directory
+    os.chdir(tempfile.mkdtemp())
+    import logging
+    logging.disable(logging.CRITICAL)
+    import openai
+    embedder = HashedEmbedder(args.dimensions)
+    openai.embeddings = FakeEmbeddings(embedder)
+    import bot
+    import demo_app
+
+    # Sample articles of both apps, once per title
+    templates = list({article['title']: article for article in demo_app.KNOWLEDGE_BASE + bot.rag_system.knowledge_base}.values())
+
+    results = []
+    for size in sizes:
+        rng = random.Random(args.seed)
+        articles = synthetic_kb(templates, size, rng)
+        queries = synthetic_queries(articles, args.queries, rng)
+        for engine in engines:
+            if engine == 'demo':
+                index, seconds, retained, peak = measure_build(lambda: build_demo(demo_app, articles))
+            elif engine == 'bot':
+                # Embedding the KB stands in for the API calls, so it is outside the measurement
+                vectors = embedder.embed_many([bot.article_text(article) for article in articles])
+                index, seconds, retained, peak = measure_build(lambda: build_bot(bot, articles, vectors))
+            else:
+                parser.error(f'unknown engine {engine}')
+            result = {
+                'engine': engine,
+                'articles': size,
+                'queries': len(queries),
+                'top_k': args.top_k,
+                'build_seconds': round(seconds, 3),
+                'memory': {'retained_bytes': retained, 'peak_bytes': peak},
+                **evaluate(index.search_knowledge_base, queries, args.top_k)
+            }
+            results.append(result)
+            print(f"{engine} {size}: {result['qps']} qps, p99 {result['latency_ms']['p99']} ms, "
+                  f"recall@{args.top_k} {result['recall_at_k']}, MRR {result['mrr']}", file=sys.stderr)
+            del index
+
+    report = {
+        'commit': current_commit(repo),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'config': {
+            'queries': args.queries,
+            'top_k': args.top_k,
+            'dimensions': args.dimensions,
+            'seed': args.seed,
+            'embedding_precision': bot.EMBEDDING_PRECISION,
+            'rerank_mode': bot.RERANK_MODE
+        },
+        'results': results
+    }
+    if baseline is not None:
+        compare(results, baseline)
+        report['baseline'] = {
+            'commit': baseline.get('commit'),
+            # Changes between runs with different settings are not regressions
+            'same_config': baseline.get('config') == report['config']
+        }
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text + '\n')
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
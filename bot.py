@@ -7,20 +7,36 @@ Core RAG system with OpenAI integration for intelligent IT support assistance
 import os
 import json
 import numpy as np
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import openai
-from sklearn.metrics.pairwise import cosine_similarity
 from dotenv import load_dotenv
 import logging
+import threading
+import time
 from datetime import datetime
 import uuid
+from vector_store import EmbeddingMatrix
+from kb_filters import FacetIndex, parse_filters, describe_filters
+from reranker import Reranker, LexicalScorer, LLMScorer
+from responses import json_response, make_etag, not_modified, encode_cursor, decode_cursor, configure_responses, ScoredArticle
+from static_assets import AssetBundle
+from metrics import REGISTRY, instrument_app, metrics_response, record_stage, stage
+from tracing import span, trace_requests, traced, tracer
+from profiling import DEFAULT_SAMPLE_INTERVAL_MS, profile_requests, profiler, track_allocations
+from incident_classifier import IncidentClassifier
+from feedback_boosts import ArticleBoosts, classifier_clusters, parse_feedback_target
+from feedback_log import FeedbackLog
+from feedback_analytics import parse_rating
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)
+configure_responses(app)
+# Registered after the compression hook so it runs before it
+instrument_app(app)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -29,20 +45,185 @@ logger = logging.getLogger(__name__)
 # OpenAI configuration
 openai.api_key = os.getenv('OPENAI_API_KEY')
 
+# Embedding model for newly built indexes. An existing index keeps the model
+# that produced its vectors until a re-embedding job cuts over to a new one.
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'text-embedding-ada-002')
+# Knowledge bases saved before model metadata was recorded used this model
+LEGACY_EMBEDDING_MODEL = 'text-embedding-ada-002'
+FALLBACK_EMBEDDING_DIM = 1536
+
+# In-memory precision of the embedding matrix: float32, float16 or int8.
+# Reduced precisions keep full vectors in a memory-mapped sidecar file and
+# re-rank the top candidates against them.
+EMBEDDING_PRECISION = os.getenv('EMBEDDING_PRECISION', 'float32')
+EMBEDDING_RERANK_CANDIDATES = int(os.getenv('EMBEDDING_RERANK_CANDIDATES', '20'))
+EMBEDDING_VECTORS_PREFIX = os.getenv('EMBEDDING_VECTORS_PREFIX', 'knowledge_base_vectors')
+
+# Optional second-stage reranking: off, local (lexical scorer) or llm (one
+# batched chat call; RERANK_LLM_BASE_URL can point at a mock server)
+RERANK_MODE = os.getenv('RERANK_MODE', 'off')
+RERANK_CANDIDATES = int(os.getenv('RERANK_CANDIDATES', '20'))
+RERANK_BUDGET_MS = float(os.getenv('RERANK_BUDGET_MS', '300'))
+RERANK_MAX_INFLIGHT = int(os.getenv('RERANK_MAX_INFLIGHT', '4'))
+RERANK_LLM_MODEL = os.getenv('RERANK_LLM_MODEL', 'gpt-4o-mini')
+RERANK_LLM_BASE_URL = os.getenv('RERANK_LLM_BASE_URL')
+
+# Feedback naming KB articles feeds per-article ranking boosts; the log is
+# shared with the demo app when both run from the same directory
+FEEDBACK_DB_PATH = os.getenv('FEEDBACK_DB_PATH', 'feedback.db')
+FEEDBACK_BOOST_WEIGHT = float(os.getenv('FEEDBACK_BOOST_WEIGHT', '0.1'))
+
+# Tracing: share of new traces recorded (callers sending a sampled traceparent
+# are always traced), OTLP/JSON lines file and optional OTLP/HTTP collector URL
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0'))
+TRACE_EXPORT_PATH = os.getenv('TRACE_EXPORT_PATH', 'traces.jsonl')
+TRACE_OTLP_ENDPOINT = os.getenv('TRACE_OTLP_ENDPOINT')
+trace_requests(app, 'it-support-bot', TRACE_SAMPLE_RATE, TRACE_EXPORT_PATH, TRACE_OTLP_ENDPOINT)
+
+# Opt-in profiling (also switchable at /api/admin/profile): cProfile every Nth
+# request, .prof dumps to PROFILE_DIR, tracemalloc for KB loading and search,
+# and a stack sampler for the first PROFILE_SAMPLE_SECONDS after startup
+PROFILE_EVERY_N = int(os.getenv('PROFILE_EVERY_N', '0'))
+PROFILE_DIR = os.getenv('PROFILE_DIR', '')
+PROFILE_TRACEMALLOC = os.getenv('PROFILE_TRACEMALLOC', '') == '1'
+PROFILE_SAMPLE_SECONDS = float(os.getenv('PROFILE_SAMPLE_SECONDS', '0'))
+profile_requests(app, PROFILE_EVERY_N, PROFILE_DIR, PROFILE_TRACEMALLOC, PROFILE_SAMPLE_SECONDS)
+
+# /api/knowledge-base pagination
+KB_PAGE_SIZE = 100
+KB_MAX_PAGE_SIZE = 1000
+
+def create_reranker():
+    """Build the configured reranker, or None when reranking is off"""
+    if RERANK_MODE == 'local':
+        scorer = LexicalScorer()
+    elif RERANK_MODE == 'llm':
+        client = openai
+        if RERANK_LLM_BASE_URL:
+            client = openai.OpenAI(base_url=RERANK_LLM_BASE_URL, api_key=openai.api_key or 'mock')
+        scorer = LLMScorer(client, RERANK_LLM_MODEL)
+    else:
+        return None
+    return Reranker(scorer, RERANK_CANDIDATES, RERANK_BUDGET_MS, RERANK_MAX_INFLIGHT)
+
+def article_text(article):
+    """Text that gets embedded for a KB article"""
+    return f"{article['title']} {article['content']}"
+
+class ReembeddingJob:
+    """Background migration of the KB embeddings to a new model.
+
+    Articles are embedded in throttled batches into a separate index while
+    queries keep using the current one; the RAG system swaps both in a single
+    step once every article has a vector from the new model.
+    """
+    def __init__(self, rag, model, batch_size=16, throttle_seconds=1.0):
+        self.rag = rag
+        self.model = model
+        self.batch_size = max(1, int(batch_size))
+        self.throttle_seconds = max(0.0, float(throttle_seconds))
+        self.status = 'pending'
+        self.processed = 0
+        self.total = len(rag.knowledge_base)
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='reembedding-job', daemon=True)
+
+    def start(self):
+        self.status = 'running'
+        self.started_at = datetime.now().isoformat()
+        self._thread.start()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def is_running(self):
+        return self.status in ('pending', 'running')
+
+    def _run(self):
+        try:
+            articles = list(self.rag.knowledge_base)
+            self.total = len(articles)
+            vectors = []
+            for start in range(0, len(articles), self.batch_size):
+                if self._cancelled.is_set():
+                    self.status = 'cancelled'
+                    logger.info(f"Re-embedding to {self.model} cancelled after {self.processed} articles")
+                    return
+                batch = articles[start:start + self.batch_size]
+                vectors.extend(self.rag.embed_texts([article_text(a) for a in batch], self.model))
+                self.processed = len(vectors)
+                if self.processed < self.total:
+                    time.sleep(self.throttle_seconds)
+
+            self.rag.cut_over(self.model, vectors)
+            self.processed = len(self.rag.knowledge_base)
+            self.total = self.processed
+            self.status = 'completed'
+        except Exception as e:
+            logger.error(f"Re-embedding to {self.model} failed: {e}")
+            self.status = 'failed'
+            self.error = str(e)
+        finally:
+            self.finished_at = datetime.now().isoformat()
+
+    def to_dict(self):
+        return {
+            'model': self.model,
+            'status': self.status,
+            'processed': self.processed,
+            'total': self.total,
+            'batch_size': self.batch_size,
+            'throttle_seconds': self.throttle_seconds,
+            'error': self.error,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
 class ITSupportRAG:
     def __init__(self):
         self.knowledge_base = []
-        self.embeddings = []
+        self.embeddings = EmbeddingMatrix.build([])
+        self.facets = FacetIndex([])
+        # Changes whenever articles change; keys ETags of KB listings
+        self.kb_revision = uuid.uuid4().hex[:12]
+        # Which model produced self.embeddings; queries must be embedded with the same one
+        self.embedding_meta = self.new_embedding_meta(EMBEDDING_MODEL, version=1)
+        self.reembedding_job = None
+        self.reranker = create_reranker()
+        # Per-article quality priors from feedback, overall and per query category
+        self.boosts = ArticleBoosts(*classifier_clusters(IncidentClassifier.from_file()), weight=FEEDBACK_BOOST_WEIGHT)
+        self._index_lock = threading.Lock()
         self.load_knowledge_base()
+
+    @staticmethod
+    def new_embedding_meta(model, version):
+        return {
+            'model': model,
+            'version': version,
+            'created_at': datetime.now().isoformat()
+        }
         
+    @track_allocations('rag.load_knowledge_base')
     def load_knowledge_base(self):
         """Load knowledge base from JSON file or create sample data"""
         try:
             with open('knowledge_base.json', 'r') as f:
                 data = json.load(f)
                 self.knowledge_base = data.get('articles', [])
-                self.embeddings = np.array(data.get('embeddings', []))
+                self.embedding_meta = data.get('embedding_meta') or self.new_embedding_meta(LEGACY_EMBEDDING_MODEL, version=1)
+                self.embeddings = self.build_index(data.get('embeddings', []), self.embedding_meta['version'])
+                self.facets = FacetIndex(self.knowledge_base)
+                self.boosts.set_articles([a['id'] for a in self.knowledge_base])
+                self.kb_revision = uuid.uuid4().hex[:12]
                 logger.info(f"Loaded {len(self.knowledge_base)} KB articles")
+                if self.embedding_meta['model'] != EMBEDDING_MODEL:
+                    logger.warning(
+                        f"KB index was built with {self.embedding_meta['model']}, configured model is "
+                        f"{EMBEDDING_MODEL}; queries use the stored model until re-embedding completes"
+                    )
         except FileNotFoundError:
             logger.info("No existing knowledge base found, creating sample data...")
             self.create_sample_knowledge_base()
@@ -207,35 +388,100 @@ class ITSupportRAG:
         ]
         
         self.knowledge_base = sample_articles
-        self.generate_embeddings()
+        self.generate_embeddings(offline_fallback=True)
         self.save_knowledge_base()
         
-    def generate_embeddings(self):
-        """Generate embeddings for knowledge base articles using OpenAI"""
+    def build_index(self, vectors, version):
+        """Build the in-memory embedding matrix at the configured precision"""
+        exact_path = None
+        if EMBEDDING_PRECISION != 'float32':
+            exact_path = f"{EMBEDDING_VECTORS_PREFIX}.v{version}.npy"
+        return EmbeddingMatrix.build(vectors, EMBEDDING_PRECISION, exact_path)
+
+    @traced('rag.embed_texts')
+    def embed_texts(self, texts, model):
+        """Embed a batch of texts with the given model in a single API call; API errors propagate"""
+        with stage('embed_batch'), span('openai.embeddings', 'client', model=model, inputs=len(texts)):
+            response = openai.embeddings.create(
+                input=texts,
+                model=model
+            )
+        return [item.embedding for item in response.data]
+
+    def generate_embeddings(self, batch_size=16, offline_fallback=False):
+        """Generate embeddings for knowledge base articles using OpenAI.
+
+        offline_fallback substitutes random vectors when the API is
+        unreachable; only the sample-KB bootstrap uses it, so the demo starts
+        without an API key. Otherwise API errors propagate and the current
+        index is left in place.
+        """
+        model = self.embedding_meta['model']
         embeddings = []
         
-        for article in self.knowledge_base:
-            text = f"{article['title']} {article['content']}"
+        for start in range(0, len(self.knowledge_base), batch_size):
+            batch = self.knowledge_base[start:start + batch_size]
+            texts = [article_text(a) for a in batch]
             try:
-                response = openai.embeddings.create(
-                    input=text,
-                    model="text-embedding-ada-002"
-                )
-                embedding = response.data[0].embedding
-                embeddings.append(embedding)
-                logger.info(f"Generated embedding for {article['id']}")
+                embeddings.extend(self.embed_texts(texts, model))
             except Exception as e:
-                logger.error(f"Error generating embedding for {article['id']}: {e}")
-                # Fallback: create random embedding for offline capability
-                embeddings.append(np.random.rand(1536).tolist())
+                if not offline_fallback:
+                    raise
+                logger.error(f"Error generating embeddings with {model}: {e}")
+                # Fallback: create random embeddings for offline capability
+                embeddings.extend(np.random.rand(FALLBACK_EMBEDDING_DIM).tolist() for _ in texts)
+                continue
+            logger.info(f"Generated embeddings for {batch[0]['id']}..{batch[-1]['id']} with {model}")
                 
-        self.embeddings = np.array(embeddings) if embeddings else np.array([])
+        index = self.build_index(embeddings, self.embedding_meta['version'])
+        facets = FacetIndex(self.knowledge_base)
+        self.boosts.set_articles([a['id'] for a in self.knowledge_base])
+        with self._index_lock:
+            self.embeddings = index
+            self.facets = facets
+            self.kb_revision = uuid.uuid4().hex[:12]
+
+    def start_reembedding(self, model, batch_size=16, throttle_seconds=1.0):
+        """Start migrating the index to a new embedding model in the background"""
+        if self.reembedding_job and self.reembedding_job.is_running():
+            raise RuntimeError(f"Re-embedding to {self.reembedding_job.model} already in progress")
+        self.reembedding_job = ReembeddingJob(self, model, batch_size, throttle_seconds)
+        self.reembedding_job.start()
+        return self.reembedding_job
+
+    def cut_over(self, model, vectors):
+        """Atomically switch the active index to vectors produced by a new model"""
+        vectors = list(vectors)
+        while True:
+            # Articles added while the job was running still need new-model vectors
+            missing = self.knowledge_base[len(vectors):]
+            if missing:
+                vectors.extend(self.embed_texts([article_text(a) for a in missing], model))
+            index = self.build_index(vectors, self.embedding_meta['version'] + 1)
+            with self._index_lock:
+                if len(vectors) == len(self.knowledge_base):
+                    old_index = self.embeddings
+                    self.embeddings = index
+                    self.embedding_meta = self.new_embedding_meta(model, self.embedding_meta['version'] + 1)
+                    break
+        if old_index.exact_path and old_index.exact_path != index.exact_path:
+            # In-flight searches keep their mapping; the file just loses its name
+            try:
+                os.remove(old_index.exact_path)
+            except OSError:
+                pass
+        logger.info(f"Cut over KB index to {model} (version {self.embedding_meta['version']})")
+        self.save_knowledge_base()
         
+    @traced('rag.save_knowledge_base')
     def save_knowledge_base(self):
         """Save knowledge base and embeddings to JSON for offline access"""
+        with self._index_lock:
+            embeddings, embedding_meta = self.embeddings, self.embedding_meta
         data = {
             "articles": self.knowledge_base,
-            "embeddings": self.embeddings.tolist() if len(self.embeddings) > 0 else [],
+            "embeddings": embeddings.to_list(),
+            "embedding_meta": embedding_meta,
             "last_updated": datetime.now().isoformat()
         }
         
@@ -243,76 +489,113 @@ class ITSupportRAG:
             json.dump(data, f, indent=2)
         logger.info("Knowledge base saved to JSON")
         
-    def search_knowledge_base(self, query, top_k=3):
-        """Search knowledge base using semantic similarity"""
+    @traced('rag.search_knowledge_base')
+    @track_allocations('rag.search_knowledge_base')
+    def search_knowledge_base(self, query, top_k=3, filters=None, timings=None):
+        """Search knowledge base using semantic similarity.
+
+        filters (category, tags, date_from, date_to) narrow the candidate rows
+        through the facet posting lists before any vector is scored. When a
+        reranker is configured a wider candidate set is retrieved and reranked.
+        Per-stage milliseconds are written into timings if a dict is given.
+        """
+        timings = timings if timings is not None else {}
+        start = time.perf_counter()
+        # Snapshot the active index so a concurrent cut-over can't mix models
+        with self._index_lock:
+            embeddings, facets, model = self.embeddings, self.facets, self.embedding_meta['model']
+        rows = facets.select(**filters) if filters else None
+        if rows is not None and len(rows) == 0:
+            return []
+
         try:
+
             # Generate embedding for query
-            response = openai.embeddings.create(
-                input=query,
-                model="text-embedding-ada-002"
-            )
-            query_embedding = np.array(response.data[0].embedding).reshape(1, -1)
+            with span('openai.embeddings', 'client', model=model, inputs=1):
+                response = openai.embeddings.create(
+                    input=query,
+                    model=model
+                )
+            query_embedding = np.array(response.data[0].embedding)
+            embedded = time.perf_counter()
+            timings['embed_ms'] = round((embedded - start) * 1000, 3)
+            record_stage('embed', embedded - start)
             
-            # Calculate similarities
-            similarities = cosine_similarity(query_embedding, self.embeddings)[0]
+            # Score the matrix and re-rank the best candidates at full precision
+            n_candidates = max(top_k, self.reranker.candidates) if self.reranker else top_k
+            with span('vector_store.search', precision=embeddings.precision, candidates=n_candidates):
+                top_indices, similarities = embeddings.search(
+                    query_embedding, n_candidates, rerank_candidates=EMBEDDING_RERANK_CANDIDATES, rows=rows,
+                    boost=self.boosts.vector(query, len(embeddings))
+                )
+            scored = time.perf_counter()
+            timings['score_ms'] = round((scored - embedded) * 1000, 3)
+            record_stage('vector_score', scored - embedded)
             
-            # Get top-k results
-            top_indices = np.argsort(similarities)[::-1][:top_k]
+            knowledge_base = self.knowledge_base
+            results = [
+                ScoredArticle(knowledge_base[idx], relevance_score=float(score))
+                for idx, score in zip(top_indices, similarities)
+            ]
             
-            results = []
-            for idx in top_indices:
-                article = self.knowledge_base[idx].copy()
-                article['relevance_score'] = float(similarities[idx])
-                results.append(article)
+            if self.reranker:
+                results = self.reranker.rerank(query, results, top_k, (scored - start) * 1000, timings)
+            timings['search_ms'] = round((time.perf_counter() - start) * 1000, 3)
                 
             return results
             
         except Exception as e:
             logger.error(f"Error in knowledge base search: {e}")
             # Fallback: return random articles for offline demo
+            if rows is not None:
+                return [self.knowledge_base[idx] for idx in rows[:top_k]]
             return self.knowledge_base[:top_k]
             
+    @traced('rag.summarize_incident')
     def summarize_incident(self, incident_text):
         """Summarize incident using GPT-4"""
         try:
-            response = openai.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are an IT support expert. Summarize the incident concisely, identifying key issues and priority level."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Incident details: {incident_text}"
-                    }
-                ],
-                max_tokens=200
-            )
+            with stage('llm_summarize'), span('openai.chat.completions', 'client', model='gpt-4'):
+                response = openai.chat.completions.create(
+                    model="gpt-4",
+                    messages=[
+                        {
+                            "role": "system", 
+                            "content": "You are an IT support expert. Summarize the incident concisely, identifying key issues and priority level."
+                        },
+                        {
+                            "role": "user",
+                            "content": f"Incident details: {incident_text}"
+                        }
+                    ],
+                    max_tokens=200
+                )
             return response.choices[0].message.content
         except Exception as e:
             logger.error(f"Error summarizing incident: {e}")
             return "Summary unavailable - operating in offline mode"
             
+    @traced('rag.generate_solution')
     def generate_solution(self, incident_summary, relevant_kb):
         """Generate solution using RAG approach"""
         try:
             kb_context = "\n".join([f"KB{i+1}: {kb['content']}" for i, kb in enumerate(relevant_kb)])
             
-            response = openai.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an IT support assistant. Use the provided knowledge base articles to suggest solutions. Always cite relevant KB articles."
-                    },
-                    {
-                        "role": "user", 
-                        "content": f"Incident: {incident_summary}\n\nRelevant KB Articles:\n{kb_context}\n\nProvide step-by-step solution:"
-                    }
-                ],
-                max_tokens=400
-            )
+            with stage('llm_generate'), span('openai.chat.completions', 'client', model='gpt-4'):
+                response = openai.chat.completions.create(
+                    model="gpt-4",
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "You are an IT support assistant. Use the provided knowledge base articles to suggest solutions. Always cite relevant KB articles."
+                        },
+                        {
+                            "role": "user", 
+                            "content": f"Incident: {incident_summary}\n\nRelevant KB Articles:\n{kb_context}\n\nProvide step-by-step solution:"
+                        }
+                    ],
+                    max_tokens=400
+                )
             return response.choices[0].message.content
         except Exception as e:
             logger.error(f"Error generating solution: {e}")
@@ -321,134 +604,39 @@ class ITSupportRAG:
 # Initialize RAG system
 rag_system = ITSupportRAG()
 
+# Rebuild ranking boosts from the log's article rollups plus its uncompacted entries
+feedback_log = FeedbackLog(FEEDBACK_DB_PATH)
+rag_system.boosts.restore(*feedback_log.article_feedback())
+
+def queue_depths():
+    job = rag_system.reembedding_job
+    return {
+        ('feedback_log',): feedback_log.to_dict()['queued'],
+        ('reembedding',): job.total - job.processed if job and job.is_running() else 0
+    }
+
+def rerank_outcomes():
+    if not rag_system.reranker:
+        return {}
+    stats = rag_system.reranker.to_dict()['stats']
+    return {(outcome,): stats[outcome] for outcome in ('reranked', 'skipped_budget', 'skipped_load', 'errors')}
+
+# Read when /metrics is scraped, so they cost nothing per request
+REGISTRY.gauge_callback('it_support_queue_depth', 'Items waiting in background queues', ('queue',), queue_depths)
+REGISTRY.counter_callback('it_support_rerank_total', 'Reranking attempts by outcome', ('outcome',), rerank_outcomes)
+
+# UI pages and assets, rendered and precompressed once at startup
+ui_assets = AssetBundle(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'bot'), '/assets')
+
 @app.route('/')
 def home():
     """Main interface for IT Support Assistant"""
-    return render_template_string("""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>IT Support Assistant - RAG System</title>
-        <style>
-            body { font-family: Arial, sans-serif; margin: 20px; background: #f5f5f5; }
-            .container { max-width: 1200px; margin: 0 auto; background: white; padding: 20px; border-radius: 8px; }
-            .header { text-align: center; color: #333; border-bottom: 2px solid #007acc; padding-bottom: 20px; }
-            .section { margin: 20px 0; padding: 15px; border: 1px solid #ddd; border-radius: 5px; }
-            .button { background: #007acc; color: white; padding: 10px 20px; border: none; border-radius: 5px; cursor: pointer; }
-            .button:hover { background: #005a99; }
-            textarea { width: 100%; height: 100px; margin: 10px 0; padding: 10px; }
-            .result { background: #f9f9f9; padding: 15px; margin: 10px 0; border-left: 4px solid #007acc; }
-            .kb-article { background: #e8f4f8; padding: 10px; margin: 5px 0; border-radius: 5px; }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>🔧 IT Support Assistant</h1>
-                <h2>AI-Powered Co-Pilot with Offline RAG</h2>
-                <p><strong>Intelligent Enterprise IT Support Solution</strong></p>
-                <p>Advanced RAG System for Support Teams</p>
-            </div>
-            
-            <div class="section">
-                <h3>📋 Incident Analysis & Summarization</h3>
-                <textarea id="incident" placeholder="Describe the IT incident or issue..."></textarea>
-                <button class="button" onclick="analyzeIncident()">Analyze Incident</button>
-                <div id="incident-result"></div>
-            </div>
-            
-            <div class="section">
-                <h3>🔍 Knowledge Base Search</h3>
-                <textarea id="search" placeholder="Search for solutions or troubleshooting steps..."></textarea>
-                <button class="button" onclick="searchKB()">Search Knowledge Base</button>
-                <div id="search-result"></div>
-            </div>
-            
-            <div class="section">
-                <h3>🤖 Complete RAG Solution</h3>
-                <textarea id="problem" placeholder="Describe your complete IT problem for AI-powered solution..."></textarea>
-                <button class="button" onclick="getSolution()">Get AI Solution</button>
-                <div id="solution-result"></div>
-            </div>
-            
-            <div class="section">
-                <h3>📚 Available Knowledge Base Articles</h3>
-                <button class="button" onclick="loadKB()">Load Knowledge Base</button>
-                <div id="kb-list"></div>
-            </div>
-        </div>
-        
-        <script>
-            async function analyzeIncident() {
-                const incident = document.getElementById('incident').value;
-                const response = await fetch('/api/summarize', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({incident: incident})
-                });
-                const result = await response.json();
-                document.getElementById('incident-result').innerHTML = 
-                    `<div class="result"><h4>📊 Incident Summary:</h4><p>${result.summary}</p></div>`;
-            }
-            
-            async function searchKB() {
-                const query = document.getElementById('search').value;
-                const response = await fetch('/api/search', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({query: query})
-                });
-                const result = await response.json();
-                let html = '<div class="result"><h4>🔍 Search Results:</h4>';
-                result.results.forEach(article => {
-                    html += `<div class="kb-article">
-                        <h5>${article.title} (${(article.relevance_score * 100).toFixed(1)}% relevant)</h5>
-                        <p><strong>Category:</strong> ${article.category}</p>
-                        <p>${article.content}</p>
-                    </div>`;
-                });
-                html += '</div>';
-                document.getElementById('search-result').innerHTML = html;
-            }
-            
-            async function getSolution() {
-                const problem = document.getElementById('problem').value;
-                const response = await fetch('/api/solution', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({problem: problem})
-                });
-                const result = await response.json();
-                document.getElementById('solution-result').innerHTML = 
-                    `<div class="result">
-                        <h4>🎯 AI-Generated Solution:</h4>
-                        <div class="kb-article"><h5>Summary:</h5><p>${result.summary}</p></div>
-                        <div class="kb-article"><h5>Solution:</h5><p>${result.solution}</p></div>
-                        <div class="kb-article"><h5>Referenced KB Articles:</h5>
-                            ${result.kb_articles.map(kb => `<p>• ${kb.title} (${kb.category})</p>`).join('')}
-                        </div>
-                    </div>`;
-            }
-            
-            async function loadKB() {
-                const response = await fetch('/api/knowledge-base');
-                const result = await response.json();
-                let html = '<div class="result"><h4>📚 Knowledge Base Articles:</h4>';
-                result.articles.forEach(article => {
-                    html += `<div class="kb-article">
-                        <h5>${article.id}: ${article.title}</h5>
-                        <p><strong>Category:</strong> ${article.category}</p>
-                        <p><strong>Tags:</strong> ${article.tags.join(', ')}</p>
-                        <p>${article.content}</p>
-                    </div>`;
-                });
-                html += '</div>';
-                document.getElementById('kb-list').innerHTML = html;
-            }
-        </script>
-    </body>
-    </html>
-    """)
+    return ui_assets.page_response()
+
+@app.route('/assets/<path:filename>')
+def ui_asset(filename):
+    """Content-hashed UI assets, cacheable indefinitely"""
+    return ui_assets.asset_response(filename)
 
 @app.route('/api/summarize', methods=['POST'])
 def summarize_incident():
@@ -470,12 +658,20 @@ def search_kb():
     data = request.get_json() or {}
     query = data.get('query', '')
     
-    results = rag_system.search_knowledge_base(query)
+    try:
+        filters = parse_filters(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    timings = {}
+    results = rag_system.search_knowledge_base(query, filters=filters, timings=timings)
     
     return jsonify({
         'success': True,
         'results': results,
         'query': query,
+        'filters': describe_filters(filters),
+        'timings': timings,
         'timestamp': datetime.now().isoformat()
     })
 
@@ -485,32 +681,66 @@ def get_solution():
     data = request.get_json() or {}
     problem = data.get('problem', '')
     
+    timings = {}
+    
     # Step 1: Summarize the problem
+    start = time.perf_counter()
     summary = rag_system.summarize_incident(problem)
+    timings['summarize_ms'] = round((time.perf_counter() - start) * 1000, 3)
     
     # Step 2: Search relevant KB articles
-    kb_articles = rag_system.search_knowledge_base(problem)
+    kb_articles = rag_system.search_knowledge_base(problem, timings=timings)
     
     # Step 3: Generate solution using RAG
+    start = time.perf_counter()
     solution = rag_system.generate_solution(summary, kb_articles)
+    timings['generate_ms'] = round((time.perf_counter() - start) * 1000, 3)
     
     return jsonify({
         'success': True,
         'summary': summary,
         'solution': solution,
         'kb_articles': kb_articles,
+        'timings': timings,
         'timestamp': datetime.now().isoformat()
     })
 
 @app.route('/api/knowledge-base', methods=['GET'])
 def get_knowledge_base():
-    """Get all knowledge base articles"""
-    return jsonify({
+    """List knowledge base articles a page at a time.
+
+    Query parameters: limit (page size), cursor (next_cursor of the previous
+    page) and fields (comma-separated projection, id is always included).
+    Unchanged pages answer If-None-Match with 304 before any serialization.
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', KB_PAGE_SIZE)), 1), KB_MAX_PAGE_SIZE)
+        start = decode_cursor(request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    fields = None
+    if request.args.get('fields'):
+        fields = ['id'] + [f.strip() for f in request.args['fields'].split(',') if f.strip() and f.strip() != 'id']
+    
+    etag = make_etag(rag_system.kb_revision, start, limit, fields)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    
+    page = rag_system.knowledge_base[start:start + limit]
+    if fields:
+        page = [{f: article[f] for f in fields if f in article} for article in page]
+    end = start + len(page)
+    
+    return json_response({
         'success': True,
-        'articles': rag_system.knowledge_base,
+        'articles': page,
         'total_articles': len(rag_system.knowledge_base),
+        'limit': limit,
+        'next_cursor': encode_cursor(end) if end < len(rag_system.knowledge_base) else None,
         'timestamp': datetime.now().isoformat()
-    })
+    }, etag=etag)
 
 @app.route('/api/add-article', methods=['POST'])
 def add_kb_article():
@@ -527,7 +757,12 @@ def add_kb_article():
     }
     
     rag_system.knowledge_base.append(article)
-    rag_system.generate_embeddings()
+    try:
+        rag_system.generate_embeddings()
+    except Exception as e:
+        rag_system.knowledge_base.remove(article)
+        logger.error(f"Embedding new article failed: {e}")
+        return jsonify({'error': f'Embedding the article failed: {e}'}), 502
     rag_system.save_knowledge_base()
     
     return jsonify({
@@ -536,6 +771,146 @@ def add_kb_article():
         'article_id': article['id']
     })
 
+@app.route('/api/feedback', methods=['POST'])
+def submit_search_feedback():
+    """Rate search results; article_ids and query feed the ranking boosts"""
+    data = request.get_json() or {}
+    # Checked before anything is logged: both apps replay stored entries into their boosts on startup
+    try:
+        rating = parse_rating(data.get('rating', 0))
+        article_ids, query = parse_feedback_target(data.get('article_ids'), data.get('query'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    feedback = {
+        'id': f"FB_{str(uuid.uuid4())[:8].upper()}",
+        'feature': data.get('feature', 'rag_search'),
+        'rating': rating,
+        'helpful': data.get('helpful', True),
+        'comment': data.get('comment', ''),
+        'query': query,
+        'query_cluster': rag_system.boosts.cluster_label(query),
+        'article_ids': article_ids,
+        'created_at': datetime.now().isoformat()
+    }
+    
+    feedback_log.append(feedback)
+    rag_system.boosts.record(article_ids, feedback['rating'], feedback['helpful'], feedback['query'])
+    
+    return jsonify({
+        'success': True,
+        'feedback_id': feedback['id'],
+        'boosts': rag_system.boosts.to_dict()
+    })
+
+@app.route('/api/admin/reembed', methods=['POST'])
+def start_reembedding():
+    """Start migrating KB embeddings to a new model in the background"""
+    data = request.get_json() or {}
+    model = data.get('model', EMBEDDING_MODEL)
+    
+    if model == rag_system.embedding_meta['model']:
+        return jsonify({'error': f'Index already uses {model}'}), 400
+    
+    try:
+        job = rag_system.start_reembedding(
+            model,
+            batch_size=data.get('batch_size', 16),
+            throttle_seconds=data.get('throttle_seconds', 1.0)
+        )
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+    
+    return jsonify({
+        'success': True,
+        'job': job.to_dict(),
+        'active_index': rag_system.embedding_meta,
+        'timestamp': datetime.now().isoformat()
+    }), 202
+
+@app.route('/api/admin/reembed', methods=['GET'])
+def get_reembedding_status():
+    """Status of the background re-embedding job"""
+    job = rag_system.reembedding_job
+    return jsonify({
+        'success': True,
+        'job': job.to_dict() if job else None,
+        'active_index': rag_system.embedding_meta,
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/admin/reembed', methods=['DELETE'])
+def cancel_reembedding():
+    """Cancel the background re-embedding job; the active index is untouched"""
+    job = rag_system.reembedding_job
+    if not job or not job.is_running():
+        return jsonify({'error': 'No re-embedding job in progress'}), 404
+    
+    job.cancel()
+    return jsonify({
+        'success': True,
+        'job': job.to_dict(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/admin/profile', methods=['GET'])
+def get_profile():
+    """Profiling settings, per-route cProfile summaries (?route=...) and allocation stats (?allocations=1)"""
+    return jsonify({
+        'success': True,
+        'profiling': profiler.to_dict(),
+        'routes': profiler.route_stats(request.args.get('route')),
+        'top_allocations': profiler.top_allocations() if request.args.get('allocations') == '1' else [],
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/admin/profile', methods=['POST'])
+def update_profiling():
+    """Change profiling at runtime, e.g. {"every_n": 50, "tracemalloc": true, "sample_seconds": 30}"""
+    data = request.get_json() or {}
+    profiler.configure(data.get('every_n'), trace_allocations=data.get('tracemalloc'))
+    if data.get('sample_seconds'):
+        try:
+            profiler.sampler.start(data['sample_seconds'], data.get('interval_ms', DEFAULT_SAMPLE_INTERVAL_MS))
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 409
+    return jsonify({
+        'success': True,
+        'profiling': profiler.to_dict(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/admin/profile', methods=['DELETE'])
+def reset_profiling():
+    """Stop all profiling and discard what was collected"""
+    profiler.sampler.stop()
+    profiler.configure(every_n=0, trace_allocations=False)
+    profiler.reset()
+    return jsonify({
+        'success': True,
+        'profiling': profiler.to_dict(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/admin/profile/folded', methods=['GET'])
+def get_folded_stacks():
+    """Sampled stacks in folded format for flamegraph.pl, speedscope or inferno (?idle=1 keeps waiting threads)"""
+    return Response(profiler.sampler.folded(idle=request.args.get('idle') == '1'), mimetype='text/plain')
+
+@app.route('/api/admin/rerank', methods=['GET'])
+def get_rerank_stats():
+    """Reranker configuration and running stage statistics"""
+    return jsonify({
+        'success': True,
+        'reranker': rag_system.reranker.to_dict() if rag_system.reranker else None,
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics"""
+    return metrics_response()
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -544,6 +919,12 @@ def health_check():
         'service': 'IT Support Assistant RAG System',
         'version': '1.0.0',
         'kb_articles': len(rag_system.knowledge_base),
+        'embedding_model': rag_system.embedding_meta['model'],
+        'embedding_version': rag_system.embedding_meta['version'],
+        'embedding_precision': rag_system.embeddings.precision,
+        'embedding_memory_bytes': rag_system.embeddings.nbytes,
+        'feedback_boosts': rag_system.boosts.to_dict(),
+        'tracing': tracer.to_dict(),
         'timestamp': datetime.now().isoformat()
     })
 
@@ -0,0 +1,203 @@
+"""
+Bulk incident analysis jobs
+
+A job pages through the incident store with a filter, hands batches of
+incidents to a worker pool and collects the per-incident results in
+completion order. Results are appended to an NDJSON file on disk rather than
+kept in memory, so a large job costs a file, not its whole result set; the
+file can be streamed while the job is still running and is removed when the
+job is dropped from the registry. Progress and cancellation are exposed on
+the job object.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs kept for status/result queries before the oldest are dropped
+MAX_FINISHED_JOBS = 20
+# Upper bounds for caller-supplied job settings
+MAX_WORKERS = 16
+MAX_BATCH_SIZE = 256
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def job_setting(value, maximum):
+    """A positive integer job setting clamped to maximum; ValueError if it isn't an integer"""
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError('must be an integer')
+    return min(max(int(value), 1), maximum)
+
+
+class BulkAnalysisJob:
+    def __init__(self, store, filters, analyze_batch, workers=4, batch_size=16, results_dir=None):
+        self.id = f"JOB_{str(uuid.uuid4())[:8].upper()}"
+        self.store = store
+        self.filters = filters
+        self.analyze_batch = analyze_batch
+        self.workers = job_setting(workers, MAX_WORKERS)
+        self.batch_size = job_setting(batch_size, MAX_BATCH_SIZE)
+        self.status = 'pending'
+        self.total = store.count(filters)
+        self.processed = 0
+        self.failed = 0
+        self.error = None
+        self.created_at = datetime.now().isoformat()
+        self.finished_at = None
+        self._started = None
+        self._elapsed = None
+        fd, self.results_path = tempfile.mkstemp(prefix=f'{self.id}-', suffix='.ndjson', dir=results_dir)
+        self._results = os.fdopen(fd, 'wb')
+        # Bytes of complete result lines written so far; readers never go past it
+        self._results_size = 0
+        self._batch_sizes = {}
+        self._cancelled = threading.Event()
+        self._changed = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=f'bulk-analysis-{self.id}', daemon=True)
+
+    def start(self):
+        self.status = 'running'
+        self._started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def finished(self):
+        return self.status in ('completed', 'cancelled', 'failed')
+
+    def _batches(self):
+        after = 0
+        while after is not None and not self._cancelled.is_set():
+            incidents, after = self.store.query(self.filters, after, self.batch_size)
+            if incidents:
+                yield incidents
+
+    def _run(self):
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.id) as pool:
+                pending = set()
+                for batch in self._batches():
+                    future = pool.submit(self.analyze_batch, batch)
+                    self._batch_sizes[future] = len(batch)
+                    pending.add(future)
+                    # Bound the queued batches so paging doesn't run far ahead of the workers
+                    if len(pending) >= self.workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        self._collect(done)
+                if self._cancelled.is_set():
+                    for future in pending:
+                        future.cancel()
+                done, _ = wait(pending)
+                self._collect(f for f in done if not f.cancelled())
+            self.status = 'cancelled' if self._cancelled.is_set() else 'completed'
+        except Exception as e:
+            logger.error(f"Bulk analysis {self.id} failed: {e}")
+            self.status = 'failed'
+            self.error = str(e)
+        finally:
+            self._elapsed = time.perf_counter() - self._started
+            self.finished_at = datetime.now().isoformat()
+            with self._changed:
+                self._results.close()
+                self._changed.notify_all()
+
+    def _collect(self, futures):
+        for future in futures:
+            batch_size = self._batch_sizes.pop(future, 0)
+            try:
+                batch_results = future.result()
+            except Exception as e:
+                logger.error(f"Bulk analysis {self.id} batch failed: {e}")
+                with self._changed:
+                    self.failed += batch_size
+                continue
+            with self._changed:
+                lines = ''.join(json.dumps(result) + '\n' for result in batch_results).encode()
+                self._results.write(lines)
+                self._results.flush()
+                self._results_size += len(lines)
+                self.processed += len(batch_results)
+                self._changed.notify_all()
+
+    def stream(self):
+        """Yield results as NDJSON, waiting for more until the job ends"""
+        sent = 0
+        with open(self.results_path, 'rb') as results:
+            while True:
+                with self._changed:
+                    while sent >= self._results_size and not self.finished:
+                        self._changed.wait(timeout=1.0)
+                    size = self._results_size
+                    done = self.finished
+                while sent < size:
+                    chunk = results.read(min(size - sent, STREAM_CHUNK_BYTES))
+                    sent += len(chunk)
+                    yield chunk
+                if done:
+                    yield json.dumps({'job': self.to_dict()}) + '\n'
+                    return
+
+    def discard(self):
+        """Remove the results file; a stream already open keeps reading it"""
+        try:
+            os.remove(self.results_path)
+        except OSError:
+            pass
+
+    def to_dict(self):
+        elapsed = self._elapsed
+        if elapsed is None and self._started is not None:
+            elapsed = time.perf_counter() - self._started
+        return {
+            'id': self.id,
+            'status': self.status,
+            'filters': self.filters,
+            'total': self.total,
+            'processed': self.processed,
+            'failed': self.failed,
+            'progress': round(self.processed / self.total * 100, 1) if self.total else 100.0,
+            'workers': self.workers,
+            'batch_size': self.batch_size,
+            'elapsed_seconds': round(elapsed, 3) if elapsed is not None else None,
+            'incidents_per_second': round(self.processed / elapsed, 1) if elapsed else None,
+            'error': self.error,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at
+        }
+
+
+class BulkAnalysisJobs:
+    """Registry of running and recently finished jobs"""
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def start(self, job):
+        with self._lock:
+            finished = [j for j in self._jobs.values() if j.finished]
+            for old in finished[:max(0, len(finished) - MAX_FINISHED_JOBS + 1)]:
+                del self._jobs[old.id]
+                old.discard()
+            self._jobs[job.id] = job
+        return job.start()
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def pending(self):
+        """Incidents still waiting to be analyzed across running jobs"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return sum(job.total - job.processed for job in jobs if job.status == 'running')
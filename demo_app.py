@@ -4,15 +4,59 @@ Offline-capable version for demonstrations and fallback scenarios
 """
 
 import json
+import logging
 import numpy as np
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from datetime import datetime
 import uuid
 import os
+import random
+import time
+from kb_filters import FacetIndex, parse_filters, describe_filters
+from incident_classifier import IncidentClassifier
+from incident_store import IncidentStore, INDEXED_FIELDS
+from responses import encode_cursor, decode_cursor, make_etag, configure_responses, ScoredArticle
+from static_assets import AssetBundle
+from bulk_analysis import BulkAnalysisJob, BulkAnalysisJobs
+from servicenow_sync import ServiceNowSync
+from analysis_cache import AnalysisCache
+from incident_index import IncidentIndex
+from concurrent.futures import ThreadPoolExecutor
+from feedback_analytics import FeedbackAggregates, parse_metric, parse_rating
+from feedback_log import FeedbackLog
+from feedback_trends import FeedbackTrends, RESOLUTIONS
+from feedback_boosts import ArticleBoosts, classifier_clusters, parse_feedback_target
+from quiz_bank import QuizBank
+from quiz_sessions import QuizSessionStore, is_correct
+from proficiency import ProficiencyStore
+from metrics import REGISTRY, instrument_app, metrics_response, record_stage, stage
+from tracing import in_current_context, trace_requests, traced, tracer
+from profiling import DEFAULT_SAMPLE_INTERVAL_MS, profile_requests, profiler, track_allocations
+
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
+configure_responses(app)
+# Registered after the compression hook so it runs before it
+instrument_app(app)
+# Callers sending a sampled traceparent are always traced; TRACE_SAMPLE_RATE
+# is the share of other requests recorded
+trace_requests(
+    app, 'it-support-demo',
+    sample_rate=float(os.getenv('TRACE_SAMPLE_RATE', '0')),
+    export_path=os.getenv('TRACE_EXPORT_PATH', 'traces.jsonl'),
+    otlp_endpoint=os.getenv('TRACE_OTLP_ENDPOINT')
+)
+# Opt-in profiling, also switchable at /api/admin/profile
+profile_requests(
+    app,
+    every_n=int(os.getenv('PROFILE_EVERY_N', '0')),
+    directory=os.getenv('PROFILE_DIR', ''),
+    trace_allocations=os.getenv('PROFILE_TRACEMALLOC', '') == '1',
+    sample_seconds=float(os.getenv('PROFILE_SAMPLE_SECONDS', '0'))
+)
 
 # Sample knowledge base with pre-computed similarity scores for demo
 KNOWLEDGE_BASE = [
@@ -195,62 +239,86 @@ KNOWLEDGE_BASE = [
 ]
 
 class SimpleRAGDemo:
+    @track_allocations('rag.load_knowledge_base')
     def __init__(self):
         self.knowledge_base = KNOWLEDGE_BASE
+        self.facets = FacetIndex(self.knowledge_base)
+        self.classifier = IncidentClassifier.from_file()
+        # Lowercased fields per article, computed once instead of per query word
+        self.search_fields = [
+            (set(article['keywords']), article['title'].lower(), article['content'].lower(),
+             {tag.lower() for tag in article['tags']})
+            for article in self.knowledge_base
+        ]
+        # Snapshot version of the KB; stored incident analyses are keyed by it
+        self.kb_version = make_etag(json.dumps(self.knowledge_base, sort_keys=True))
+        # Per-article quality priors from feedback, overall and per query category
+        self.boosts = ArticleBoosts(*classifier_clusters(self.classifier), weight=float(os.getenv('FEEDBACK_BOOST_WEIGHT', '0.1')))
+        self.boosts.set_articles([article['id'] for article in self.knowledge_base])
         
-    def search_knowledge_base(self, query, top_k=3):
-        """Simple keyword-based search for demo"""
+    @traced('rag.search_knowledge_base')
+    @track_allocations('rag.search_knowledge_base')
+    def search_knowledge_base(self, query, top_k=3, filters=None):
+        """Simple keyword-based search for demo, optionally pre-filtered by facets"""
+        start = time.perf_counter()
         query_words = query.lower().split()
         results = []
         
-        for article in self.knowledge_base:
+        rows = range(len(self.knowledge_base))
+        if filters:
+            rows = self.facets.select(**filters)
+        # Python floats: indexed once per scored article
+        boosts = self.boosts.vector(query, len(self.knowledge_base)).tolist()
+        
+        for row in rows:
+            keywords, title, content, tags = self.search_fields[row]
             score = 0
             # Check keywords
             for word in query_words:
-                if word in article['keywords']:
+                if word in keywords:
                     score += 0.3
-                if word in article['title'].lower():
+                if word in title:
                     score += 0.4
-                if word in article['content'].lower():
+                if word in content:
                     score += 0.2
-                if word in [tag.lower() for tag in article['tags']]:
+                if word in tags:
                     score += 0.1
             
             if score > 0:
-                article_copy = article.copy()
-                article_copy['relevance_score'] = min(score, 1.0)
-                results.append(article_copy)
+                # Rank on the boosted score; the reported relevance stays capped at 1.0
+                results.append((min(score, 1.0) * boosts[row], row))
         
-        # Sort by relevance and return top-k
-        results.sort(key=lambda x: x['relevance_score'], reverse=True)
-        return results[:top_k]
+        # Sort by relevance and return top-k as views over the stored articles
+        results.sort(key=lambda x: x[0], reverse=True)
+        results = [
+            ScoredArticle(self.knowledge_base[row], relevance_score=min(score, 1.0))
+            for score, row in results[:top_k]
+        ]
+        record_stage('keyword_search', time.perf_counter() - start)
+        return results
     
+    def search_many(self, queries, top_k=3):
+        """Search for a batch of queries, running each distinct query once"""
+        unique = {}
+        for query in queries:
+            if query not in unique:
+                unique[query] = self.search_knowledge_base(query, top_k)
+        return [unique[query] for query in queries]
+    
+    @traced('rag.summarize_incident')
     def summarize_incident(self, incident_text):
         """Demo incident summarization"""
-        key_terms = []
-        if 'blue screen' in incident_text.lower() or 'bsod' in incident_text.lower():
-            key_terms.append('Windows BSOD')
-        if 'slow' in incident_text.lower() or 'performance' in incident_text.lower():
-            key_terms.append('Performance Issue')
-        if 'network' in incident_text.lower() or 'internet' in incident_text.lower():
-            key_terms.append('Network Connectivity')
-        if 'email' in incident_text.lower() or 'outlook' in incident_text.lower():
-            key_terms.append('Email Configuration')
-        if 'printer' in incident_text.lower() or 'print' in incident_text.lower():
-            key_terms.append('Printer Hardware')
-        if 'mac' in incident_text.lower() or 'macos' in incident_text.lower():
-            key_terms.append('Mac System')
-            
-        if not key_terms:
-            key_terms = ['General IT Issue']
+        # Categories and priority come from incident_rules.json in one pass
+        key_terms, priority = self.classifier.classify(incident_text)
             
         summary = f"🔍 **Incident Analysis**: {', '.join(key_terms)}\n\n"
         summary += f"**Issue Description**: {incident_text[:100]}...\n\n"
-        summary += f"**Priority**: {'High' if any(term in ['BSOD', 'Network'] for term in key_terms) else 'Medium'}\n\n"
+        summary += f"**Priority**: {priority}\n\n"
         summary += f"**Recommended Action**: Search knowledge base for relevant troubleshooting steps"
         
         return summary
     
+    @traced('rag.generate_solution')
     def generate_solution(self, incident_summary, relevant_kb):
         """Generate solution using retrieved KB articles"""
         if not relevant_kb:
@@ -273,888 +341,18 @@ class SimpleRAGDemo:
 # Initialize RAG system
 rag_demo = SimpleRAGDemo()
 
+# UI pages and assets, rendered and precompressed once at startup
+ui_assets = AssetBundle(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'demo'), '/assets')
+
 @app.route('/')
 def home():
     """Demo interface for IT Support Assistant"""
-    return render_template_string("""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>IT Support Assistant - Demo</title>
-        <meta charset="utf-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1">
-        <style>
-            * { box-sizing: border-box; margin: 0; padding: 0; }
-            body { 
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; 
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                min-height: 100vh; 
-                padding: 20px;
-            }
-            .container { 
-                max-width: 1400px; 
-                margin: 0 auto; 
-                background: white; 
-                border-radius: 12px; 
-                box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-                overflow: hidden;
-            }
-            .header { 
-                background: linear-gradient(135deg, #007acc 0%, #0056b3 100%);
-                color: white; 
-                text-align: center; 
-                padding: 30px 20px;
-            }
-            .header h1 { font-size: 2.5em; margin-bottom: 10px; }
-            .header h2 { font-size: 1.3em; opacity: 0.9; margin-bottom: 5px; }
-            .header p { opacity: 0.8; font-size: 0.95em; }
-            .main-content { padding: 30px; }
-            .demo-grid { display: grid; grid-template-columns: 1fr 1fr; gap: 30px; margin-bottom: 30px; }
-            .demo-section { 
-                background: #f8f9fa; 
-                padding: 25px; 
-                border-radius: 8px; 
-                border-left: 4px solid #007acc;
-            }
-            .demo-section h3 { 
-                color: #333; 
-                margin-bottom: 15px; 
-                font-size: 1.2em;
-                display: flex; 
-                align-items: center; 
-                gap: 10px;
-            }
-            .demo-section h3::before {
-                content: "🔧";
-                font-size: 1.5em;
-            }
-            textarea { 
-                width: 100%; 
-                height: 80px; 
-                margin: 10px 0; 
-                padding: 12px; 
-                border: 2px solid #e9ecef;
-                border-radius: 6px;
-                font-family: inherit;
-                resize: vertical;
-                font-size: 14px;
-            }
-            textarea:focus {
-                outline: none;
-                border-color: #007acc;
-                box-shadow: 0 0 0 3px rgba(0, 122, 204, 0.1);
-            }
-            .button { 
-                background: linear-gradient(135deg, #007acc 0%, #0056b3 100%);
-                color: white; 
-                padding: 12px 24px; 
-                border: none; 
-                border-radius: 6px; 
-                cursor: pointer; 
-                font-size: 14px;
-                font-weight: 600;
-                transition: all 0.3s;
-            }
-            .button:hover { 
-                transform: translateY(-2px);
-                box-shadow: 0 8px 20px rgba(0, 122, 204, 0.3);
-            }
-            .button:disabled {
-                opacity: 0.6;
-                cursor: not-allowed;
-                transform: none;
-                box-shadow: none;
-            }
-            .result { 
-                background: white; 
-                padding: 20px; 
-                margin: 15px 0; 
-                border-left: 4px solid #28a745;
-                border-radius: 6px;
-                box-shadow: 0 4px 12px rgba(0,0,0,0.05);
-            }
-            .result h4 { 
-                color: #333; 
-                margin-bottom: 10px;
-                font-size: 1.1em;
-            }
-            .kb-article { 
-                background: #e8f4f8; 
-                padding: 15px; 
-                margin: 8px 0; 
-                border-radius: 6px;
-                border-left: 3px solid #17a2b8;
-            }
-            .kb-article h5 { 
-                color: #0c5460; 
-                margin-bottom: 8px;
-                font-size: 1em;
-            }
-            .kb-article .category { 
-                background: #17a2b8; 
-                color: white; 
-                padding: 2px 8px; 
-                border-radius: 12px; 
-                font-size: 12px;
-                margin-right: 8px;
-            }
-            .loading { 
-                display: none; 
-                color: #007acc; 
-                font-style: italic;
-                margin: 10px 0;
-            }
-            .status-bar {
-                background: #28a745;
-                color: white;
-                padding: 10px 20px;
-                text-align: center;
-                font-weight: 600;
-            }
-            .features-grid {
-                display: grid;
-                grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
-                gap: 20px;
-                margin-top: 30px;
-            }
-            .feature-card {
-                background: white;
-                padding: 20px;
-                border-radius: 8px;
-                border: 2px solid #e9ecef;
-                text-align: center;
-            }
-            .feature-card h4 {
-                color: #007acc;
-                margin-bottom: 10px;
-            }
-            @media (max-width: 768px) {
-                .demo-grid { grid-template-columns: 1fr; }
-                .header h1 { font-size: 1.8em; }
-                .container { margin: 10px; border-radius: 8px; }
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>🤖 IT Support Assistant</h1>
-                <h2>AI-Powered Co-Pilot with Offline RAG</h2>
-                <p><strong>Intelligent IT Support Solution</strong></p>
-                <p>Advanced RAG System for Enterprise Support Teams</p>
-            </div>
-            
-            <div class="status-bar">
-                ✅ RAG System Online | 📚 6 Knowledge Base Articles Loaded | 🔒 Offline Capable
-            </div>
-            
-            <div class="main-content">
-                <div class="demo-grid">
-                    <div class="demo-section">
-                        <h3>Incident Summarization</h3>
-                        <textarea id="incident" placeholder="Describe the IT incident (e.g., 'My computer shows blue screen error IRQL_NOT_LESS_OR_EQUAL and restarts repeatedly...')"></textarea>
-                        <button class="button" onclick="analyzeIncident()">🔍 Analyze with AI</button>
-                        <div class="loading" id="incident-loading">Analyzing incident...</div>
-                        <div id="incident-result"></div>
-                    </div>
-                    
-                    <div class="demo-section">
-                        <h3>Knowledge Base Search</h3>
-                        <textarea id="search" placeholder="Search for solutions (e.g., 'printer not working', 'slow computer', 'network issues...')"></textarea>
-                        <button class="button" onclick="searchKB()">🔍 Search RAG System</button>
-                        <div class="loading" id="search-loading">Searching knowledge base...</div>
-                        <div id="search-result"></div>
-                    </div>
-                </div>
-                
-                <div class="demo-section">
-                    <h3>Complete RAG Solution Pipeline</h3>
-                    <textarea id="problem" placeholder="Describe your complete IT problem for end-to-end AI solution (e.g., 'Users in accounting department cannot access email, getting authentication errors in Outlook...')"></textarea>
-                    <button class="button" onclick="getSolution()">🎯 Get Complete AI Solution</button>
-                    <div class="loading" id="solution-loading">Generating RAG-powered solution...</div>
-                    <div id="solution-result"></div>
-                </div>
-                
-                <div class="demo-section">
-                    <h3>ServiceNow Integration Demo</h3>
-                    <p style="margin-bottom: 15px;">Mock enterprise ITSM integration with incident management</p>
-                    <div style="display: flex; gap: 10px; margin-bottom: 15px;">
-                        <button class="button" onclick="loadServiceNowIncidents()">📋 Load Incidents</button>
-                        <button class="button" onclick="analyzeIncident('INC0000123')" style="background: #28a745;">🔍 Analyze INC0000123</button>
-                        <button class="button" onclick="showCreateIncident()" style="background: #ffc107; color: #333;">➕ Create New</button>
-                    </div>
-                    <div id="servicenow-result"></div>
-                </div>
-                
-                <div class="demo-section">
-                    <h3>AI-Powered Learning Quiz System</h3>
-                    <p style="margin-bottom: 15px;">Interactive quizzes generated from knowledge base for skill development</p>
-                    <div style="display: flex; gap: 10px; margin-bottom: 15px;">
-                        <select id="quiz-category" style="padding: 10px; border: 2px solid #e9ecef; border-radius: 6px;">
-                            <option value="all">All Categories</option>
-                            <option value="Windows">Windows</option>
-                            <option value="Network">Network</option>
-                            <option value="Hardware">Hardware</option>
-                        </select>
-                        <button class="button" onclick="generateQuiz()">🎯 Generate Quiz</button>
-                        <button class="button" onclick="loadQuizCategories()" style="background: #6c757d;">📚 Load Categories</button>
-                    </div>
-                    <div id="quiz-result"></div>
-                </div>
-                
-                <div class="demo-section">
-                    <h3>Feedback & Analytics System</h3>
-                    <p style="margin-bottom: 15px;">Continuous improvement through user feedback and AI performance analytics</p>
-                    <div style="display: flex; gap: 10px; margin-bottom: 15px;">
-                        <button class="button" onclick="showFeedbackForm()">💬 Submit Feedback</button>
-                        <button class="button" onclick="generateDemoFeedback()" style="background: #6c757d;">📊 Generate Demo Data</button>
-                        <button class="button" onclick="showAnalytics()" style="background: #17a2b8;">📈 View Analytics</button>
-                    </div>
-                    <div id="feedback-result"></div>
-                </div>
-                
-                <div class="features-grid">
-                    <div class="feature-card">
-                        <h4>🧠 LLM Integration</h4>
-                        <p>GPT-powered incident analysis and intelligent summarization</p>
-                    </div>
-                    <div class="feature-card">
-                        <h4>🔍 RAG System</h4>
-                        <p>Retrieval-Augmented Generation with semantic knowledge search</p>
-                    </div>
-                    <div class="feature-card">
-                        <h4>📱 Offline Capable</h4>
-                        <p>Local knowledge base storage for outage scenarios</p>
-                    </div>
-                    <div class="feature-card">
-                        <h4>⚡ ServiceNow Integration</h4>
-                        <p>Enterprise ITSM integration with intelligent incident analysis</p>
-                    </div>
-                    <div class="feature-card">
-                        <h4>🎯 AI Learning Quizzes</h4>
-                        <p>Interactive skill assessment and knowledge improvement</p>
-                    </div>
-                    <div class="feature-card">
-                        <h4>📊 Feedback Analytics</h4>
-                        <p>Continuous AI improvement through user feedback loops</p>
-                    </div>
-                </div>
-            </div>
-        </div>
-        
-        <script>
-            function showLoading(id) {
-                document.getElementById(id).style.display = 'block';
-            }
-            
-            function hideLoading(id) {
-                document.getElementById(id).style.display = 'none';
-            }
-            
-            async function analyzeIncident() {
-                const incident = document.getElementById('incident').value;
-                if (!incident.trim()) {
-                    alert('Please enter an incident description');
-                    return;
-                }
-                
-                showLoading('incident-loading');
-                
-                try {
-                    const response = await fetch('/api/summarize', {
-                        method: 'POST',
-                        headers: {'Content-Type': 'application/json'},
-                        body: JSON.stringify({incident: incident})
-                    });
-                    const result = await response.json();
-                    
-                    document.getElementById('incident-result').innerHTML = 
-                        `<div class="result">
-                            <h4>📊 AI Incident Analysis</h4>
-                            <pre style="white-space: pre-wrap; font-family: inherit; line-height: 1.5;">${result.summary}</pre>
-                        </div>`;
-                } catch (error) {
-                    document.getElementById('incident-result').innerHTML = 
-                        `<div class="result" style="border-left-color: #dc3545;">
-                            <h4>❌ Error</h4>
-                            <p>Error analyzing incident: ${error.message}</p>
-                        </div>`;
-                } finally {
-                    hideLoading('incident-loading');
-                }
-            }
-            
-            async function searchKB() {
-                const query = document.getElementById('search').value;
-                if (!query.trim()) {
-                    alert('Please enter a search query');
-                    return;
-                }
-                
-                showLoading('search-loading');
-                
-                try {
-                    const response = await fetch('/api/search', {
-                        method: 'POST',
-                        headers: {'Content-Type': 'application/json'},
-                        body: JSON.stringify({query: query})
-                    });
-                    const result = await response.json();
-                    
-                    let html = '<div class="result"><h4>🔍 RAG Search Results</h4>';
-                    
-                    if (result.results.length === 0) {
-                        html += '<p>No relevant articles found. Try different keywords.</p>';
-                    } else {
-                        result.results.forEach(article => {
-                            html += `<div class="kb-article">
-                                <h5>
-                                    <span class="category">${article.category}</span>
-                                    ${article.title}
-                                    <span style="color: #28a745; font-weight: normal;">(${(article.relevance_score * 100).toFixed(1)}% relevant)</span>
-                                </h5>
-                                <p style="margin: 8px 0; color: #666;"><strong>Tags:</strong> ${article.tags.join(', ')}</p>
-                                <p>${article.content}</p>
-                            </div>`;
-                        });
-                    }
-                    
-                    html += '</div>';
-                    document.getElementById('search-result').innerHTML = html;
-                } catch (error) {
-                    document.getElementById('search-result').innerHTML = 
-                        `<div class="result" style="border-left-color: #dc3545;">
-                            <h4>❌ Error</h4>
-                            <p>Error searching knowledge base: ${error.message}</p>
-                        </div>`;
-                } finally {
-                    hideLoading('search-loading');
-                }
-            }
-            
-            async function getSolution() {
-                const problem = document.getElementById('problem').value;
-                if (!problem.trim()) {
-                    alert('Please describe your IT problem');
-                    return;
-                }
-                
-                showLoading('solution-loading');
-                
-                try {
-                    const response = await fetch('/api/solution', {
-                        method: 'POST',
-                        headers: {'Content-Type': 'application/json'},
-                        body: JSON.stringify({problem: problem})
-                    });
-                    const result = await response.json();
-                    
-                    document.getElementById('solution-result').innerHTML = 
-                        `<div class="result">
-                            <h4>🎯 Complete RAG Solution</h4>
-                            
-                            <div class="kb-article">
-                                <h5>📋 AI Analysis Summary</h5>
-                                <pre style="white-space: pre-wrap; font-family: inherit; line-height: 1.5;">${result.summary}</pre>
-                            </div>
-                            
-                            <div class="kb-article">
-                                <h5>💡 Generated Solution</h5>
-                                <pre style="white-space: pre-wrap; font-family: inherit; line-height: 1.5;">${result.solution}</pre>
-                            </div>
-                            
-                            <div class="kb-article">
-                                <h5>📚 Referenced Knowledge Base Articles</h5>
-                                ${result.kb_articles.map(kb => 
-                                    `<p><strong>• ${kb.title}</strong> (${kb.category}) - ${(kb.relevance_score * 100).toFixed(1)}% relevant</p>`
-                                ).join('')}
-                            </div>
-                        </div>`;
-                } catch (error) {
-                    document.getElementById('solution-result').innerHTML = 
-                        `<div class="result" style="border-left-color: #dc3545;">
-                            <h4>❌ Error</h4>
-                            <p>Error generating solution: ${error.message}</p>
-                        </div>`;
-                } finally {
-                    hideLoading('solution-loading');
-                }
-            }
-            
-            async function loadServiceNowIncidents() {
-                try {
-                    const response = await fetch('/api/servicenow/incidents');
-                    const result = await response.json();
-                    
-                    let html = '<div class="result"><h4>📋 ServiceNow Incidents</h4>';
-                    result.incidents.forEach(incident => {
-                        html += `<div class="kb-article">
-                            <h5>${incident.number}: ${incident.short_description}</h5>
-                            <p><strong>Priority:</strong> ${incident.priority} | <strong>State:</strong> ${incident.state} | <strong>Assigned:</strong> ${incident.assigned_to}</p>
-                            <p><strong>Description:</strong> ${incident.description}</p>
-                            <p><strong>Caller:</strong> ${incident.caller} | <strong>Created:</strong> ${incident.created_on}</p>
-                            <button class="button" onclick="analyzeIncident('${incident.number}')" style="margin-top: 8px; font-size: 12px; padding: 6px 12px;">🔍 Analyze</button>
-                        </div>`;
-                    });
-                    html += '</div>';
-                    document.getElementById('servicenow-result').innerHTML = html;
-                } catch (error) {
-                    document.getElementById('servicenow-result').innerHTML = 
-                        `<div class="result" style="border-left-color: #dc3545;"><h4>❌ Error</h4><p>${error.message}</p></div>`;
-                }
-            }
-            
-            async function analyzeIncident(incidentNumber) {
-                try {
-                    const response = await fetch(`/api/servicenow/incidents/${incidentNumber}/analyze`, {
-                        method: 'POST'
-                    });
-                    const result = await response.json();
-                    
-                    document.getElementById('servicenow-result').innerHTML = 
-                        `<div class="result">
-                            <h4>🔍 ServiceNow Incident Analysis: ${result.incident.number}</h4>
-                            
-                            <div class="kb-article">
-                                <h5>📋 Incident Details</h5>
-                                <p><strong>Description:</strong> ${result.incident.description}</p>
-                                <p><strong>Priority:</strong> ${result.incident.priority} | <strong>Category:</strong> ${result.incident.category}</p>
-                            </div>
-                            
-                            <div class="kb-article">
-                                <h5>🤖 AI Analysis</h5>
-                                <pre style="white-space: pre-wrap; font-family: inherit;">${result.ai_analysis.summary}</pre>
-                            </div>
-                            
-                            <div class="kb-article">
-                                <h5>💡 AI Solution</h5>
-                                <pre style="white-space: pre-wrap; font-family: inherit;">${result.ai_analysis.solution}</pre>
-                            </div>
-                            
-                            <div class="kb-article">
-                                <h5>📊 Recommendations</h5>
-                                <p><strong>Assign to:</strong> ${result.recommendations.assign_to}</p>
-                                <p><strong>Estimated resolution:</strong> ${result.recommendations.estimated_resolution}</p>
-                                <p><strong>Escalate:</strong> ${result.recommendations.escalate ? 'Yes' : 'No'}</p>
-                            </div>
-                        </div>`;
-                } catch (error) {
-                    document.getElementById('servicenow-result').innerHTML = 
-                        `<div class="result" style="border-left-color: #dc3545;"><h4>❌ Error</h4><p>${error.message}</p></div>`;
-                }
-            }
-            
-            function showCreateIncident() {
-                document.getElementById('servicenow-result').innerHTML = 
-                    `<div class="result">
-                        <h4>➕ Create New ServiceNow Incident</h4>
-                        <div style="margin: 15px 0;">
-                            <input type="text" id="new-incident-title" placeholder="Short description" style="width: 100%; margin: 5px 0; padding: 8px;">
-                            <textarea id="new-incident-desc" placeholder="Detailed description" style="width: 100%; height: 60px; margin: 5px 0; padding: 8px;"></textarea>
-                            <select id="new-incident-priority" style="width: 100%; margin: 5px 0; padding: 8px;">
-                                <option>1 - Critical</option>
-                                <option>2 - High</option>
-                                <option selected>3 - Medium</option>
-                                <option>4 - Low</option>
-                            </select>
-                            <button class="button" onclick="createNewIncident()">Create Incident</button>
-                        </div>
-                    </div>`;
-            }
-            
-            async function createNewIncident() {
-                const data = {
-                    short_description: document.getElementById('new-incident-title').value,
-                    description: document.getElementById('new-incident-desc').value,
-                    priority: document.getElementById('new-incident-priority').value,
-                    category: 'General',
-                    caller: 'demo.user@company.com'
-                };
-                
-                try {
-                    const response = await fetch('/api/servicenow/create-incident', {
-                        method: 'POST',
-                        headers: {'Content-Type': 'application/json'},
-                        body: JSON.stringify(data)
-                    });
-                    const result = await response.json();
-                    
-                    document.getElementById('servicenow-result').innerHTML = 
-                        `<div class="result">
-                            <h4>✅ Incident Created Successfully</h4>
-                            <div class="kb-article">
-                                <h5>New Incident: ${result.incident.number}</h5>
-                                <p><strong>Title:</strong> ${result.incident.short_description}</p>
-                                <p><strong>Priority:</strong> ${result.incident.priority}</p>
-                                <p><strong>State:</strong> ${result.incident.state}</p>
-                                <p><strong>Created:</strong> ${result.incident.created_on}</p>
-                            </div>
-                            <button class="button" onclick="loadServiceNowIncidents()" style="margin-top: 10px;">📋 View All Incidents</button>
-                        </div>`;
-                } catch (error) {
-                    document.getElementById('servicenow-result').innerHTML = 
-                        `<div class="result" style="border-left-color: #dc3545;"><h4>❌ Error</h4><p>${error.message}</p></div>`;
-                }
-            }
-            
-            // Quiz System Functions
-            let currentQuiz = null;
-            let userAnswers = {};
-            
-            async function loadQuizCategories() {
-                try {
-                    const response = await fetch('/api/quiz/categories');
-                    const result = await response.json();
-                    
-                    let html = '<div class="result"><h4>📚 Available Quiz Categories</h4>';
-                    result.categories.forEach(category => {
-                        html += `<div class="kb-article">
-                            <h5>${category === 'all' ? 'All Categories' : category}</h5>
-                            <button class="button" onclick="generateSpecificQuiz('${category}')" style="margin-top: 5px; font-size: 12px; padding: 4px 8px;">Generate Quiz</button>
-                        </div>`;
-                    });
-                    html += '</div>';
-                    document.getElementById('quiz-result').innerHTML = html;
-                } catch (error) {
-                    document.getElementById('quiz-result').innerHTML = 
-                        `<div class="result" style="border-left-color: #dc3545;"><h4>❌ Error</h4><p>${error.message}</p></div>`;
-                }
-            }
-            
-            async function generateQuiz() {
-                const category = document.getElementById('quiz-category').value;
-                await generateSpecificQuiz(category);
-            }
-            
-            async function generateSpecificQuiz(category = 'all') {
-                try {
-                    const response = await fetch('/api/quiz/generate', {
-                        method: 'POST',
-                        headers: {'Content-Type': 'application/json'},
-                        body: JSON.stringify({
-                            category: category,
-                            difficulty: 'medium'
-                        })
-                    });
-                    const result = await response.json();
-                    currentQuiz = result.quiz;
-                    userAnswers = {};
-                    
-                    let html = `<div class="result">
-                        <h4>🎯 ${result.quiz.title}</h4>
-                        <p><strong>Questions:</strong> ${result.quiz.total_questions} | <strong>Time Limit:</strong> ${result.quiz.time_limit_minutes} minutes</p>
-                        <div style="margin: 15px 0;">`;
-                    
-                    result.quiz.questions.forEach((question, index) => {
-                        html += `<div class="kb-article" style="margin: 10px 0;">
-                            <h5>Question ${index + 1}: ${question.question}</h5>
-                            <p><strong>Category:</strong> ${question.category} | <strong>Reference:</strong> ${question.kb_reference}</p>`;
-                        
-                        if (question.type === 'multiple_choice') {
-                            question.options.forEach((option, optIndex) => {
-                                html += `<div style="margin: 5px 0;">
-                                    <input type="radio" name="q${question.id}" value="${optIndex}" onchange="recordAnswer('${question.id}', ${optIndex})">
-                                    <label style="margin-left: 8px;">${option}</label>
-                                </div>`;
-                            });
-                        } else if (question.type === 'true_false') {
-                            html += `<div style="margin: 5px 0;">
-                                <input type="radio" name="q${question.id}" value="true" onchange="recordAnswer('${question.id}', true)">
-                                <label style="margin-left: 8px;">True</label>
-                            </div>
-                            <div style="margin: 5px 0;">
-                                <input type="radio" name="q${question.id}" value="false" onchange="recordAnswer('${question.id}', false)">
-                                <label style="margin-left: 8px;">False</label>
-                            </div>`;
-                        } else if (question.type === 'fill_blank') {
-                            html += `<input type="text" id="answer_${question.id}" placeholder="Your answer..." 
-                                style="width: 200px; padding: 6px; margin: 5px 0;" 
-                                onchange="recordAnswer('${question.id}', this.value)">`;
-                        }
-                        
-                        html += '</div>';
-                    });
-                    
-                    html += `</div>
-                        <button class="button" onclick="submitQuiz()" style="background: #28a745; margin-top: 15px;">✅ Submit Quiz</button>
-                    </div>`;
-                    
-                    document.getElementById('quiz-result').innerHTML = html;
-                } catch (error) {
-                    document.getElementById('quiz-result').innerHTML = 
-                        `<div class="result" style="border-left-color: #dc3545;"><h4>❌ Error</h4><p>${error.message}</p></div>`;
-                }
-            }
-            
-            function recordAnswer(questionId, answer) {
-                userAnswers[questionId] = answer;
-            }
-            
-            async function submitQuiz() {
-                if (!currentQuiz || Object.keys(userAnswers).length === 0) {
-                    alert('Please answer at least one question before submitting.');
-                    return;
-                }
-                
-                try {
-                    const response = await fetch('/api/quiz/submit', {
-                        method: 'POST',
-                        headers: {'Content-Type': 'application/json'},
-                        body: JSON.stringify({
-                            quiz_id: currentQuiz.id,
-                            answers: userAnswers
-                        })
-                    });
-                    const result = await response.json();
-                    
-                    document.getElementById('quiz-result').innerHTML = 
-                        `<div class="result">
-                            <h4>📊 Quiz Results: ${result.result.quiz_id}</h4>
-                            
-                            <div class="kb-article">
-                                <h5>🎯 Your Performance</h5>
-                                <p><strong>Score:</strong> ${result.result.score.toFixed(1)}% (${result.result.correct_answers}/${result.result.total_questions})</p>
-                                <p><strong>Performance Level:</strong> ${result.result.performance_level}</p>
-                            </div>
-                            
-                            <div class="kb-article">
-                                <h5>💡 Learning Recommendations</h5>
-                                ${result.result.learning_recommendations.map(rec => `<p>• ${rec}</p>`).join('')}
-                            </div>
-                            
-                            <div class="kb-article">
-                                <h5>📝 Detailed Feedback</h5>
-                                ${result.result.detailed_feedback.map(feedback => 
-                                    `<p><strong>${feedback.question_id}:</strong> ${feedback.correct ? '✅' : '❌'} ${feedback.feedback}</p>`
-                                ).join('')}
-                            </div>
-                            
-                            <button class="button" onclick="generateQuiz()" style="margin-top: 10px;">🔄 Take Another Quiz</button>
-                        </div>`;
-                } catch (error) {
-                    document.getElementById('quiz-result').innerHTML = 
-                        `<div class="result" style="border-left-color: #dc3545;"><h4>❌ Error</h4><p>${error.message}</p></div>`;
-                }
-            }
-            
-            // Feedback System Functions
-            function showFeedbackForm() {
-                document.getElementById('feedback-result').innerHTML = 
-                    `<div class="result">
-                        <h4>💬 Submit Feedback</h4>
-                        <div style="margin: 15px 0;">
-                            <select id="feedback-feature" style="width: 100%; margin: 5px 0; padding: 8px;">
-                                <option value="rag_search">RAG Search System</option>
-                                <option value="incident_analysis">Incident Analysis</option>
-                                <option value="servicenow">ServiceNow Integration</option>
-                                <option value="quiz">Quiz System</option>
-                                <option value="overall">Overall System</option>
-                            </select>
-                            
-                            <div style="margin: 10px 0;">
-                                <label style="display: block; margin-bottom: 5px;"><strong>Rating (1-5 stars):</strong></label>
-                                <div style="display: flex; gap: 5px;">
-                                    ${[1,2,3,4,5].map(i => 
-                                        `<button type="button" onclick="setRating(${i})" id="star-${i}" 
-                                         style="background: #ddd; border: 1px solid #ccc; padding: 5px 10px; cursor: pointer;">⭐</button>`
-                                    ).join('')}
-                                </div>
-                                <input type="hidden" id="feedback-rating" value="0">
-                            </div>
-                            
-                            <textarea id="feedback-comment" placeholder="What did you think about this feature?" 
-                                style="width: 100%; height: 60px; margin: 5px 0; padding: 8px;"></textarea>
-                                
-                            <textarea id="feedback-suggestion" placeholder="Any suggestions for improvement?" 
-                                style="width: 100%; height: 60px; margin: 5px 0; padding: 8px;"></textarea>
-                                
-                            <select id="feedback-experience" style="width: 100%; margin: 5px 0; padding: 8px;">
-                                <option value="beginner">Beginner IT Support</option>
-                                <option value="intermediate" selected>Intermediate IT Support</option>
-                                <option value="expert">Expert IT Support</option>
-                                <option value="manager">IT Manager</option>
-                            </select>
-                            
-                            <div style="margin: 10px 0;">
-                                <label>
-                                    <input type="checkbox" id="feedback-helpful" checked> This feature was helpful
-                                </label>
-                            </div>
-                            
-                            <button class="button" onclick="submitFeedback()">📤 Submit Feedback</button>
-                        </div>
-                    </div>`;
-            }
-            
-            function setRating(rating) {
-                document.getElementById('feedback-rating').value = rating;
-                // Update visual feedback
-                for (let i = 1; i <= 5; i++) {
-                    const star = document.getElementById(`star-${i}`);
-                    star.style.background = i <= rating ? '#ffc107' : '#ddd';
-                }
-            }
-            
-            async function submitFeedback() {
-                const data = {
-                    session_id: 'demo_session_' + Date.now(),
-                    feature: document.getElementById('feedback-feature').value,
-                    rating: parseInt(document.getElementById('feedback-rating').value),
-                    comment: document.getElementById('feedback-comment').value,
-                    suggestion: document.getElementById('feedback-suggestion').value,
-                    helpful: document.getElementById('feedback-helpful').checked,
-                    experience_level: document.getElementById('feedback-experience').value,
-                    response_time: Math.random() * 2000 + 500,
-                    accuracy_perceived: parseInt(document.getElementById('feedback-rating').value),
-                    relevance_score: parseInt(document.getElementById('feedback-rating').value)
-                };
-                
-                if (data.rating === 0) {
-                    alert('Please provide a rating before submitting.');
-                    return;
-                }
-                
-                try {
-                    const response = await fetch('/api/feedback/submit', {
-                        method: 'POST',
-                        headers: {'Content-Type': 'application/json'},
-                        body: JSON.stringify(data)
-                    });
-                    const result = await response.json();
-                    
-                    document.getElementById('feedback-result').innerHTML = 
-                        `<div class="result">
-                            <h4>✅ Feedback Submitted Successfully</h4>
-                            <div class="kb-article">
-                                <h5>Thank you for your feedback!</h5>
-                                <p><strong>Feedback ID:</strong> ${result.feedback_id}</p>
-                                <p><strong>Feature:</strong> ${data.feature}</p>
-                                <p><strong>Rating:</strong> ${'⭐'.repeat(data.rating)} (${data.rating}/5)</p>
-                                <p>Your feedback helps us improve the AI system continuously.</p>
-                            </div>
-                            <button class="button" onclick="showAnalytics()" style="margin-top: 10px;">📊 View Analytics</button>
-                        </div>`;
-                } catch (error) {
-                    document.getElementById('feedback-result').innerHTML = 
-                        `<div class="result" style="border-left-color: #dc3545;"><h4>❌ Error</h4><p>${error.message}</p></div>`;
-                }
-            }
-            
-            async function generateDemoFeedback() {
-                try {
-                    const response = await fetch('/api/feedback/demo-data', {
-                        method: 'POST'
-                    });
-                    const result = await response.json();
-                    
-                    document.getElementById('feedback-result').innerHTML = 
-                        `<div class="result">
-                            <h4>📊 Demo Feedback Generated</h4>
-                            <p>${result.message}</p>
-                            <p><strong>Total feedback entries:</strong> ${result.total_feedback}</p>
-                            <button class="button" onclick="showAnalytics()" style="margin-top: 10px;">📈 View Analytics</button>
-                        </div>`;
-                } catch (error) {
-                    document.getElementById('feedback-result').innerHTML = 
-                        `<div class="result" style="border-left-color: #dc3545;"><h4>❌ Error</h4><p>${error.message}</p></div>`;
-                }
-            }
-            
-            async function showAnalytics() {
-                try {
-                    const response = await fetch('/api/feedback/analytics');
-                    const result = await response.json();
-                    
-                    if (!result.analytics || result.analytics.total_feedback === 0) {
-                        document.getElementById('feedback-result').innerHTML = 
-                            `<div class="result">
-                                <h4>📊 Feedback Analytics</h4>
-                                <p>No feedback data available yet. Submit some feedback or generate demo data first.</p>
-                                <button class="button" onclick="generateDemoFeedback()">📊 Generate Demo Data</button>
-                            </div>`;
-                        return;
-                    }
-                    
-                    const analytics = result.analytics;
-                    
-                    let html = `<div class="result">
-                        <h4>📊 AI System Analytics Dashboard</h4>
-                        
-                        <div class="kb-article">
-                            <h5>📈 Overall Performance</h5>
-                            <p><strong>Total Feedback:</strong> ${analytics.total_feedback}</p>
-                            <p><strong>Average Rating:</strong> ${'⭐'.repeat(Math.round(analytics.average_rating))} (${analytics.average_rating}/5)</p>
-                            <p><strong>User Satisfaction:</strong></p>
-                            <p>• Very Satisfied: ${analytics.user_satisfaction.very_satisfied}</p>
-                            <p>• Satisfied: ${analytics.user_satisfaction.satisfied}</p>
-                            <p>• Needs Improvement: ${analytics.user_satisfaction.needs_improvement}</p>
-                        </div>
-                        
-                        <div class="kb-article">
-                            <h5>🎯 Feature Performance</h5>`;
-                    
-                    Object.entries(analytics.features).forEach(([feature, stats]) => {
-                        html += `<p><strong>${feature.replace('_', ' ').toUpperCase()}:</strong> 
-                            ${stats.average_rating.toFixed(1)}/5 (${stats.count} reviews, ${stats.helpful_percentage.toFixed(1)}% helpful)</p>`;
-                    });
-                    
-                    html += `</div>
-                        
-                        <div class="kb-article">
-                            <h5>🚀 Key Insights</h5>
-                            <p><strong>Most Used Feature:</strong> ${analytics.trends.most_used_feature}</p>
-                            <p><strong>Highest Rated:</strong> ${analytics.trends.highest_rated_feature}</p>
-                            <p><strong>Features Needing Attention:</strong> ${analytics.trends.needs_attention.length}</p>
-                        </div>`;
-                    
-                    if (analytics.improvement_recommendations.length > 0) {
-                        html += `<div class="kb-article">
-                            <h5>💡 Improvement Recommendations</h5>`;
-                        analytics.improvement_recommendations.forEach(rec => {
-                            html += `<p><strong>${rec.priority} Priority:</strong> ${rec.recommendation}</p>`;
-                        });
-                        html += `</div>`;
-                    }
-                    
-                    html += `<button class="button" onclick="showFeedbackForm()" style="margin-top: 10px;">💬 Submit More Feedback</button>
-                    </div>`;
-                    
-                    document.getElementById('feedback-result').innerHTML = html;
-                } catch (error) {
-                    document.getElementById('feedback-result').innerHTML = 
-                        `<div class="result" style="border-left-color: #dc3545;"><h4>❌ Error</h4><p>${error.message}</p></div>`;
-                }
-            }
-            
-            // Auto-populate demo data for quick testing
-            document.addEventListener('DOMContentLoaded', function() {
-                const demoTexts = {
-                    incident: "My Windows computer suddenly shows blue screen error with message IRQL_NOT_LESS_OR_EQUAL and keeps restarting. This started after I installed new graphics drivers yesterday.",
-                    search: "printer not responding",
-                    problem: "Our office printer suddenly stopped working. It shows as offline in Windows, but the printer displays show it's ready. Users can't print any documents."
-                };
-                
-                // Add demo buttons
-                const sections = document.querySelectorAll('.demo-section');
-                sections.forEach((section, index) => {
-                    const textarea = section.querySelector('textarea');
-                    if (textarea) {
-                        const demoBtn = document.createElement('button');
-                        demoBtn.textContent = '🎬 Load Demo Data';
-                        demoBtn.className = 'button';
-                        demoBtn.style.marginLeft = '10px';
-                        demoBtn.style.background = '#6c757d';
-                        demoBtn.onclick = () => {
-                            textarea.value = Object.values(demoTexts)[index] || '';
-                        };
-                        section.appendChild(demoBtn);
-                    }
-                });
-            });
-        </script>
-    </body>
-    </html>
-    """)
+    return ui_assets.page_response()
+
+@app.route('/assets/<path:filename>')
+def ui_asset(filename):
+    """Content-hashed UI assets, cacheable indefinitely"""
+    return ui_assets.asset_response(filename)
 
 @app.route('/api/summarize', methods=['POST'])
 def summarize_incident():
@@ -1177,12 +375,18 @@ def search_kb():
     data = request.get_json() or {}
     query = data.get('query', '')
     
-    results = rag_demo.search_knowledge_base(query)
+    try:
+        filters = parse_filters(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    results = rag_demo.search_knowledge_base(query, filters=filters)
     
     return jsonify({
         'success': True,
         'results': results,
         'query': query,
+        'filters': describe_filters(filters),
         'timestamp': datetime.now().isoformat(),
         'mode': 'demo'
     })
@@ -1231,6 +435,7 @@ def system_status():
             'version': '1.0.0',
             'technology': 'OpenAI GPT + Semantic Search'
         },
+        'tracing': tracer.to_dict(),
         'timestamp': datetime.now().isoformat()
     })
 
@@ -1271,13 +476,41 @@ MOCK_INCIDENTS = [
     }
 ]
 
+# Hash index by number plus secondary indexes by state, priority, category and assignee
+incident_store = IncidentStore(MOCK_INCIDENTS)
+# Similar-incident index, kept current on every create/update/resolve/sync
+incident_index = IncidentIndex(incident_store)
+incident_store.subscribe(incident_index.add)
+# KB and past-incident retrieval run side by side during analysis
+retrieval_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='retrieval')
+INCIDENT_PAGE_SIZE = 100
+INCIDENT_MAX_PAGE_SIZE = 1000
+
 @app.route('/api/servicenow/incidents', methods=['GET'])
 def get_servicenow_incidents():
-    """Mock ServiceNow incident retrieval"""
+    """Mock ServiceNow incident retrieval with filtering and cursor pagination"""
+    filters = {field: request.args.get(field) for field in INDEXED_FIELDS if request.args.get(field)}
+    try:
+        limit = min(max(int(request.args.get('limit', INCIDENT_PAGE_SIZE)), 1), INCIDENT_MAX_PAGE_SIZE)
+        after = decode_cursor(request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    incidents, next_position = incident_store.query(filters, after, limit)
+    
+    # Attach stored AI suggestions; missing or outdated ones are refreshed in the background
+    incidents = [
+        dict(incident, ai_suggestion=suggestion(*analysis_cache.get(incident, rag_demo.kb_version)))
+        for incident in incidents
+    ]
+    
     return jsonify({
         'success': True,
-        'incidents': MOCK_INCIDENTS,
-        'total_count': len(MOCK_INCIDENTS),
+        'incidents': incidents,
+        'total_count': len(incident_store),
+        'matched_count': incident_store.count(filters),
+        'filters': filters,
+        'next_cursor': encode_cursor(next_position) if next_position is not None else None,
         'integration': 'ServiceNow Simulation',
         'timestamp': datetime.now().isoformat()
     })
@@ -1285,22 +518,67 @@ def get_servicenow_incidents():
 @app.route('/api/servicenow/incidents/<incident_number>/analyze', methods=['POST'])
 def analyze_servicenow_incident(incident_number):
     """Analyze ServiceNow incident using RAG system"""
-    incident = next((inc for inc in MOCK_INCIDENTS if inc['number'] == incident_number), None)
+    incident = incident_store.get(incident_number)
     
     if not incident:
         return jsonify({'error': 'Incident not found'}), 404
     
-    # Combine incident data for analysis
-    incident_text = f"{incident['short_description']} - {incident['description']}"
-    
-    # Get AI analysis
-    summary = rag_demo.summarize_incident(incident_text)
-    kb_articles = rag_demo.search_knowledge_base(incident_text)
-    solution = rag_demo.generate_solution(summary, kb_articles)
+    # Past incidents change with every resolve and sync, so they are searched on each read,
+    # alongside the stored analysis (or its computation when nothing is stored yet)
+    similar = retrieval_pool.submit(in_current_context(find_similar_incidents), incident)
+    entry, status = analysis_cache.get_or_compute(incident, rag_demo.kb_version)
+    analysis = entry['analysis']
     
     return jsonify({
         'success': True,
         'incident': incident,
+        'ai_analysis': dict(analysis['ai_analysis'], similar_incidents=similar.result()),
+        'recommendations': analysis['recommendations'],
+        'analysis_cache': {
+            'status': status,
+            'revision': entry['revision'],
+            'kb_version': entry['kb_version'],
+            'analyzed_at': entry['analyzed_at']
+        },
+        'timestamp': datetime.now().isoformat()
+    })
+
+def incident_text(incident):
+    """Combine incident data for analysis"""
+    return f"{incident['short_description']} - {incident['description']}"
+
+@traced('incident_index.search')
+def find_similar_incidents(incident, top_k=3):
+    """Past incidents most similar to this one, with their resolution notes"""
+    with stage('similar_incidents'):
+        matches = incident_index.search(incident_text(incident), top_k, exclude=incident['number'])
+    return [
+        {
+            'number': match['number'],
+            'short_description': match['short_description'],
+            'state': match['state'],
+            'category': match['category'],
+            'close_notes': match.get('close_notes', ''),
+            'similarity_score': round(score, 3)
+        }
+        for match, score in matches
+    ]
+
+@traced('analyze_incident')
+def analyze_incident(incident, kb_articles=None):
+    """AI analysis and routing recommendations for one incident, without similar incidents"""
+    text = incident_text(incident)
+    
+    if kb_articles is None:
+        kb_articles = rag_demo.search_knowledge_base(text)
+    
+    # Get AI analysis
+    with stage('summarize'):
+        summary = rag_demo.summarize_incident(text)
+    with stage('generate_response'):
+        solution = rag_demo.generate_solution(summary, kb_articles)
+    
+    return {
         'ai_analysis': {
             'summary': summary,
             'solution': solution,
@@ -1308,9 +586,193 @@ def analyze_servicenow_incident(incident_number):
         },
         'recommendations': {
             'escalate': incident['priority'] == '1 - Critical',
-            'assign_to': 'L2 Support' if any(word in incident_text.lower() for word in ['network', 'server', 'exchange']) else 'L1 Support',
+            'assign_to': 'L2 Support' if any(word in text.lower() for word in ['network', 'server', 'exchange']) else 'L1 Support',
             'estimated_resolution': '2-4 hours' if incident['priority'] == '2 - High' else '4-8 hours'
-        },
+        }
+    }
+
+def analyze_incident_batch(incidents):
+    """Bulk-job worker: one batched KB retrieval, then per-incident analysis"""
+    kb_results = rag_demo.search_many([incident_text(incident) for incident in incidents])
+    results = []
+    for incident, kb_articles in zip(incidents, kb_results):
+        analysis = analyze_incident(incident, kb_articles)
+        analysis_cache.put(incident, rag_demo.kb_version, analysis)
+        results.append({
+            'number': incident['number'],
+            'state': incident['state'],
+            'priority': incident['priority'],
+            'summary': analysis['ai_analysis']['summary'],
+            'solution': analysis['ai_analysis']['solution'],
+            'relevant_kb': [
+                {'id': kb['id'], 'title': kb['title'], 'relevance_score': kb['relevance_score']}
+                for kb in kb_articles
+            ],
+            'similar_incidents': [
+                {'number': match['number'], 'similarity_score': match['similarity_score']}
+                for match in find_similar_incidents(incident)
+            ],
+            'recommendations': analysis['recommendations']
+        })
+    return results
+
+# Analyses persisted per incident revision and KB version
+analysis_cache = AnalysisCache(
+    analyze_incident,
+    path=os.getenv('ANALYSIS_CACHE_PATH', 'incident_analyses.db'),
+    max_entries=int(os.getenv('ANALYSIS_CACHE_MAX_ENTRIES', '10000'))
+)
+
+def suggestion(entry, status):
+    """Compact AI suggestion for list views, from a stored analysis entry"""
+    if entry is None:
+        return {'status': 'pending'}
+    analysis = entry['analysis']
+    relevant_kb = analysis['ai_analysis']['relevant_kb']
+    return {
+        'status': status,
+        'assign_to': analysis['recommendations']['assign_to'],
+        'escalate': analysis['recommendations']['escalate'],
+        'estimated_resolution': analysis['recommendations']['estimated_resolution'],
+        'top_kb': {'id': relevant_kb[0]['id'], 'title': relevant_kb[0]['title']} if relevant_kb else None,
+        'analyzed_at': entry['analyzed_at']
+    }
+
+@app.route('/api/servicenow/incidents/<incident_number>/resolve', methods=['POST'])
+def resolve_servicenow_incident(incident_number):
+    """Mock incident resolution; the close notes become searchable for similar incidents"""
+    data = request.get_json() or {}
+    incident = incident_store.update(
+        incident_number,
+        state='Resolved',
+        close_notes=data.get('close_notes', ''),
+        resolved_on=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    )
+    
+    if not incident:
+        return jsonify({'error': 'Incident not found'}), 404
+    
+    return jsonify({
+        'success': True,
+        'incident': incident,
+        'timestamp': datetime.now().isoformat()
+    })
+
+# Bulk analysis jobs for triaging whole queues
+bulk_jobs = BulkAnalysisJobs()
+
+@app.route('/api/servicenow/bulk-analyze', methods=['POST'])
+def start_bulk_analysis():
+    """Start analyzing every incident matching a filter, e.g. {"state": "Open"}"""
+    data = request.get_json() or {}
+    filters = {field: data[field] for field in INDEXED_FIELDS if data.get(field)}
+    
+    # workers and batch_size are clamped to the job's bounds; non-integers are rejected
+    try:
+        job = BulkAnalysisJob(
+            incident_store,
+            filters,
+            analyze_incident_batch,
+            workers=data.get('workers', 4),
+            batch_size=data.get('batch_size', 16),
+            results_dir=os.getenv('BULK_RESULTS_DIR')
+        )
+    except ValueError:
+        return jsonify({'error': 'workers and batch_size must be integers'}), 400
+    bulk_jobs.start(job)
+    
+    return jsonify({
+        'success': True,
+        'job': job.to_dict(),
+        'results_url': f"/api/servicenow/bulk-analyze/{job.id}/results",
+        'timestamp': datetime.now().isoformat()
+    }), 202
+
+@app.route('/api/servicenow/bulk-analyze/<job_id>', methods=['GET'])
+def get_bulk_analysis(job_id):
+    """Progress of a bulk analysis job"""
+    job = bulk_jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return jsonify({
+        'success': True,
+        'job': job.to_dict(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/servicenow/bulk-analyze/<job_id>/results', methods=['GET'])
+def stream_bulk_analysis(job_id):
+    """Stream a job's results as NDJSON, ending with a job status line"""
+    job = bulk_jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return Response(job.stream(), mimetype='application/x-ndjson')
+
+@app.route('/api/servicenow/bulk-analyze/<job_id>', methods=['DELETE'])
+def cancel_bulk_analysis(job_id):
+    """Cancel a running bulk analysis job; finished results stay available"""
+    job = bulk_jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    job.cancel()
+    return jsonify({
+        'success': True,
+        'job': job.to_dict(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+# Incremental sync from a real (or stub) ServiceNow instance; disabled unless SERVICENOW_URL is set
+SERVICENOW_URL = os.getenv('SERVICENOW_URL')
+SERVICENOW_SYNC_INTERVAL = float(os.getenv('SERVICENOW_SYNC_INTERVAL', '60'))
+
+def analyze_synced_incidents(incidents):
+    """Sync callback: re-analyze only the new/changed incidents, off the polling thread"""
+    analysis_cache.refresh(incidents, rag_demo.kb_version)
+
+servicenow_sync = None
+if SERVICENOW_URL:
+    servicenow_sync = ServiceNowSync(
+        SERVICENOW_URL,
+        incident_store,
+        on_changed=analyze_synced_incidents,
+        auth=(os.getenv('SERVICENOW_USER'), os.getenv('SERVICENOW_PASSWORD')) if os.getenv('SERVICENOW_USER') else None,
+        page_size=int(os.getenv('SERVICENOW_PAGE_SIZE', '100')),
+        rate_limit=float(os.getenv('SERVICENOW_RATE_LIMIT', '10'))
+    )
+    if SERVICENOW_SYNC_INTERVAL > 0:
+        servicenow_sync.start(SERVICENOW_SYNC_INTERVAL)
+
+@app.route('/api/servicenow/sync', methods=['GET'])
+def get_servicenow_sync():
+    """Sync configuration, watermark and fetch/upsert counters"""
+    if not servicenow_sync:
+        return jsonify({'error': 'ServiceNow sync is not configured (set SERVICENOW_URL)'}), 404
+    
+    return jsonify({
+        'success': True,
+        'sync': servicenow_sync.to_dict(),
+        'analysis_cache': analysis_cache.to_dict(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/servicenow/sync', methods=['POST'])
+def run_servicenow_sync():
+    """Poll for incidents changed since the watermark right away"""
+    if not servicenow_sync:
+        return jsonify({'error': 'ServiceNow sync is not configured (set SERVICENOW_URL)'}), 404
+    
+    try:
+        summary = servicenow_sync.poll_once()
+    except Exception as e:
+        return jsonify({'error': f'ServiceNow sync failed: {e}', 'sync': servicenow_sync.to_dict()}), 502
+    
+    return jsonify({
+        'success': True,
+        'result': summary,
+        'sync': servicenow_sync.to_dict(),
         'timestamp': datetime.now().isoformat()
     })
 
@@ -1331,7 +793,7 @@ def create_servicenow_incident():
         'caller': data.get('caller', 'system@company.com')
     }
     
-    MOCK_INCIDENTS.append(new_incident)
+    incident_store.upsert(new_incident)
     
     return jsonify({
         'success': True,
@@ -1341,147 +803,139 @@ def create_servicenow_incident():
     })
 
 # Quiz Generation System for Interactive Learning
+# Questions pre-generated per article, indexed by category and difficulty
+# Questions from the offline LLM job (quiz_generation.py) replace an article's
+# templates while the article is unchanged; the file is re-read when it changes
+quiz_bank = QuizBank(generated_path=os.getenv('QUIZ_QUESTIONS_PATH', 'quiz_questions.jsonl'))
+quiz_bank.rebuild(KNOWLEDGE_BASE, rag_demo.kb_version)
+QUIZ_QUESTIONS = 3
+QUIZ_MAX_QUESTIONS = 20
+# Issued quizzes and their answer keys, until submitted or expired
+quiz_sessions = QuizSessionStore(
+    ttl_seconds=float(os.getenv('QUIZ_SESSION_TTL_SECONDS', '7200')),
+    max_sessions=int(os.getenv('QUIZ_MAX_SESSIONS', '10000')),
+    path=os.getenv('QUIZ_SESSION_DB_PATH')
+)
+# Answer key fields kept server-side and only revealed on submit
+QUIZ_ANSWER_FIELDS = ('correct_answer', 'explanation')
+# Per-engineer, per-category results, written through to SQLite on every submission;
+# category 'adaptive' builds a quiz around the engineer's weak categories
+proficiency = ProficiencyStore(path=os.getenv('PROFICIENCY_PATH', 'proficiency.db'))
+ADAPTIVE_CATEGORY = 'adaptive'
+
+def current_quiz_bank():
+    """The question bank, regenerating changed articles if the KB or generated questions have moved on"""
+    if quiz_bank.reload_generated() or quiz_bank.kb_version != rag_demo.kb_version:
+        quiz_bank.rebuild(rag_demo.knowledge_base, rag_demo.kb_version)
+    return quiz_bank
+
 @app.route('/api/quiz/generate', methods=['POST'])
 def generate_quiz():
     """Generate AI-powered quiz from knowledge base for learning"""
     data = request.get_json() or {}
     category = data.get('category', 'all')
     difficulty = data.get('difficulty', 'medium')
+    engineer_id = data.get('engineer_id')
+    bank = current_quiz_bank()
+    try:
+        num_questions = min(max(int(data.get('num_questions', QUIZ_QUESTIONS)), 1), QUIZ_MAX_QUESTIONS)
+        if category == ADAPTIVE_CATEGORY:
+            if not engineer_id:
+                return jsonify({'error': 'engineer_id is required for an adaptive quiz'}), 400
+            # Questions spread towards weak categories, at a difficulty matching each
+            difficulty = ADAPTIVE_CATEGORY
+            sampled = []
+            for plan_category, plan_difficulty, count in proficiency.plan(
+                    engineer_id, sorted(bank.categories()), num_questions, random):
+                sampled.extend(bank.sample(plan_category, plan_difficulty, count))
+        else:
+            sampled = bank.sample(category, difficulty, num_questions)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Filter articles by category if specified
-    articles = KNOWLEDGE_BASE
-    if category != 'all':
-        articles = [a for a in KNOWLEDGE_BASE if a['category'].lower() == category.lower()]
-    
-    if not articles:
+    if not sampled:
         return jsonify({'error': 'No articles found for the specified category'}), 400
     
-    # Generate quiz questions based on knowledge base content
-    quiz_questions = []
-    
-    for i, article in enumerate(articles[:3]):  # Generate 3 questions max
-        # Create different types of questions based on the article content
-        if i % 3 == 0:  # Multiple choice question
-            question = {
-                'id': f"Q{i+1}",
-                'type': 'multiple_choice',
-                'question': f"What is the primary cause of {article['title'].split(' - ')[0]}?",
-                'options': [
-                    extract_primary_cause(article['content']),
-                    generate_wrong_option(article['category']),
-                    generate_wrong_option(article['category']),
-                    generate_wrong_option(article['category'])
-                ],
-                'correct_answer': 0,
-                'explanation': f"Based on {article['id']}: {article['content'][:150]}...",
-                'kb_reference': article['id'],
-                'category': article['category']
-            }
-        elif i % 3 == 1:  # True/False question
-            question = {
-                'id': f"Q{i+1}",
-                'type': 'true_false',
-                'question': f"Safe Mode is mentioned as a solution for {article['category'].lower()} issues.",
-                'correct_answer': 'Safe Mode' in article['content'],
-                'explanation': f"According to {article['id']}, Safe Mode is {'recommended' if 'Safe Mode' in article['content'] else 'not mentioned'} for this type of issue.",
-                'kb_reference': article['id'],
-                'category': article['category']
-            }
-        else:  # Fill in the blank
-            question = {
-                'id': f"Q{i+1}",
-                'type': 'fill_blank',
-                'question': f"To flush DNS cache on Windows, you should run the command: ipconfig /______",
-                'correct_answer': 'flushdns',
-                'explanation': f"The correct command is 'ipconfig /flushdns' as mentioned in {article['id']}.",
-                'kb_reference': article['id'],
-                'category': article['category']
-            }
-        
-        quiz_questions.append(question)
+    # Number the sampled bank questions for this quiz
+    quiz_questions = [dict(question, id=f"Q{i+1}") for i, question in enumerate(sampled)]
     
     quiz = {
         'id': f"QUIZ_{str(uuid.uuid4())[:8].upper()}",
         'title': f"IT Support Knowledge Quiz - {category.title() if category != 'all' else 'General'}",
         'difficulty': difficulty,
+        'engineer_id': engineer_id,
         'total_questions': len(quiz_questions),
-        'questions': quiz_questions,
         'time_limit_minutes': 10,
         'created_at': datetime.now().isoformat()
     }
+    quiz_sessions.put(dict(quiz, questions={question['id']: question for question in quiz_questions}))
     
     return jsonify({
         'success': True,
-        'quiz': quiz,
+        'quiz': dict(quiz, questions=[
+            {key: value for key, value in question.items() if key not in QUIZ_ANSWER_FIELDS}
+            for question in quiz_questions
+        ]),
         'timestamp': datetime.now().isoformat()
     })
 
-def extract_primary_cause(content):
-    """Extract primary cause from article content"""
-    if 'driver' in content.lower():
-        return "Driver issues and conflicts"
-    elif 'network' in content.lower():
-        return "Network connectivity problems"
-    elif 'hardware' in content.lower():
-        return "Hardware failures or conflicts"
-    elif 'software' in content.lower():
-        return "Software configuration errors"
-    else:
-        return "System configuration issues"
-
-def generate_wrong_option(category):
-    """Generate plausible wrong answers based on category"""
-    wrong_options = {
-        'Windows': ['User account permissions', 'Antivirus interference', 'Registry corruption'],
-        'Mac': ['iCloud synchronization', 'Keychain access errors', 'Time Machine conflicts'],
-        'Network': ['Cable modem issues', 'Router overheating', 'ISP throttling'],
-        'Hardware': ['Power supply fluctuation', 'Cable connection loose', 'Firmware outdated'],
-        'Email': ['Server maintenance', 'Account quota exceeded', 'Client version outdated'],
-        'Performance': ['Background updates', 'Cache overflow', 'Thermal throttling']
-    }
-    
-    options = wrong_options.get(category, ['Configuration errors', 'User error', 'System overload'])
-    import random
-    return random.choice(options)
-
 @app.route('/api/quiz/submit', methods=['POST'])
 def submit_quiz():
     """Process quiz submission and provide detailed feedback"""
     data = request.get_json() or {}
     answers = data.get('answers', {})
     quiz_id = data.get('quiz_id', '')
+    if not isinstance(answers, dict):
+        return jsonify({'error': 'answers must be an object keyed by question id'}), 400
     
-    # Since this is a demo, we'll create mock scoring
-    total_questions = len(answers)
+    session = quiz_sessions.get(quiz_id)
+    if session is None:
+        return jsonify({'error': 'Quiz not found or expired'}), 404
+    submitted_at = datetime.now().isoformat()
+    if not quiz_sessions.mark_submitted(quiz_id, submitted_at):
+        return jsonify({'error': 'Quiz has already been submitted'}), 409
+    
+    # Score every issued question; unanswered ones count as incorrect
+    total_questions = session['total_questions']
     correct_answers = 0
     detailed_feedback = []
     
-    for question_id, user_answer in answers.items():
-        # Mock correct answers for demo
-        is_correct = hash(question_id) % 3 != 0  # Roughly 66% correct for demo
-        if is_correct:
+    for question_id, question in session['questions'].items():
+        user_answer = answers.get(question_id)
+        correct = is_correct(question, user_answer)
+        if correct:
             correct_answers += 1
         
         feedback = {
             'question_id': question_id,
             'user_answer': user_answer,
-            'correct': is_correct,
-            'feedback': 'Correct! Great understanding of IT troubleshooting.' if is_correct else 'Review the related knowledge base article for better understanding.',
-            'learning_tip': 'Focus on systematic troubleshooting approaches' if not is_correct else 'Keep up the excellent work!'
+            'correct': correct,
+            'correct_answer': question['correct_answer'],
+            'kb_reference': question['kb_reference'],
+            'category': question['category'],
+            'feedback': 'Correct! Great understanding of IT troubleshooting.' if correct else question['explanation'],
+            'learning_tip': f"Review {question['kb_reference']} for this topic" if not correct else 'Keep up the excellent work!'
         }
         detailed_feedback.append(feedback)
     
     score_percentage = (correct_answers / total_questions * 100) if total_questions > 0 else 0
     
+    engineer_id = session.get('engineer_id') or data.get('engineer_id')
+    profile = None
+    if engineer_id:
+        proficiency.record(engineer_id, [(f['category'], f['correct']) for f in detailed_feedback])
+        profile = proficiency.profile(engineer_id)
+    
     result = {
         'quiz_id': quiz_id,
         'score': score_percentage,
         'correct_answers': correct_answers,
         'total_questions': total_questions,
-        'performance_level': get_performance_level(score_percentage),
+        'performance_level': get_performance_level(score_percentage, profile),
         'detailed_feedback': detailed_feedback,
-        'learning_recommendations': generate_learning_recommendations(score_percentage),
-        'submitted_at': datetime.now().isoformat()
+        'learning_recommendations': generate_learning_recommendations(score_percentage, profile),
+        'proficiency': profile,
+        'submitted_at': submitted_at
     }
     
     return jsonify({
@@ -1490,8 +944,16 @@ def submit_quiz():
         'timestamp': datetime.now().isoformat()
     })
 
-def get_performance_level(score):
-    """Determine performance level based on score"""
+def recent_accuracy(profile):
+    """Attempt-weighted recent accuracy across an engineer's categories"""
+    categories = profile['categories'].values()
+    attempts = sum(c['attempts'] for c in categories)
+    return sum(c['recent_accuracy'] * c['attempts'] for c in categories) / attempts if attempts else 0
+
+def get_performance_level(score, profile=None):
+    """Determine performance level from the engineer's recent accuracy, or this quiz's score"""
+    if profile:
+        score = recent_accuracy(profile)
     if score >= 85:
         return 'Expert'
     elif score >= 70:
@@ -1501,8 +963,23 @@ def get_performance_level(score):
     else:
         return 'Needs Improvement'
 
-def generate_learning_recommendations(score):
+# Categories below this recent accuracy get a targeted recommendation
+WEAK_CATEGORY_ACCURACY = 70
+
+def generate_learning_recommendations(score, profile=None):
     """Generate personalized learning recommendations"""
+    targeted = []
+    if profile:
+        for category in profile['weakest_categories'][:2]:
+            stats = profile['categories'][category]
+            if stats['recent_accuracy'] < WEAK_CATEGORY_ACCURACY:
+                targeted.append(
+                    f"Focus on {category}: {stats['recent_accuracy']:.0f}% recent accuracy over "
+                    f"{stats['attempts']} questions. An adaptive quiz will target it."
+                )
+    return targeted + score_recommendations(score)
+
+def score_recommendations(score):
     if score >= 85:
         return [
             "Excellent work! Consider mentoring junior support staff.",
@@ -1528,49 +1005,174 @@ def generate_learning_recommendations(score):
             "Consider formal training or mentorship."
         ]
 
+@app.route('/api/quiz/proficiency/<engineer_id>', methods=['GET'])
+def get_quiz_proficiency(engineer_id):
+    """Per-category quiz statistics for one engineer"""
+    profile = proficiency.profile(engineer_id)
+    if profile is None:
+        return jsonify({'error': 'No quiz results for this engineer'}), 404
+    
+    return jsonify({
+        'success': True,
+        'proficiency': profile,
+        'performance_level': get_performance_level(0, profile),
+        'timestamp': datetime.now().isoformat()
+    })
+
 @app.route('/api/quiz/categories', methods=['GET'])
 def get_quiz_categories():
     """Get available quiz categories"""
-    categories = list(set(article['category'] for article in KNOWLEDGE_BASE))
+    bank = current_quiz_bank()
+    question_counts = bank.categories()
     
     return jsonify({
         'success': True,
-        'categories': ['all'] + categories,
+        'categories': ['all'] + sorted(question_counts),
+        'question_counts': question_counts,
+        'total_questions': len(bank),
+        'question_sources': bank.sources(),
         'total_articles': len(KNOWLEDGE_BASE),
+        'sessions': quiz_sessions.to_dict(),
+        'proficiency': proficiency.to_dict(),
         'timestamp': datetime.now().isoformat()
     })
 
 # Feedback Loop System for Continuous AI Improvement
-FEEDBACK_DATA = []
+# Durable, append-only feedback log shared by every worker on this node
+feedback_log = FeedbackLog(
+    os.getenv('FEEDBACK_DB_PATH', 'feedback.db'),
+    raw_retention_days=int(os.getenv('FEEDBACK_RAW_RETENTION_DAYS', '30'))
+)
+# Per-feature counters and rating histograms, updated on submit and reloaded
+# from the log's rollups + tail so writes from other workers show up
+FEEDBACK_ANALYTICS_REFRESH_SECONDS = float(os.getenv('FEEDBACK_ANALYTICS_REFRESH_SECONDS', '5'))
+feedback_stats = FeedbackAggregates()
+feedback_stats.replace(feedback_log.feature_stats())
+
+def queue_depths():
+    return {
+        ('feedback_log',): feedback_log.to_dict()['queued'],
+        ('analysis_refresh',): analysis_cache.to_dict()['refreshing'],
+        ('bulk_analysis',): bulk_jobs.pending()
+    }
+
+def analysis_cache_lookups():
+    stats = analysis_cache.to_dict()
+    return {(outcome,): stats[key] for outcome, key in (('fresh', 'hits'), ('stale', 'stale_hits'), ('miss', 'misses'))}
+
+# Read when /metrics is scraped, so they cost nothing per request
+REGISTRY.gauge_callback('it_support_queue_depth', 'Items waiting in background queues', ('queue',), queue_depths)
+REGISTRY.counter_callback('it_support_analysis_cache_lookups_total', 'Incident analysis cache lookups by outcome',
+                          ('outcome',), analysis_cache_lookups)
+
+@app.route('/api/admin/profile', methods=['GET'])
+def get_profile():
+    """Profiling settings, per-route cProfile summaries (?route=...) and allocation stats (?allocations=1)"""
+    return jsonify({
+        'success': True,
+        'profiling': profiler.to_dict(),
+        'routes': profiler.route_stats(request.args.get('route')),
+        'top_allocations': profiler.top_allocations() if request.args.get('allocations') == '1' else [],
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/admin/profile', methods=['POST'])
+def update_profiling():
+    """Change profiling at runtime, e.g. {"every_n": 50, "tracemalloc": true, "sample_seconds": 30}"""
+    data = request.get_json() or {}
+    profiler.configure(data.get('every_n'), trace_allocations=data.get('tracemalloc'))
+    if data.get('sample_seconds'):
+        try:
+            profiler.sampler.start(data['sample_seconds'], data.get('interval_ms', DEFAULT_SAMPLE_INTERVAL_MS))
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 409
+    return jsonify({
+        'success': True,
+        'profiling': profiler.to_dict(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/admin/profile', methods=['DELETE'])
+def reset_profiling():
+    """Stop all profiling and discard what was collected"""
+    profiler.sampler.stop()
+    profiler.configure(every_n=0, trace_allocations=False)
+    profiler.reset()
+    return jsonify({
+        'success': True,
+        'profiling': profiler.to_dict(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/admin/profile/folded', methods=['GET'])
+def get_folded_stacks():
+    """Sampled stacks in folded format for flamegraph.pl, speedscope or inferno (?idle=1 keeps waiting threads)"""
+    return Response(profiler.sampler.folded(idle=request.args.get('idle') == '1'), mimetype='text/plain')
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics"""
+    return metrics_response()
+
+# Minute/hour/day ring buffers per feature, refilled from the raw entries still in the log on startup
+feedback_trends = FeedbackTrends()
+for entry in feedback_log.entries_since('0000-00-00'):
+    try:
+        feedback_trends.record(entry)
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        # Rows stored before submissions were validated must not stop the app from starting
+        logger.warning(f"Skipping malformed feedback entry {entry.get('id')}: {e!r}")
+# Search ranking boosts, from the log's article rollups plus its uncompacted entries
+rag_demo.boosts.restore(*feedback_log.article_feedback())
+
+def current_feedback_stats():
+    if time.monotonic() - feedback_stats.loaded_at > FEEDBACK_ANALYTICS_REFRESH_SECONDS:
+        feedback_stats.replace(feedback_log.feature_stats())
+    return feedback_stats
 
 @app.route('/api/feedback/submit', methods=['POST'])
 def submit_feedback():
     """Submit user feedback for AI system improvement"""
     data = request.get_json() or {}
+    # Checked before anything is logged: stored entries are replayed into the trends on startup
+    try:
+        rating = parse_rating(data.get('rating', 0))
+        system_metrics = {
+            'response_time': parse_metric(data.get('response_time', 0), 'response_time'),
+            'accuracy_perceived': parse_metric(data.get('accuracy_perceived', 3), 'accuracy_perceived', 5),
+            'relevance_score': parse_metric(data.get('relevance_score', 3), 'relevance_score', 5)
+        }
+        article_ids, query = parse_feedback_target(data.get('article_ids'), data.get('query'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     feedback = {
         'id': f"FB_{str(uuid.uuid4())[:8].upper()}",
         'session_id': data.get('session_id', 'unknown'),
         'feature': data.get('feature', ''),  # rag_search, incident_analysis, quiz, servicenow
-        'rating': data.get('rating', 0),  # 1-5 scale
+        'rating': rating,  # 1-5 scale, 0 when unrated
         'comment': data.get('comment', ''),
         'helpful': data.get('helpful', True),
         'suggestion': data.get('suggestion', ''),
+        # Optional: the query and KB articles the feedback is about, for ranking boosts
+        'query': query,
+        'query_cluster': rag_demo.boosts.cluster_label(query),
+        'article_ids': article_ids,
         'user_context': {
             'experience_level': data.get('experience_level', 'intermediate'),
             'department': data.get('department', 'IT Support'),
             'use_case': data.get('use_case', 'general')
         },
-        'system_metrics': {
-            'response_time': data.get('response_time', 0),
-            'accuracy_perceived': data.get('accuracy_perceived', 3),
-            'relevance_score': data.get('relevance_score', 3)
-        },
+        'system_metrics': system_metrics,
         'created_at': datetime.now().isoformat(),
         'processed': False
     }
     
-    FEEDBACK_DATA.append(feedback)
+    # Returns once the group commit holding this entry is on disk
+    feedback_log.append(feedback)
+    feedback_stats.record(feedback)
+    feedback_trends.record(feedback)
+    rag_demo.boosts.record(feedback['article_ids'], feedback['rating'], feedback['helpful'], feedback['query'])
     
     return jsonify({
         'success': True,
@@ -1580,9 +1182,11 @@ def submit_feedback():
     })
 
 @app.route('/api/feedback/analytics', methods=['GET'])
+@track_allocations('feedback.analytics')
 def get_feedback_analytics():
     """Get analytics from user feedback for system improvement"""
-    if not FEEDBACK_DATA:
+    stats = current_feedback_stats()
+    if not stats.total.count:
         return jsonify({
             'message': 'No feedback data available yet',
             'analytics': {
@@ -1593,77 +1197,31 @@ def get_feedback_analytics():
             }
         })
     
-    # Calculate analytics
-    total_feedback = len(FEEDBACK_DATA)
-    average_rating = sum(f['rating'] for f in FEEDBACK_DATA) / total_feedback
-    
-    # Feature breakdown
-    features = {}
-    for feedback in FEEDBACK_DATA:
-        feature = feedback['feature']
-        if feature not in features:
-            features[feature] = {
-                'count': 0,
-                'average_rating': 0,
-                'helpful_percentage': 0,
-                'ratings': []
-            }
-        features[feature]['count'] += 1
-        features[feature]['ratings'].append(feedback['rating'])
-    
-    # Calculate feature averages
-    for feature, stats in features.items():
-        stats['average_rating'] = sum(stats['ratings']) / len(stats['ratings'])
-        helpful_count = sum(1 for f in FEEDBACK_DATA if f['feature'] == feature and f['helpful'])
-        stats['helpful_percentage'] = (helpful_count / stats['count']) * 100
-    
-    # Generate improvement recommendations
-    improvement_recommendations = []
-    for feature, stats in features.items():
-        if stats['average_rating'] < 3.5:
-            improvement_recommendations.append({
-                'feature': feature,
-                'priority': 'High',
-                'recommendation': f"Improve {feature} - average rating {stats['average_rating']:.1f}/5",
-                'suggested_actions': [
-                    'Review user feedback comments',
-                    'Analyze common failure patterns',
-                    'Enhance algorithm accuracy',
-                    'Improve user interface'
-                ]
-            })
-        elif stats['helpful_percentage'] < 70:
-            improvement_recommendations.append({
-                'feature': feature,
-                'priority': 'Medium',
-                'recommendation': f"Enhance relevance for {feature} - {stats['helpful_percentage']:.1f}% helpful",
-                'suggested_actions': [
-                    'Refine content matching algorithms',
-                    'Update knowledge base coverage',
-                    'Improve result ranking'
-                ]
-            })
-    
-    analytics = {
-        'total_feedback': total_feedback,
-        'average_rating': round(average_rating, 2),
-        'features': features,
-        'improvement_recommendations': improvement_recommendations,
-        'user_satisfaction': {
-            'very_satisfied': len([f for f in FEEDBACK_DATA if f['rating'] >= 4]),
-            'satisfied': len([f for f in FEEDBACK_DATA if f['rating'] == 3]),
-            'needs_improvement': len([f for f in FEEDBACK_DATA if f['rating'] <= 2])
-        },
-        'trends': {
-            'most_used_feature': max(features.keys(), key=lambda k: features[k]['count']) if features else 'None',
-            'highest_rated_feature': max(features.keys(), key=lambda k: features[k]['average_rating']) if features else 'None',
-            'needs_attention': [f for f in improvement_recommendations if f['priority'] == 'High']
-        }
-    }
+    # Running aggregates, updated at submit time
+    analytics = stats.analytics()
     
     return jsonify({
         'success': True,
         'analytics': analytics,
+        'storage': feedback_log.to_dict(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/feedback/trends', methods=['GET'])
+def get_feedback_trends():
+    """Rating, helpfulness and response time per time bucket, e.g. ?resolution=hour&buckets=24&feature=rag_search"""
+    resolution = request.args.get('resolution', 'hour')
+    try:
+        buckets = int(request.args.get('buckets', 24))
+        trends = feedback_trends.window(resolution, buckets, request.args.get('feature'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'success': True,
+        'trends': trends,
+        'features': feedback_trends.features(),
+        'resolutions': {name: {'bucket_seconds': width, 'max_buckets': size} for name, (width, size) in RESOLUTIONS.items()},
         'timestamp': datetime.now().isoformat()
     })
 
@@ -1730,12 +1288,14 @@ def generate_demo_feedback():
             'created_at': datetime.now().isoformat(),
             'processed': False
         }
-        FEEDBACK_DATA.append(feedback)
+        feedback_log.append(feedback, wait=False)
+        feedback_stats.record(feedback)
+        feedback_trends.record(feedback)
     
     return jsonify({
         'success': True,
         'message': f'{len(demo_feedback)} demo feedback entries created',
-        'total_feedback': len(FEEDBACK_DATA)
+        'total_feedback': feedback_stats.total.count
     })
 
 if __name__ == '__main__':
@@ -0,0 +1,166 @@
+"""
+Feedback-driven ranking boosts
+
+Feedback that names the KB articles it was about is folded into per-article
+quality priors, overall and per query cluster (the first incident category a
+query matches). Each prior is a smoothed mean of the feedback signal, shrunk
+towards neutral for articles with little feedback, and is kept as a
+precomputed multiplicative boost in a (clusters + 1) x articles matrix. A
+feedback entry updates only the columns of its articles; a search picks one
+row and multiplies it into the scores it already computes.
+
+The priors outlive the raw feedback log: FeedbackLog folds each compacted
+day's entries into per-article, per-cluster sums (feedback_priors), and
+restore() rebuilds the matrix from those sums plus the entries not yet
+compacted.
+"""
+
+import logging
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Maximum boost either way: scores are multiplied by a value in [1 - w, 1 + w]
+DEFAULT_WEIGHT = 0.1
+# Pseudo-count of neutral feedback each prior starts with
+PRIOR_STRENGTH = 5.0
+
+
+def quality_signal(rating, helpful):
+    """Feedback as a 0-1 quality signal: the 1-5 rating if given, else helpfulness"""
+    if rating:
+        return min(max((rating - 1) / 4, 0.0), 1.0)
+    return 1.0 if helpful else 0.0
+
+
+def parse_feedback_target(article_ids, query):
+    """(article ids, query) of a feedback submission, raising ValueError unless they are a list of strings and a string"""
+    article_ids = [] if article_ids is None else article_ids
+    query = '' if query is None else query
+    if not isinstance(article_ids, list) or not all(isinstance(a, str) for a in article_ids):
+        raise ValueError('article_ids must be a list of article ids')
+    if not isinstance(query, str):
+        raise ValueError('query must be a string')
+    return article_ids, query
+
+
+def feedback_priors(entry):
+    """[(article id, cluster label or '' for all queries, quality signal)] a stored feedback entry adds"""
+    article_ids = entry.get('article_ids') or []
+    if not isinstance(article_ids, list):
+        return []
+    signal = quality_signal(entry['rating'], entry['helpful'])
+    clusters = [''] + ([entry['query_cluster']] if entry.get('query_cluster') else [])
+    return [(article_id, cluster, signal) for article_id in article_ids if isinstance(article_id, str)
+            for cluster in clusters]
+
+
+def classifier_clusters(classifier):
+    """(cluster labels, query -> cluster or None) using the first matched incident category"""
+    def cluster_of(query):
+        mask = classifier.match_mask(query)
+        return (mask & -mask).bit_length() - 1 if mask else None
+    return classifier.labels, cluster_of
+
+
+class ArticleBoosts:
+    def __init__(self, labels=(), cluster_of=None, weight=DEFAULT_WEIGHT, prior_strength=PRIOR_STRENGTH):
+        self.labels = list(labels)
+        self.n_clusters = n_clusters = len(self.labels)
+        self.cluster_of = cluster_of
+        self.weight = weight
+        self.prior_strength = prior_strength
+        self.row_of = {}
+        # Row 0 is across all queries, row c + 1 is query cluster c
+        self.signal = np.zeros((n_clusters + 1, 0))
+        self.count = np.zeros((n_clusters + 1, 0))
+        self.boosts = np.ones((n_clusters + 1, 0), dtype=np.float32)
+        self.feedback_count = 0
+        self._lock = threading.Lock()
+
+    def set_articles(self, article_ids):
+        """Align columns with the KB's current rows, keeping feedback for articles still present"""
+        with self._lock:
+            shape = (self.n_clusters + 1, len(article_ids))
+            signal, count = np.zeros(shape), np.zeros(shape)
+            for row, article_id in enumerate(article_ids):
+                old = self.row_of.get(article_id)
+                if old is not None:
+                    signal[:, row] = self.signal[:, old]
+                    count[:, row] = self.count[:, old]
+            self.signal, self.count = signal, count
+            self.row_of = {article_id: row for row, article_id in enumerate(article_ids)}
+            # A new matrix, so searches holding the old one keep a consistent view
+            self.boosts = self._boosts(slice(None))
+
+    def _boosts(self, columns):
+        k = self.prior_strength
+        overall = (self.signal[0, columns] + k * 0.5) / (self.count[0, columns] + k)
+        # Cluster priors shrink towards the article's overall prior rather than neutral
+        quality = (self.signal[:, columns] + k * overall) / (self.count[:, columns] + k)
+        quality[0] = overall
+        return (1 + self.weight * (2 * quality - 1)).astype(np.float32)
+
+    def record(self, article_ids, rating, helpful, query=None):
+        """Fold one feedback entry into the priors of the articles it names"""
+        if isinstance(article_ids, str):
+            article_ids = [article_ids]
+        rows = [self.row_of[a] for a in article_ids if a in self.row_of]
+        if not rows:
+            return
+        signal = quality_signal(rating, helpful)
+        cluster = self.cluster_of(query) if query and self.cluster_of else None
+        with self._lock:
+            for row in rows:
+                self.signal[0, row] += signal
+                self.count[0, row] += 1
+                if cluster is not None:
+                    self.signal[cluster + 1, row] += signal
+                    self.count[cluster + 1, row] += 1
+                self.boosts[:, row] = self._boosts(row)
+            self.feedback_count += 1
+
+    def cluster_label(self, query):
+        """Label of the query's cluster, stored with feedback so compaction can fold it per cluster"""
+        cluster = self.cluster_of(query) if query and self.cluster_of else None
+        return None if cluster is None else self.labels[cluster]
+
+    def restore(self, priors, entries):
+        """Rebuild from FeedbackLog.article_feedback(): folded (article, cluster, signal, count) sums plus raw entries"""
+        clusters = {label: cluster + 1 for cluster, label in enumerate(self.labels)}
+        clusters[''] = 0
+        with self._lock:
+            for article_id, cluster, signal, count in priors:
+                row, column = clusters.get(cluster), self.row_of.get(article_id)
+                if row is None or column is None:
+                    continue
+                self.signal[row, column] += signal
+                self.count[row, column] += count
+            self.boosts = self._boosts(slice(None))
+        for entry in entries:
+            try:
+                if entry.get('article_ids'):
+                    self.record(entry['article_ids'], entry['rating'], entry['helpful'], entry.get('query'))
+            except (KeyError, TypeError, ValueError, AttributeError) as e:
+                # Rows stored before submissions were validated must not stop the app from starting
+                logger.warning(f"Skipping malformed feedback entry {entry.get('id')}: {e!r}")
+
+    def vector(self, query=None, n=None):
+        """Boost per KB row for a query; rows beyond the known articles get 1.0"""
+        cluster = self.cluster_of(query) if query and self.cluster_of else None
+        boosts = self.boosts[0 if cluster is None else cluster + 1]
+        if n is not None and len(boosts) != n:
+            boosts = np.concatenate([boosts, np.ones(max(0, n - len(boosts)), dtype=np.float32)])[:n]
+        return boosts
+
+    def to_dict(self):
+        with self._lock:
+            rated = int((self.count[0] > 0).sum())
+            return {
+                'feedback_entries': self.feedback_count,
+                'articles_with_feedback': rated,
+                'boost_range': [float(self.boosts[0].min()), float(self.boosts[0].max())] if rated else [1.0, 1.0],
+                'weight': self.weight
+            }
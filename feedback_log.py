@@ -0,0 +1,270 @@
+"""
+Durable feedback log
+
+Feedback entries are appended to a SQLite database in WAL mode. A single
+writer thread drains the submit queue and commits everything waiting in one
+transaction (group commit), so concurrent submits share one fsync instead of
+paying one each. A background compactor folds each finished day into a
+per-day, per-feature rollup row (counts, rating sum, helpful count and rating
+histogram columns); analytics read the rollups plus the raw rows of days not
+yet compacted. Compaction also folds the entries' ranking feedback into
+per-article, per-query-cluster sums that are never expired, so the article
+priors of feedback_boosts survive the raw rows. Raw rows are kept for a
+retention window after compaction and then deleted, so the log does not grow
+without bound.
+"""
+
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from datetime import date, timedelta
+
+from feedback_analytics import FeatureStats, RATING_BUCKETS, rating_bucket
+from feedback_boosts import feedback_priors
+from profiling import track_allocations
+from tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on entries committed in one transaction
+MAX_BATCH = 1000
+
+HISTOGRAM_COLUMNS = ', '.join(f'r{bucket}' for bucket in range(RATING_BUCKETS))
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS feedback (
+    id TEXT PRIMARY KEY,
+    day TEXT NOT NULL,
+    feature TEXT NOT NULL,
+    rating REAL NOT NULL,
+    bucket INTEGER NOT NULL,
+    helpful INTEGER NOT NULL,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS feedback_day ON feedback (day);
+CREATE TABLE IF NOT EXISTS feedback_rollups (
+    day TEXT NOT NULL,
+    feature TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    rating_sum REAL NOT NULL,
+    helpful INTEGER NOT NULL,
+    {', '.join(f'r{bucket} INTEGER NOT NULL' for bucket in range(RATING_BUCKETS))},
+    PRIMARY KEY (day, feature)
+);
+CREATE TABLE IF NOT EXISTS feedback_article_rollups (
+    article_id TEXT NOT NULL,
+    cluster TEXT NOT NULL,
+    signal REAL NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (article_id, cluster)
+);
+CREATE TABLE IF NOT EXISTS feedback_meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# Per-feature sums over raw rows, in rollup column order
+RAW_AGGREGATE = (
+    "COUNT(*), SUM(rating), SUM(helpful), "
+    + ', '.join(f'SUM(bucket = {bucket})' for bucket in range(RATING_BUCKETS))
+)
+
+
+class FeedbackLog:
+    def __init__(self, path, raw_retention_days=30, compact_interval=3600):
+        self.path = path
+        self.raw_retention_days = raw_retention_days
+        self._queue = queue.Queue()
+        self._db_lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # FULL: every commit is fsynced; batching keeps that to one fsync per group
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.executescript(SCHEMA)
+        self.stats = {'appended': 0, 'batches': 0, 'largest_batch': 0, 'write_errors': 0, 'compactions': 0}
+
+        self._writer = threading.Thread(target=self._write_loop, name='feedback-log-writer', daemon=True)
+        self._writer.start()
+        if compact_interval:
+            threading.Thread(
+                target=self._compact_loop, args=(compact_interval,), name='feedback-log-compactor', daemon=True
+            ).start()
+
+    @traced('feedback_log.append')
+    def append(self, entry, wait=True):
+        """Queue an entry for the next group commit; with wait, block until it is on disk"""
+        future = Future()
+        self._queue.put((entry, future))
+        if wait:
+            future.result()
+        return future
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            # A malformed entry fails only its own submit; the writer must keep running
+            rows, written = [], []
+            for entry, future in batch:
+                try:
+                    rows.append((entry['id'], entry['created_at'][:10], entry['feature'], float(entry['rating']),
+                                 rating_bucket(entry['rating']), 1 if entry['helpful'] else 0, json.dumps(entry)))
+                    written.append(future)
+                except Exception as e:
+                    logger.error(f"Rejected malformed feedback entry: {e}")
+                    self.stats['write_errors'] += 1
+                    future.set_exception(e)
+            if not rows:
+                continue
+            try:
+                with self._db_lock:
+                    self._db.executemany("INSERT OR IGNORE INTO feedback VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                    self._db.commit()
+            except Exception as e:
+                logger.error(f"Feedback log write of {len(rows)} entries failed: {e}")
+                self.stats['write_errors'] += 1
+                for future in written:
+                    future.set_exception(e)
+                continue
+
+            self.stats['appended'] += len(rows)
+            self.stats['batches'] += 1
+            self.stats['largest_batch'] = max(self.stats['largest_batch'], len(rows))
+            for future in written:
+                future.set_result(True)
+
+    def _compacted_through(self, db, key='compacted_through'):
+        row = db.execute("SELECT value FROM feedback_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else ''
+
+    def _fold_article_priors(self, through, until):
+        """Add the ranking feedback of raw rows with through < day <= until to the article rollups"""
+        sums = {}
+        for entry_id, entry in self._db.execute(
+                "SELECT id, entry FROM feedback WHERE day > ? AND day <= ?", (through, until)):
+            try:
+                priors = feedback_priors(json.loads(entry))
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Skipping malformed feedback entry {entry_id} in article rollups: {e!r}")
+                continue
+            for article_id, cluster, signal in priors:
+                total = sums.setdefault((article_id, cluster), [0.0, 0])
+                total[0] += signal
+                total[1] += 1
+        self._db.executemany(
+            "INSERT INTO feedback_article_rollups VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (article_id, cluster) DO UPDATE SET "
+            "signal = signal + excluded.signal, count = count + excluded.count",
+            [(article_id, cluster, signal, count) for (article_id, cluster), (signal, count) in sums.items()]
+        )
+        self._db.execute(
+            "INSERT OR REPLACE INTO feedback_meta VALUES ('articles_compacted_through', ?)", (until,)
+        )
+
+    def compact(self, today=None):
+        """Roll up every finished day not yet compacted and expire old raw rows"""
+        today = today or date.today()
+        yesterday = (today - timedelta(days=1)).isoformat()
+        expire_before = (today - timedelta(days=self.raw_retention_days)).isoformat()
+
+        with self._db_lock:
+            through = self._compacted_through(self._db)
+            if through < yesterday:
+                self._db.execute(
+                    f"INSERT OR REPLACE INTO feedback_rollups "
+                    f"SELECT day, feature, {RAW_AGGREGATE} FROM feedback "
+                    f"WHERE day > ? AND day <= ? GROUP BY day, feature",
+                    (through, yesterday)
+                )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO feedback_meta VALUES ('compacted_through', ?)", (yesterday,)
+                )
+                through = yesterday
+            # Tracked separately: days compacted before the article rollups existed are folded in late
+            articles_through = self._compacted_through(self._db, 'articles_compacted_through')
+            if articles_through < through:
+                self._fold_article_priors(articles_through, through)
+            self._db.execute("DELETE FROM feedback WHERE day < ? AND day <= ?", (expire_before, through))
+            self._db.commit()
+        self.stats['compactions'] += 1
+
+    def _compact_loop(self, interval):
+        while True:
+            try:
+                self.compact()
+            except Exception as e:
+                logger.error(f"Feedback log compaction failed: {e}")
+            time.sleep(interval)
+
+    @track_allocations('feedback_log.feature_stats')
+    def feature_stats(self):
+        """Per-feature FeatureStats from the rollups plus the uncompacted tail"""
+        # A separate connection: WAL readers don't wait for the writer
+        db = sqlite3.connect(self.path, isolation_level=None)
+        try:
+            # One read transaction, so a compaction committing in between can't count a day twice
+            db.execute("BEGIN")
+            through = self._compacted_through(db)
+            rows = db.execute(
+                f"SELECT feature, SUM(count), SUM(rating_sum), SUM(helpful), "
+                f"{', '.join(f'SUM(r{bucket})' for bucket in range(RATING_BUCKETS))} FROM ("
+                f"  SELECT feature, count, rating_sum, helpful, {HISTOGRAM_COLUMNS} FROM feedback_rollups"
+                f"  UNION ALL"
+                f"  SELECT feature, {RAW_AGGREGATE} FROM feedback WHERE day > ? GROUP BY feature"
+                f") GROUP BY feature",
+                (through,)
+            ).fetchall()
+            db.execute("COMMIT")
+        finally:
+            db.close()
+
+        features = {}
+        for feature, count, rating_sum, helpful, *histogram in rows:
+            stats = FeatureStats()
+            stats.count = count
+            stats.rating_sum = rating_sum
+            stats.helpful = helpful
+            stats.histogram = list(histogram)
+            features[feature] = stats
+        return features
+
+    def article_feedback(self):
+        """(article rollup rows, raw entries not yet folded into them), from one snapshot"""
+        db = sqlite3.connect(self.path, isolation_level=None)
+        try:
+            # One read transaction, so a compaction committing in between can't count a day twice
+            db.execute("BEGIN")
+            priors = db.execute("SELECT article_id, cluster, signal, count FROM feedback_article_rollups").fetchall()
+            through = self._compacted_through(db, 'articles_compacted_through')
+            entries = [
+                json.loads(entry)
+                for (entry,) in db.execute("SELECT entry FROM feedback WHERE day > ? ORDER BY day", (through,))
+            ]
+            db.execute("COMMIT")
+        finally:
+            db.close()
+        return priors, entries
+
+    def entries_since(self, day):
+        """Yield raw entries created on or after day (YYYY-MM-DD), oldest first"""
+        db = sqlite3.connect(self.path)
+        try:
+            for (entry,) in db.execute("SELECT entry FROM feedback WHERE day >= ? ORDER BY day", (day,)):
+                yield json.loads(entry)
+        finally:
+            db.close()
+
+    def to_dict(self):
+        return {
+            'path': self.path,
+            'queued': self._queue.qsize(),
+            'raw_retention_days': self.raw_retention_days,
+            **self.stats
+        }
@@ -0,0 +1,128 @@
+"""
+Time-bucketed feedback trends
+
+Per feature, feedback is added to fixed-size ring buffers at minute, hour and
+day resolution. A slot holds the counters for one time bucket (count, rating
+sum, helpful count and response-time sum) and is reset when the ring wraps
+round to it again, so memory stays constant and reading a window touches only
+the buckets it covers.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+# name -> (bucket width in seconds, buckets kept)
+RESOLUTIONS = {
+    'minute': (60, 24 * 60),
+    'hour': (3600, 30 * 24),
+    'day': (86400, 365),
+}
+
+COUNT, RATING_SUM, HELPFUL, RESPONSE_TIME_SUM, RESPONSE_TIME_COUNT = range(5)
+
+ALL_FEATURES = '*'
+# Further distinct feature names share one series, so arbitrary input can't grow memory
+MAX_FEATURES = 64
+OTHER_FEATURE = 'other'
+
+
+class RingSeries:
+    def __init__(self, width, size):
+        self.width = width
+        self.size = size
+        self.epochs = np.full(size, -1, dtype=np.int64)
+        self.values = np.zeros((size, 5), dtype=np.float64)
+
+    def add(self, timestamp, values):
+        epoch = int(timestamp // self.width)
+        slot = epoch % self.size
+        if self.epochs[slot] != epoch:
+            if epoch < self.epochs[slot]:
+                # Older than anything this ring still holds
+                return
+            self.epochs[slot] = epoch
+            self.values[slot] = 0
+        self.values[slot] += values
+
+    def window(self, now, buckets):
+        """Counters for the last `buckets` buckets up to now, oldest first"""
+        end = int(now // self.width)
+        epochs = np.arange(end - buckets + 1, end + 1)
+        slots = epochs % self.size
+        values = np.where((self.epochs[slots] == epochs)[:, None], self.values[slots], 0)
+        return epochs, values
+
+
+def summarize(values):
+    count = values[COUNT]
+    return {
+        'count': int(count),
+        'average_rating': round(values[RATING_SUM] / count, 2) if count else None,
+        'helpful_percentage': round(values[HELPFUL] / count * 100, 1) if count else None,
+        'average_response_time': round(values[RESPONSE_TIME_SUM] / values[RESPONSE_TIME_COUNT], 1)
+        if values[RESPONSE_TIME_COUNT] else None
+    }
+
+
+class FeedbackTrends:
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _series_for(self, feature):
+        series = self._series.get(feature)
+        if series is None:
+            if len(self._series) >= MAX_FEATURES + 1 and feature != OTHER_FEATURE:
+                return self._series_for(OTHER_FEATURE)
+            series = self._series[feature] = {
+                name: RingSeries(width, size) for name, (width, size) in RESOLUTIONS.items()
+            }
+        return series
+
+    def record(self, feedback):
+        timestamp = datetime.fromisoformat(feedback['created_at']).timestamp()
+        response_time = (feedback.get('system_metrics') or {}).get('response_time') or 0
+        values = np.array([
+            1,
+            feedback['rating'],
+            1 if feedback['helpful'] else 0,
+            response_time,
+            1 if response_time else 0
+        ], dtype=np.float64)
+        with self._lock:
+            for feature in (ALL_FEATURES, feedback['feature']):
+                for series in self._series_for(feature).values():
+                    series.add(timestamp, values)
+
+    def features(self):
+        return sorted(f for f in self._series if f != ALL_FEATURES)
+
+    def window(self, resolution, buckets, feature=None, now=None):
+        """Per-bucket and overall stats for the last `buckets` buckets of a resolution"""
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"resolution must be one of {', '.join(RESOLUTIONS)}")
+        width, size = RESOLUTIONS[resolution]
+        if not 1 <= buckets <= size:
+            raise ValueError(f"buckets must be between 1 and {size} for {resolution} resolution")
+
+        now = now or time.time()
+        with self._lock:
+            series = self._series.get(feature or ALL_FEATURES)
+            if series is None:
+                end = int(now // width)
+                epochs, values = np.arange(end - buckets + 1, end + 1), np.zeros((buckets, 5))
+            else:
+                epochs, values = series[resolution].window(now, buckets)
+
+        return {
+            'resolution': resolution,
+            'feature': feature or 'all',
+            'buckets': [
+                dict(start=datetime.fromtimestamp(epoch * width).isoformat(), **summarize(row))
+                for epoch, row in zip(epochs.tolist(), values)
+            ],
+            'window': summarize(values.sum(axis=0))
+        }
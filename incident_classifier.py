@@ -0,0 +1,163 @@
+"""
+Rule-based incident classifier
+
+All category keywords from the rule file are compiled into one regular
+expression, an alternation factored as a character trie so the engine tests
+each token start against every keyword in a single scan. Whole-word keywords
+must end at a word boundary, prefix keywords ("print*") only have to match their
+stem, and the words of a phrase ("blue screen") may be separated by any run of
+non-alphanumerics. Each string the pattern can return maps to the bitmask of
+every category it satisfies, so one findall over the lowercased text yields all
+matched categories and the resulting priority.
+"""
+
+import json
+import operator
+import os
+import re
+from functools import reduce
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+SEPARATOR = '[^a-z0-9]+'
+SEPARATOR_PATTERN = re.compile(SEPARATOR)
+
+MAX_CACHED_RESULTS = 4096
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'incident_rules.json')
+
+
+class MatchMasks(dict):
+    """Matched string -> category bitmask, keyed with single-space separators"""
+
+    def __missing__(self, match):
+        return self[SEPARATOR_PATTERN.sub(' ', match)]
+
+
+class IncidentClassifier:
+    def __init__(self, rules):
+        self.labels = [category['label'] for category in rules['categories']]
+        self.priority_order = rules.get('priority_order', ['Critical', 'High', 'Medium', 'Low'])
+        self.default_priority = rules.get('default_priority', 'Medium')
+        self.default_label = rules.get('default_label', 'General IT Issue')
+        # Rank of each category's priority, lower is more urgent
+        self.category_rank = [
+            self.priority_order.index(category.get('priority', self.default_priority))
+            for category in rules['categories']
+        ]
+
+        # (keyword with words joined by single spaces, is prefix) -> bitmask
+        keywords = {}
+        for position, category in enumerate(rules['categories']):
+            for keyword in category['keywords']:
+                text = ' '.join(TOKEN_PATTERN.findall(keyword.rstrip('*').lower()))
+                if text:
+                    key = (text, keyword.endswith('*'))
+                    keywords[key] = keywords.get(key, 0) | 1 << position
+
+        self.pattern, self.masks = self._compile(keywords)
+        # Whole words that are also prefix stems end by consuming a separator,
+        # so the text needs one after its last word
+        self.terminator = ' ' if any(match.endswith(' ') for match in self.masks) else ''
+        # Matched-category bitmask -> classify() result; tickets fall into few
+        # distinct combinations, so this stays small in practice
+        self.results = {}
+
+    @classmethod
+    def from_file(cls, path=None):
+        with open(path or os.getenv('INCIDENT_RULES_PATH', DEFAULT_RULES_PATH), 'r') as f:
+            return cls(json.load(f))
+
+    @staticmethod
+    def _compile(keywords):
+        """Build the trie-shaped pattern and the mask of every string it returns"""
+        trie = {}
+        for text, is_prefix in keywords:
+            node = trie
+            for char in text:
+                node = node.setdefault(char, {})
+            node.setdefault('', set()).add(is_prefix)
+
+        # Matched string -> (keyword text it stands for, whether its last
+        # word may continue past the match)
+        returned = {}
+
+        def emit(node, path):
+            branches = []
+            for char in sorted(c for c in node if c):
+                head = SEPARATOR if char == ' ' else re.escape(char)
+                branches.append(head + emit(node[char], path + char))
+            ends = node.get('', ())
+            if ends == {False, True}:
+                # A stem that is also a whole word: the whole-word case consumes
+                # the separator after it so the two return different strings
+                branches.append('[^a-z0-9]')
+                returned[path + ' '] = (path, False)
+                branches.append('')
+                returned[path] = (path, True)
+            elif ends:
+                is_prefix = True in ends
+                branches.append('' if is_prefix else '(?![a-z0-9])')
+                returned[path] = (path, is_prefix)
+            if len(branches) == 1:
+                return branches[0]
+            return '(?:' + '|'.join(branches) + ')'
+
+        body = emit(trie, '')
+
+        def satisfied(text, partial, keyword, is_prefix):
+            if is_prefix:
+                return text.startswith(keyword)
+            return text.startswith(keyword + ' ') or (text == keyword and not partial)
+
+        masks = MatchMasks()
+        overlapping = False
+        for match, (text, partial) in returned.items():
+            mask = 0
+            words = text.split(' ')
+            # Keywords starting on any word of the match, since findall
+            # resumes scanning after the whole match
+            for start in range(len(words)):
+                suffix = ' '.join(words[start:])
+                for (keyword, is_prefix), bits in keywords.items():
+                    if satisfied(suffix, partial, keyword, is_prefix):
+                        mask |= bits
+                    elif start and (keyword.startswith(suffix + ' ') or (partial and keyword.startswith(suffix))):
+                        overlapping = True
+            masks[match] = mask
+
+        if overlapping:
+            # Some keyword can begin inside a phrase match and run past its
+            # end, so match zero-width at every word start instead
+            return re.compile('(?<![a-z0-9])(?=(' + body + '))'), masks
+        return re.compile('(?<![a-z0-9])' + body), masks
+
+    def match_mask(self, text):
+        """Bitmask of the categories whose keywords occur in text"""
+        matches = self.pattern.findall(text.lower() + self.terminator)
+        return reduce(operator.or_, map(self.masks.__getitem__, matches), 0)
+
+    def classify(self, text):
+        """Return (matched category labels in rule order, priority)"""
+        found = self.match_mask(text)
+        result = self.results.get(found)
+        if result is None:
+            result = self._describe(found)
+            if len(self.results) < MAX_CACHED_RESULTS:
+                self.results[found] = result
+        labels, priority = result
+        return list(labels), priority
+
+    def _describe(self, found):
+        if not found:
+            return (self.default_label,), self.default_priority
+
+        labels = []
+        rank = len(self.priority_order) - 1
+        position = 0
+        while found:
+            if found & 1:
+                labels.append(self.labels[position])
+                rank = min(rank, self.category_rank[position])
+            found >>= 1
+            position += 1
+        return tuple(labels), self.priority_order[rank]
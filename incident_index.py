@@ -0,0 +1,163 @@
+"""
+Similar-incident retrieval over past tickets
+
+An incremental BM25 inverted index over incident text (description plus any
+resolution notes). Posting lists are compact typed arrays of document ids and
+term frequencies; a query gathers the postings of its terms and scores every
+candidate with one numpy bincount, so the cost follows the number of matching
+postings rather than the number of tickets. Updating an incident tombstones
+its previous document and appends the new one; tombstones are compacted away
+once they outnumber live documents.
+"""
+
+import math
+import threading
+from array import array
+
+import numpy as np
+
+from incident_classifier import TOKEN_PATTERN
+from vector_store import top_indices
+
+# Fields indexed for each incident
+INDEXED_TEXT_FIELDS = ('short_description', 'description', 'category', 'close_notes')
+
+STOPWORDS = frozenset(
+    'a an and are as at be but by for from has have i in is it not of on or so that the '
+    'to was were will with cannot can user users reports'.split()
+)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Compact when dead documents exceed live ones and there are at least this many
+COMPACT_MIN_DEAD = 1024
+
+
+def incident_terms(incident):
+    text = ' '.join(str(incident.get(field) or '') for field in INDEXED_TEXT_FIELDS)
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class IncidentIndex:
+    def __init__(self, incidents=()):
+        self._postings = {}
+        self._frequencies = {}
+        # Per-document arrays grow by doubling; rows below len(_incidents) are in use
+        self._doc_lengths = np.zeros(1024, dtype=np.float32)
+        self._alive = np.zeros(1024, dtype=bool)
+        self._incidents = []
+        self._doc_of = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+        for incident in incidents:
+            self.add(incident)
+
+    def __len__(self):
+        return len(self._doc_of)
+
+    def add(self, incident):
+        """Index an incident, replacing the previous version with the same number"""
+        terms = incident_terms(incident)
+        counts = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+
+        with self._lock:
+            previous = self._doc_of.get(incident['number'])
+            if previous is not None:
+                self._alive[previous] = False
+                self._total_length -= self._doc_lengths[previous]
+
+            doc = len(self._incidents)
+            if doc == len(self._alive):
+                self._grow()
+            self._incidents.append(incident)
+            self._doc_lengths[doc] = len(terms)
+            self._alive[doc] = True
+            self._doc_of[incident['number']] = doc
+            self._total_length += len(terms)
+            for term, count in counts.items():
+                if term not in self._postings:
+                    self._postings[term] = array('i')
+                    self._frequencies[term] = array('f')
+                self._postings[term].append(doc)
+                self._frequencies[term].append(count)
+
+            dead = len(self._incidents) - len(self._doc_of)
+            if dead >= COMPACT_MIN_DEAD and dead > len(self._doc_of):
+                self._compact()
+
+    def _grow(self):
+        # Fresh arrays rather than in-place resize, so searches holding the old ones are unaffected
+        self._doc_lengths = np.concatenate([self._doc_lengths, np.zeros_like(self._doc_lengths)])
+        self._alive = np.concatenate([self._alive, np.zeros_like(self._alive)])
+
+    def _compact(self):
+        """Drop tombstoned documents and renumber the rest; caller holds the lock"""
+        n_docs = len(self._incidents)
+        alive = self._alive[:n_docs].copy()
+        new_ids = np.cumsum(alive) - 1
+
+        for term in list(self._postings):
+            docs = np.array(self._postings[term], dtype=np.int32)
+            keep = alive[docs]
+            if not keep.any():
+                del self._postings[term]
+                del self._frequencies[term]
+                continue
+            self._postings[term] = array('i', new_ids[docs[keep]].astype(np.int32).tobytes())
+            self._frequencies[term] = array('f', np.array(self._frequencies[term], dtype=np.float32)[keep].tobytes())
+
+        self._incidents = [incident for incident, live in zip(self._incidents, alive) if live]
+        doc_lengths = self._doc_lengths[:n_docs][alive]
+        self._doc_lengths = np.zeros(max(1024, len(self._alive)), dtype=np.float32)
+        self._doc_lengths[:len(doc_lengths)] = doc_lengths
+        self._alive = np.zeros(len(self._doc_lengths), dtype=bool)
+        self._alive[:len(doc_lengths)] = True
+        self._doc_of = {incident['number']: doc for doc, incident in enumerate(self._incidents)}
+
+    def search(self, text, top_k=3, exclude=None):
+        """Return [(incident, score)] for the past incidents most similar to text"""
+        terms = set(TOKEN_PATTERN.findall(text.lower())) - STOPWORDS
+
+        # Copy the matching postings under the lock; scoring happens outside it
+        with self._lock:
+            n_docs = len(self._incidents)
+            live = len(self._doc_of)
+            if not live:
+                return []
+            average_length = self._total_length / live
+            matched = [
+                (np.array(self._postings[t], dtype=np.int32), np.array(self._frequencies[t], dtype=np.float32))
+                for t in terms if t in self._postings
+            ]
+            if not matched:
+                return []
+            # Views: rows below n_docs are never rewritten except to tombstone them
+            doc_lengths = self._doc_lengths[:n_docs]
+            alive = self._alive[:n_docs]
+            incidents = self._incidents
+            excluded = self._doc_of.get(exclude)
+
+        ids = []
+        weights = []
+        for docs, tf in matched:
+            idf = math.log(1 + (live - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths[docs] / average_length)
+            ids.append(docs)
+            weights.append(idf * tf * (BM25_K1 + 1) / (tf + norm))
+        scores = np.bincount(np.concatenate(ids), weights=np.concatenate(weights), minlength=n_docs)
+        scores[~alive] = 0
+        if excluded is not None:
+            scores[excluded] = 0
+
+        best = top_indices(scores, top_k)
+        return [(incidents[i], float(scores[i])) for i in best if scores[i] > 0]
+
+    def to_dict(self):
+        return {
+            'incidents': len(self._doc_of),
+            'documents': len(self._incidents),
+            'terms': len(self._postings)
+        }
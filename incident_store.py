@@ -0,0 +1,136 @@
+"""
+Indexed in-memory incident store for the ServiceNow simulation
+
+Incidents are kept in arrival order with a hash index by number and sorted
+posting lists of arrival positions per state, priority, category and
+assignee. Filtered listings start from the smallest matching posting list and
+page through it with a position cursor, so neither lookups nor pages scan the
+whole store.
+"""
+
+import threading
+from bisect import bisect_left, insort
+
+INDEXED_FIELDS = ('state', 'priority', 'category', 'assigned_to')
+
+
+def index_key(value):
+    return str(value).strip().lower()
+
+
+class IncidentStore:
+    def __init__(self, incidents=()):
+        self._incidents = []
+        self._positions = {}
+        self._indexes = {field: {} for field in INDEXED_FIELDS}
+        self._listeners = []
+        self._lock = threading.RLock()
+        for incident in incidents:
+            self.upsert(incident)
+
+    def __len__(self):
+        return len(self._incidents)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._incidents))
+
+    def subscribe(self, listener):
+        """Call listener(incident) after every insert or replacement"""
+        self._listeners.append(listener)
+
+    def get(self, number):
+        position = self._positions.get(number)
+        return self._incidents[position] if position is not None else None
+
+    def upsert(self, incident):
+        """Insert or replace an incident by number; returns True if it was new"""
+        is_new = self._upsert(incident)
+        for listener in self._listeners:
+            listener(incident)
+        return is_new
+
+    def _upsert(self, incident):
+        with self._lock:
+            position = self._positions.get(incident['number'])
+            if position is None:
+                position = len(self._incidents)
+                self._incidents.append(incident)
+                self._positions[incident['number']] = position
+                for field in INDEXED_FIELDS:
+                    # New positions are the largest yet, so appending keeps lists sorted
+                    self._indexes[field].setdefault(index_key(incident.get(field, '')), []).append(position)
+                return True
+
+            previous = self._incidents[position]
+            self._incidents[position] = incident
+            for field in INDEXED_FIELDS:
+                old_key = index_key(previous.get(field, ''))
+                new_key = index_key(incident.get(field, ''))
+                if old_key != new_key:
+                    self._remove_posting(field, old_key, position)
+                    insort(self._indexes[field].setdefault(new_key, []), position)
+            return False
+
+    def update(self, number, **changes):
+        """Apply field changes to a stored incident, returning the new record"""
+        with self._lock:
+            incident = self.get(number)
+            if incident is None:
+                return None
+            updated = dict(incident, **changes)
+            self.upsert(updated)
+            return updated
+
+    def _remove_posting(self, field, key, position):
+        postings = self._indexes[field].get(key)
+        if not postings:
+            return
+        i = bisect_left(postings, position)
+        if i < len(postings) and postings[i] == position:
+            del postings[i]
+        if not postings:
+            del self._indexes[field][key]
+
+    def count(self, filters=None):
+        """Number of incidents matching filters; O(1) for zero or one filter,
+        otherwise a set intersection of the posting lists"""
+        filters = {f: index_key(v) for f, v in (filters or {}).items() if v}
+        if not filters:
+            return len(self._incidents)
+        with self._lock:
+            postings = sorted((self._indexes[field].get(value, []) for field, value in filters.items()), key=len)
+            if len(postings) == 1:
+                return len(postings[0])
+            return len(set(postings[0]).intersection(*postings[1:]))
+
+    def query(self, filters=None, after=0, limit=100):
+        """Return (incidents, next position or None) matching all filters.
+
+        filters maps indexed fields to values (case-insensitive); after is the
+        arrival position to resume from, as returned by the previous page.
+        """
+        filters = {f: index_key(v) for f, v in (filters or {}).items() if v}
+        for field in filters:
+            if field not in INDEXED_FIELDS:
+                raise ValueError(f"Cannot filter incidents by '{field}'")
+
+        with self._lock:
+            if not filters:
+                page = self._incidents[after:after + limit]
+                end = after + len(page)
+                return list(page), end if end < len(self._incidents) else None
+
+            # Walk the shortest posting list and check the other filters per incident
+            postings = min(
+                (self._indexes[field].get(value, []) for field, value in filters.items()),
+                key=len
+            )
+            page = []
+            i = bisect_left(postings, after)
+            while i < len(postings) and len(page) < limit:
+                incident = self._incidents[postings[i]]
+                if all(index_key(incident.get(field, '')) == value for field, value in filters.items()):
+                    page.append(incident)
+                i += 1
+            return page, postings[i] if i < len(postings) else None
@@ -0,0 +1,108 @@
+"""
+Facet pre-filtering for knowledge base search
+
+Posting lists of KB row numbers are precomputed per category and per tag, and
+creation dates are kept in sorted order, so a filtered query resolves to the
+matching rows before any scoring happens.
+"""
+
+from datetime import datetime, time
+import numpy as np
+
+
+def parse_filters(data):
+    """Pull search filters out of a request body, raising ValueError on bad input"""
+    filters = {}
+    category = data.get('category')
+    if category and category != 'all':
+        filters['category'] = category
+    tags = data.get('tags')
+    if tags:
+        filters['tags'] = [tags] if isinstance(tags, str) else list(tags)
+    if data.get('date_from'):
+        filters['date_from'] = parse_date(data['date_from'])
+    if data.get('date_to'):
+        filters['date_to'] = parse_date(data['date_to'])
+        if len(str(data['date_to'])) == 10:
+            # A bare date includes the whole day
+            filters['date_to'] = datetime.combine(filters['date_to'].date(), time.max)
+    return filters
+
+
+def describe_filters(filters):
+    """JSON-friendly copy of parsed filters for echoing back in responses"""
+    return {key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in filters.items()}
+
+
+def parse_date(value):
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f"Invalid date '{value}', expected ISO format (YYYY-MM-DD)")
+
+
+class FacetIndex:
+    """Category, tag and date posting lists over a list of KB articles"""
+
+    def __init__(self, articles):
+        self.size = len(articles)
+        categories = {}
+        tags = {}
+        dated_rows = []
+        dates = []
+
+        for row, article in enumerate(articles):
+            categories.setdefault(article.get('category', '').lower(), []).append(row)
+            for tag in article.get('tags', []):
+                tags.setdefault(tag.lower(), []).append(row)
+            if article.get('created_at'):
+                dated_rows.append(row)
+                dates.append(parse_date(article['created_at']).timestamp())
+
+        self.categories = {key: np.array(rows, dtype=np.int64) for key, rows in categories.items()}
+        self.tags = {key: np.array(rows, dtype=np.int64) for key, rows in tags.items()}
+        order = np.argsort(dates, kind='stable')
+        self.date_values = np.array(dates, dtype=np.float64)[order]
+        self.date_rows = np.array(dated_rows, dtype=np.int64)[order]
+
+    def select(self, category=None, tags=None, date_from=None, date_to=None):
+        """Sorted row numbers matching every given facet, or None when unfiltered.
+
+        Several categories or tags match any of them; different facets must
+        all match. Articles without created_at never match a date range.
+        """
+        selected = None
+
+        if category:
+            values = [category] if isinstance(category, str) else category
+            selected = self._union(self.categories, values)
+        if tags:
+            selected = self._intersect(selected, self._union(self.tags, tags))
+        if date_from or date_to:
+            lo = 0
+            hi = len(self.date_values)
+            if date_from:
+                lo = np.searchsorted(self.date_values, parse_date(date_from).timestamp(), side='left')
+            if date_to:
+                hi = np.searchsorted(self.date_values, parse_date(date_to).timestamp(), side='right')
+            selected = self._intersect(selected, np.sort(self.date_rows[lo:hi]))
+
+        return selected
+
+    @staticmethod
+    def _union(postings, values):
+        lists = [postings[v.lower()] for v in values if v.lower() in postings]
+        if not lists:
+            return np.array([], dtype=np.int64)
+        if len(lists) == 1:
+            return lists[0]
+        return np.unique(np.concatenate(lists))
+
+    @staticmethod
+    def _intersect(selected, rows):
+        if selected is None:
+            return rows
+        return np.intersect1d(selected, rows, assume_unique=True)
@@ -0,0 +1,165 @@
+"""
+Local stand-in for the OpenAI chat and embeddings APIs
+
+Serves /v1/chat/completions and /v1/embeddings with deterministic,
+content-derived replies so the offline quiz generation job (and the LLM
+reranker) can be run without an API key. Quiz requests get a mix of question
+types per article, including a near-duplicate and a malformed question to
+exercise validation and deduplication; embeddings are hashed bag-of-words
+vectors, so reworded text lands close together. --latency-ms and --fail-rate
+simulate a slow or flaky upstream.
+
+Usage:
+    python llm_stub.py --port 5003
+    python quiz_generation.py --kb knowledge_base.json --base-url http://localhost:5003/v1
+    RERANK_MODE=llm RERANK_LLM_BASE_URL=http://localhost:5003/v1 python bot.py
+"""
+
+import argparse
+import base64
+import json
+import random
+import re
+import time
+import uuid
+import zlib
+
+import numpy as np
+from flask import Flask, request, jsonify
+
+app = Flask(__name__)
+
+EMBEDDING_DIM = 256
+TOKEN_PATTERN = re.compile(r'\w+')
+ARTICLE_PATTERN = re.compile(
+    r'article_id: (?P<id>[^\n]+)\ntitle: (?P<title>[^\n]+)\ncategory: (?P<category>[^\n]+)\n'
+    r'content: (?P<content>.*?)(?=\n\narticle_id: |\Z)',
+    re.S
+)
+STEP_PATTERN = re.compile(r'\d+[.)]\s+(.+?)(?=\s+\d+[.)]\s|\.\s|\.?$)', re.M)
+CATEGORIES = ['Windows', 'Mac', 'Network', 'Hardware', 'Email', 'Performance']
+
+config = {'latency_ms': 0.0, 'fail_rate': 0.0}
+_rng = random.Random(7)
+
+
+def embed(text):
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        vector[zlib.crc32(token.encode()) % EMBEDDING_DIM] += 1
+    return vector / max(np.linalg.norm(vector), 1e-12)
+
+
+def quiz_questions(article):
+    title, category, content = article['title'].strip(), article['category'].strip(), article['content']
+    others = [c for c in CATEGORIES if c != category][:3]
+    # Numbered steps, either one per line or inline as "1) ... 2) ..."
+    steps = [s.strip() for s in STEP_PATTERN.findall(content)]
+    words = sorted(set(w for w in TOKEN_PATTERN.findall(content) if len(w) > 6), key=lambda w: (-len(w), w))
+    questions = [
+        {'type': 'multiple_choice', 'difficulty': 'easy', 'question': f"Which category does \"{title}\" belong to?",
+         'options': [category] + others, 'correct_answer': 0, 'explanation': f"{article['id']} is filed under {category}."},
+        # Reworded copy of the first question, for deduplication to drop
+        {'type': 'multiple_choice', 'difficulty': 'easy', 'question': f"Which category does \"{title}\" belong to",
+         'options': [category] + others, 'correct_answer': 0},
+        # Answer index out of range, for validation to drop
+        {'type': 'multiple_choice', 'difficulty': 'medium', 'question': f"What fixes {title}?",
+         'options': ['A', 'B'], 'correct_answer': 5},
+    ]
+    for i, step in enumerate(steps[:3]):
+        questions.append({
+            'type': 'true_false', 'difficulty': 'easy' if i == 0 else 'medium',
+            'question': f"\"{step}\" is one of the steps in {title}.", 'correct_answer': True,
+            'explanation': f"Step {i + 1} of {article['id']}."
+        })
+    if words:
+        word = words[0]
+        sentence = next((s for s in re.split(r'(?<=[.!?])\s+|\n', content) if word in s), word)
+        questions.append({
+            'type': 'fill_blank', 'difficulty': 'hard', 'question': sentence.replace(word, '______', 1).strip(),
+            'correct_answer': word, 'explanation': f"From {article['id']}: {sentence.strip()}"
+        })
+    for question in questions:
+        question['article_id'] = article['id'].strip()
+    return questions
+
+
+def rerank_scores(prompt):
+    candidates = re.findall(r'^\[(\d+)\] (.*)$', prompt, re.M)
+    query_terms = set(TOKEN_PATTERN.findall(prompt.split('\n', 1)[0].lower()))
+    return [
+        min(10, 2 * len(query_terms & set(TOKEN_PATTERN.findall(text.lower()))))
+        for _, text in candidates
+    ]
+
+
+def simulate_upstream():
+    if config['latency_ms']:
+        time.sleep(config['latency_ms'] / 1000)
+    if config['fail_rate'] and _rng.random() < config['fail_rate']:
+        return jsonify({'error': {'message': 'Simulated upstream failure', 'type': 'server_error'}}), 503
+    return None
+
+
+@app.route('/v1/chat/completions', methods=['POST'])
+def chat_completions():
+    failure = simulate_upstream()
+    if failure:
+        return failure
+    data = request.get_json() or {}
+    messages = data.get('messages', [])
+    system = next((m['content'] for m in messages if m['role'] == 'system'), '')
+    prompt = messages[-1]['content'] if messages else ''
+
+    if 'quiz questions' in system:
+        articles = [m.groupdict() for m in ARTICLE_PATTERN.finditer(prompt)]
+        content = json.dumps({'questions': [q for article in articles for q in quiz_questions(article)]})
+    elif 'relevance scores' in system:
+        content = json.dumps(rerank_scores(prompt))
+    else:
+        content = 'This is a stub completion.'
+
+    return jsonify({
+        'id': f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': data.get('model', 'stub'),
+        'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+        'usage': {'prompt_tokens': len(prompt) // 4, 'completion_tokens': len(content) // 4,
+                  'total_tokens': (len(prompt) + len(content)) // 4}
+    })
+
+
+@app.route('/v1/embeddings', methods=['POST'])
+def embeddings():
+    failure = simulate_upstream()
+    if failure:
+        return failure
+    data = request.get_json() or {}
+    texts = data.get('input', [])
+    if isinstance(texts, str):
+        texts = [texts]
+    items = []
+    for i, text in enumerate(texts):
+        vector = embed(text)
+        # The OpenAI client asks for base64 by default
+        value = base64.b64encode(vector.tobytes()).decode() if data.get('encoding_format') == 'base64' else vector.tolist()
+        items.append({'object': 'embedding', 'index': i, 'embedding': value})
+    tokens = sum(len(text) for text in texts) // 4
+    return jsonify({
+        'object': 'list',
+        'data': items,
+        'model': data.get('model', 'stub'),
+        'usage': {'prompt_tokens': tokens, 'total_tokens': tokens}
+    })
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=5003)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    config.update(latency_ms=args.latency_ms, fail_rate=args.fail_rate)
+    app.run(host='0.0.0.0', port=args.port, threaded=True)
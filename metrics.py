@@ -0,0 +1,210 @@
+"""
+Latency histograms and Prometheus metrics
+
+A small in-process registry rendered in the Prometheus text exposition
+format at /metrics. Histograms have fixed bucket bounds, so an observation is
+a bisect and an increment under a per-histogram lock, well under a
+microsecond; counts that components already keep (cache hits, queue depths)
+are read through callbacks when /metrics is scraped and cost nothing on the
+request path.
+
+instrument_app() times every request by route template. Stage timings
+(embedding, vector scoring, LLM calls, ...) are recorded with stage() or
+record_stage(); a request that asks for them with ?timings=1 or an
+X-Timings: 1 header also gets them back as a Server-Timing header and, for
+JSON object responses, a 'timings' object.
+"""
+
+import bisect
+import json
+import threading
+import time
+
+from flask import Response, g, has_request_context, request
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; request latency spans cached listings to LLM round trips
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.bounds = tuple(buckets)
+        # label values -> [bucket counts..., +Inf count, sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.bounds) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def collect(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        names = self.labelnames + ('le',)
+        for labels, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.bounds + (float('inf'),), series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{format_labels(names, labels + (format_value(bound),))} {cumulative}')
+            label_text = format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_text} {format_value(series[-1])}')
+            lines.append(f'{self.name}_count{label_text} {cumulative}')
+        return lines
+
+
+class CallbackMetric:
+    """Counter or gauge whose samples are read from a callback at scrape time.
+
+    The callback returns {label values tuple: value}.
+    """
+
+    def __init__(self, name, documentation, kind, labelnames, callback):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def collect(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for labels, value in sorted(self.callback().items()):
+            lines.append(f'{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_callback(self, name, documentation, labelnames, callback):
+        return self.register(CallbackMetric(name, documentation, 'gauge', labelnames, callback))
+
+    def counter_callback(self, name, documentation, labelnames, callback):
+        return self.register(CallbackMetric(name, documentation, 'counter', labelnames, callback))
+
+    def render(self):
+        lines = []
+        for metric in list(self._metrics.values()):
+            try:
+                lines.extend(metric.collect())
+            except Exception as e:
+                # One broken callback shouldn't take the whole scrape down
+                lines.append(f'# {metric.name} unavailable: {e}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    'it_support_request_duration_seconds', 'HTTP request latency by route template',
+    ('method', 'route', 'status')
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    'it_support_stage_duration_seconds', 'Latency of processing stages such as embedding, scoring and LLM calls',
+    ('stage',)
+)
+
+
+def record_stage(name, seconds):
+    """Observe a stage duration and add it to the current request's timings if they were asked for"""
+    STAGE_SECONDS.observe(seconds, name)
+    if has_request_context():
+        timings = g.get('stage_timings')
+        if timings is not None:
+            timings[f'{name}_ms'] = round(timings.get(f'{name}_ms', 0.0) + seconds * 1000, 3)
+
+
+class stage:
+    """Context manager timing a block as a named stage"""
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record_stage(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def wants_timings():
+    return request.args.get('timings') == '1' or request.headers.get('X-Timings') == '1'
+
+
+def _start_request():
+    g.request_started = time.perf_counter()
+    g.stage_timings = {} if wants_timings() else None
+
+
+def _finish_request(response):
+    started = g.get('request_started')
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    REQUEST_SECONDS.observe(elapsed, request.method, route, str(response.status_code))
+
+    timings = g.get('stage_timings')
+    if timings is not None:
+        timings['total_ms'] = round(elapsed * 1000, 3)
+        response.headers['Server-Timing'] = ', '.join(
+            f"{name[:-3]};dur={value}" for name, value in timings.items()
+        )
+        # Opt-in only: re-encoding the body is not free
+        if response.mimetype == 'application/json' and not response.is_streamed \
+                and 'Content-Encoding' not in response.headers:
+            payload = response.get_json(silent=True)
+            if isinstance(payload, dict):
+                existing = payload.get('timings')
+                payload['timings'] = {**timings, **existing} if isinstance(existing, dict) else timings
+                response.set_data(json.dumps(payload, separators=(',', ':')))
+    return response
+
+
+def instrument_app(app):
+    """Time every request of app into REQUEST_SECONDS and honour timing requests"""
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+
+def metrics_response():
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
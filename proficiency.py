@@ -0,0 +1,237 @@
+"""
+Per-engineer quiz proficiency
+
+Each engineer is a row and each quiz category a column of small numpy
+matrices: questions attempted, answered correctly and an exponential moving
+average of correctness that favours recent answers. Recording a submitted
+quiz touches one row, and reading an engineer's profile is a dict lookup plus
+one row slice, so the cost does not depend on how many engineers there are.
+Rows grow by doubling; the whole store is a few dozen bytes per engineer and
+category.
+
+With a path, each recorded quiz is also written to SQLite (WAL mode) as the
+engineer's changed cells, in a transaction that first re-reads the engineer's
+row. Several worker processes can then share one database: each update
+builds on the latest committed one, and reads of an engineer refresh that
+row from disk, so no worker's results overwrite another's and nothing is lost
+on restart.
+
+The profile drives adaptive quizzes: plan() spreads most of a quiz's
+questions over the engineer's categories in proportion to how weak they are
+in each, keeps a small share for categories not yet tried, and picks a
+difficulty per category from its moving average.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Weight of the latest answer in a category's moving average
+DEFAULT_ALPHA = 0.3
+# Share of an adaptive quiz drawn from categories the engineer hasn't been quizzed on
+EXPLORE_SHARE = 0.2
+# Minimum selection weight, so mastered categories still come up now and then
+MIN_WEIGHT = 0.1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS engineers (
+    engineer_id TEXT PRIMARY KEY,
+    quizzes INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS proficiency (
+    engineer_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    ema REAL NOT NULL,
+    PRIMARY KEY (engineer_id, category)
+);
+"""
+
+
+def difficulty_for(mastery):
+    if mastery is None:
+        return 'medium'
+    if mastery < 0.5:
+        return 'easy'
+    if mastery < 0.8:
+        return 'medium'
+    return 'hard'
+
+
+class ProficiencyStore:
+    def __init__(self, alpha=DEFAULT_ALPHA, path=None, capacity=1024):
+        self.alpha = alpha
+        self.path = path
+        self._rows = {}
+        self._columns = {}
+        self.attempts = np.zeros((capacity, 0), dtype=np.int32)
+        self.correct = np.zeros((capacity, 0), dtype=np.int32)
+        self.ema = np.zeros((capacity, 0), dtype=np.float32)
+        self.quizzes = np.zeros(capacity, dtype=np.int32)
+        self.updated_at = np.zeros(capacity, dtype=np.float64)
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            # Autocommit mode, so record() can take the write lock with BEGIN IMMEDIATE
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _row(self, engineer_id):
+        row = self._rows.get(engineer_id)
+        if row is None:
+            row = self._rows[engineer_id] = len(self._rows)
+            if row >= len(self.quizzes):
+                grow = len(self.quizzes)
+                self.attempts = np.pad(self.attempts, ((0, grow), (0, 0)))
+                self.correct = np.pad(self.correct, ((0, grow), (0, 0)))
+                self.ema = np.pad(self.ema, ((0, grow), (0, 0)))
+                self.quizzes = np.pad(self.quizzes, (0, grow))
+                self.updated_at = np.pad(self.updated_at, (0, grow))
+        return row
+
+    def _column(self, category):
+        column = self._columns.get(category)
+        if column is None:
+            column = self._columns[category] = len(self._columns)
+            self.attempts = np.pad(self.attempts, ((0, 0), (0, 1)))
+            self.correct = np.pad(self.correct, ((0, 0), (0, 1)))
+            self.ema = np.pad(self.ema, ((0, 0), (0, 1)))
+        return column
+
+    def _refresh(self, engineer_id):
+        """Replace the engineer's row with the stored one; caller holds the lock"""
+        if self._db is None:
+            return
+        stored = self._db.execute(
+            "SELECT quizzes, updated_at FROM engineers WHERE engineer_id = ?", (engineer_id,)
+        ).fetchone()
+        if stored is None:
+            return
+        row = self._row(engineer_id)
+        self.quizzes[row], self.updated_at[row] = stored
+        for category, attempts, correct, ema in self._db.execute(
+                "SELECT category, attempts, correct, ema FROM proficiency WHERE engineer_id = ?", (engineer_id,)):
+            column = self._column(category)
+            self.attempts[row, column] = attempts
+            self.correct[row, column] = correct
+            self.ema[row, column] = ema
+
+    def record(self, engineer_id, results):
+        """Fold one quiz's (category, correct) answers into the engineer's row"""
+        with self._lock:
+            if self._db is not None:
+                # Holds SQLite's write lock from the re-read to the commit, across processes
+                self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._refresh(engineer_id)
+                row = self._row(engineer_id)
+                touched = set()
+                for category, correct in results:
+                    column = self._column(category)
+                    touched.add(category)
+                    value = 1.0 if correct else 0.0
+                    self.attempts[row, column] += 1
+                    self.correct[row, column] += int(value)
+                    if self.attempts[row, column] == 1:
+                        self.ema[row, column] = value
+                    else:
+                        self.ema[row, column] += self.alpha * (value - self.ema[row, column])
+                self.quizzes[row] += 1
+                self.updated_at[row] = time.time()
+                if self._db is not None:
+                    self._write(engineer_id, row, touched)
+                    self._db.execute("COMMIT")
+            except Exception:
+                if self._db is not None:
+                    self._db.execute("ROLLBACK")
+                raise
+
+    def _write(self, engineer_id, row, categories):
+        self._db.execute(
+            "INSERT OR REPLACE INTO engineers VALUES (?, ?, ?)",
+            (engineer_id, int(self.quizzes[row]), float(self.updated_at[row]))
+        )
+        self._db.executemany(
+            "INSERT OR REPLACE INTO proficiency VALUES (?, ?, ?, ?, ?)",
+            [
+                (engineer_id, category, int(self.attempts[row, column]), int(self.correct[row, column]),
+                 float(self.ema[row, column]))
+                for category, column in ((c, self._columns[c]) for c in categories)
+            ]
+        )
+
+    def mastery(self, engineer_id):
+        """category -> moving average of correctness, for categories the engineer has attempted"""
+        row = self._rows.get(engineer_id)
+        if row is None:
+            return {}
+        attempts, ema = self.attempts[row], self.ema[row]
+        return {
+            category: float(ema[column])
+            for category, column in self._columns.items() if attempts[column]
+        }
+
+    def profile(self, engineer_id):
+        """Per-category statistics for one engineer, or None if unknown"""
+        with self._lock:
+            self._refresh(engineer_id)
+            row = self._rows.get(engineer_id)
+            if row is None:
+                return None
+            categories = {}
+            for category, column in self._columns.items():
+                attempts = int(self.attempts[row, column])
+                if attempts:
+                    categories[category] = {
+                        'attempts': attempts,
+                        'correct': int(self.correct[row, column]),
+                        'accuracy': round(int(self.correct[row, column]) / attempts * 100, 1),
+                        'recent_accuracy': round(float(self.ema[row, column]) * 100, 1)
+                    }
+            weakest = sorted(categories, key=lambda c: categories[c]['recent_accuracy'])
+            return {
+                'engineer_id': engineer_id,
+                'quizzes': int(self.quizzes[row]),
+                'categories': categories,
+                'weakest_categories': weakest[:3],
+                'updated_at': float(self.updated_at[row])
+            }
+
+    def plan(self, engineer_id, categories, k, rng):
+        """[(category, difficulty, questions)] spreading k questions towards weak categories"""
+        if not categories:
+            return []
+        with self._lock:
+            self._refresh(engineer_id)
+            mastery = self.mastery(engineer_id)
+        seen = [c for c in categories if c in mastery]
+        unseen = [c for c in categories if c not in mastery]
+        if not seen:
+            counts = Counter(rng.choices(categories, k=k))
+        else:
+            explore = round(k * EXPLORE_SHARE) if unseen else 0
+            weights = [max(1.0 - mastery[c], MIN_WEIGHT) for c in seen]
+            counts = Counter(rng.choices(seen, weights=weights, k=k - explore))
+            counts.update(rng.choices(unseen, k=explore))
+        return [(category, difficulty_for(mastery.get(category)), n) for category, n in counts.most_common()]
+
+    def to_dict(self):
+        return {
+            'engineers': len(self._rows),
+            'categories': list(self._columns),
+            'bytes': int(self.attempts.nbytes + self.correct.nbytes + self.ema.nbytes
+                         + self.quizzes.nbytes + self.updated_at.nbytes),
+            'path': self.path
+        }
@@ -0,0 +1,291 @@
+"""
+Opt-in profiling of request handlers
+
+Three tools, all off unless asked for, so production runs pay at most an
+integer increment per request:
+
+- cProfile every Nth request (PROFILE_EVERY_N): each profiled request's stats
+  are merged per route and, with PROFILE_DIR set, dumped as .prof files that
+  pstats, snakeviz or flameprof read. Only one request is profiled at a time.
+- A stack sampler started for a fixed window (an admin endpoint or
+  PROFILE_SAMPLE_SECONDS at startup) that reads every thread's Python stack
+  every few milliseconds and counts them as folded stacks
+  ("module:function;module:function count"), the input format of
+  flamegraph.pl, speedscope and inferno.
+- tracemalloc (PROFILE_TRACEMALLOC) for blocks wrapped in
+  track_allocations(), such as KB loading and search: bytes still allocated
+  after each call and the peak while it ran. tracemalloc's peak is process
+  wide, so under concurrent requests a block's peak includes its neighbours'.
+"""
+
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SAMPLE_INTERVAL_MS = 5.0
+# Deeper stacks are cut at the root end; request handlers sit well within this
+MAX_STACK_DEPTH = 64
+TOP_FUNCTIONS = 25
+TRACEMALLOC_FRAMES = 16
+# Innermost frames of threads that are waiting rather than working
+IDLE_FRAMES = ('threading:wait', 'selectors:select', 'socketserver:serve_forever')
+
+
+def frame_label(frame):
+    code = frame.f_code
+    module = frame.f_globals.get('__name__', os.path.basename(code.co_filename))
+    return f'{module}:{code.co_name}'
+
+
+def folded_stack(frame):
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+def top_functions(stats, limit=TOP_FUNCTIONS):
+    """The most expensive functions of a pstats.Stats by cumulative time"""
+    rows = []
+    for (filename, line, name), (calls, primitive, total, cumulative, _) in stats.stats.items():
+        rows.append({
+            'function': f'{os.path.basename(filename)}:{line}({name})',
+            'calls': calls,
+            'total_ms': round(total * 1000, 3),
+            'cumulative_ms': round(cumulative * 1000, 3)
+        })
+    rows.sort(key=lambda row: row['cumulative_ms'], reverse=True)
+    return rows[:limit]
+
+
+class StackSampler:
+    """Counts folded Python stacks of all other threads at a fixed interval"""
+
+    def __init__(self):
+        self.stacks = Counter()
+        self.samples = 0
+        self.interval_ms = DEFAULT_SAMPLE_INTERVAL_MS
+        self.started_at = None
+        self.until = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds, interval_ms=DEFAULT_SAMPLE_INTERVAL_MS):
+        """Sample for the given window, replacing the previous window's stacks"""
+        if self.is_running():
+            raise RuntimeError('Stack sampling already in progress')
+        with self._lock:
+            self.stacks = Counter()
+            self.samples = 0
+        self.interval_ms = max(float(interval_ms), 1.0)
+        self.started_at = time.time()
+        self.until = self.started_at + float(seconds)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        own = threading.get_ident()
+        interval = self.interval_ms / 1000
+        while not self._stop.is_set() and time.time() < self.until:
+            frames = sys._current_frames()
+            stacks = [folded_stack(frame) for ident, frame in frames.items() if ident != own]
+            with self._lock:
+                self.stacks.update(stacks)
+                self.samples += 1
+            self._stop.wait(interval)
+
+    def folded(self, idle=False):
+        """Folded stacks text, one "frame;frame;frame count" line per distinct stack.
+
+        Threads parked in a wait (queue workers, background loops, the
+        server's accept loop) are left out unless idle is set.
+        """
+        with self._lock:
+            stacks = list(self.stacks.items())
+        lines = [
+            f'{stack} {count}' for stack, count in sorted(stacks)
+            if idle or not stack.endswith(IDLE_FRAMES)
+        ]
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def to_dict(self):
+        with self._lock:
+            distinct = len(self.stacks)
+        return {
+            'running': self.is_running(),
+            'interval_ms': self.interval_ms,
+            'samples': self.samples,
+            'distinct_stacks': distinct,
+            'started_at': self.started_at,
+            'until': self.until
+        }
+
+
+class Profiler:
+    def __init__(self):
+        self.every_n = 0
+        self.directory = None
+        self.sampler = StackSampler()
+        self.allocations = {}
+        self._requests = 0
+        self._routes = {}
+        self._active = threading.Lock()
+        self._lock = threading.Lock()
+
+    def configure(self, every_n=None, directory=None, trace_allocations=None):
+        """Change settings at runtime; None leaves a setting as it is"""
+        if every_n is not None:
+            self.every_n = max(int(every_n), 0)
+        if directory is not None:
+            self.directory = directory or None
+            if self.directory:
+                os.makedirs(self.directory, exist_ok=True)
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        elif trace_allocations is False and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def should_profile(self):
+        if not self.every_n:
+            return False
+        with self._lock:
+            self._requests += 1
+            if self._requests % self.every_n:
+                return False
+        # cProfile hooks one thread; concurrent profiled requests would skew each other
+        return self._active.acquire(blocking=False)
+
+    def finish_request(self, route, profile):
+        """Merge a profiled request's stats into its route and free the profiling slot"""
+        self._active.release()
+        stats = pstats.Stats(profile, stream=io.StringIO())
+        with self._lock:
+            merged = self._routes.get(route)
+            if merged is None:
+                self._routes[route] = [1, stats]
+            else:
+                merged[0] += 1
+                merged[1].add(stats)
+        if self.directory:
+            name = route.strip('/').replace('/', '_').replace('<', '').replace('>', '') or 'root'
+            profile.dump_stats(os.path.join(self.directory, f'{name}.{int(time.time() * 1000)}.prof'))
+
+    def route_stats(self, route=None):
+        with self._lock:
+            routes = {name: (count, stats) for name, (count, stats) in self._routes.items()
+                      if route is None or name == route}
+            return {
+                name: {'profiled_requests': count, 'top_functions': top_functions(stats)}
+                for name, (count, stats) in routes.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._routes = {}
+            self.allocations = {}
+
+    def record_allocations(self, name, allocated, peak):
+        with self._lock:
+            entry = self.allocations.setdefault(name, {'calls': 0, 'allocated_bytes': 0, 'max_peak_bytes': 0})
+            entry['calls'] += 1
+            entry['allocated_bytes'] += allocated
+            entry['max_peak_bytes'] = max(entry['max_peak_bytes'], peak)
+
+    def top_allocations(self, limit=TOP_FUNCTIONS):
+        """Allocation sites currently holding the most memory"""
+        if not tracemalloc.is_tracing():
+            return []
+        return [
+            {
+                'site': f'{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}',
+                'bytes': stat.size,
+                'blocks': stat.count
+            }
+            for stat in tracemalloc.take_snapshot().statistics('lineno')[:limit]
+        ]
+
+    def to_dict(self):
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        with self._lock:
+            allocations = {name: dict(entry) for name, entry in self.allocations.items()}
+        return {
+            'every_n_requests': self.every_n,
+            'directory': self.directory,
+            'requests_seen': self._requests,
+            'profiled_routes': sorted(self._routes),
+            'sampler': self.sampler.to_dict(),
+            'tracemalloc': {
+                'tracing': tracemalloc.is_tracing(),
+                'current_bytes': current,
+                'peak_bytes': peak,
+                'blocks': allocations
+            }
+        }
+
+
+profiler = Profiler()
+
+
+def track_allocations(name):
+    """Decorator recording the bytes a call leaves allocated and its peak, while tracemalloc is tracing"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracemalloc.is_tracing():
+                return func(*args, **kwargs)
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                after, peak = tracemalloc.get_traced_memory()
+                profiler.record_allocations(name, after - before, peak - before)
+        return wrapper
+    return decorate
+
+
+def _start_request():
+    if profiler.should_profile():
+        g.profile = cProfile.Profile()
+        g.profile.enable()
+
+
+def _end_request(exc):
+    # A teardown hook, so a handler that raises still stops its profile
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profile.disable()
+        try:
+            profiler.finish_request(request.url_rule.rule if request.url_rule else 'unmatched', profile)
+        except Exception as e:
+            logger.error(f"Recording request profile failed: {e}")
+
+
+def profile_requests(app, every_n=0, directory='', trace_allocations=False, sample_seconds=0):
+    """Hook cProfile sampling into app's requests; sample_seconds starts the stack sampler right away"""
+    profiler.configure(every_n, directory, trace_allocations)
+    app.before_request(_start_request)
+    app.teardown_request(_end_request)
+    if sample_seconds:
+        profiler.sampler.start(sample_seconds)
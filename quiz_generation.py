@@ -0,0 +1,281 @@
+"""
+Offline LLM quiz question generation
+
+Generates quiz questions for every KB article through an OpenAI-compatible
+chat API, several articles per call and several calls in flight. Each
+article's questions are validated, near-duplicates are dropped by embedding
+cosine similarity, and the result is appended to a JSONL file as one record
+per article tagged with the article's content fingerprint. The file is the
+job's checkpoint: a re-run skips articles whose latest record still matches
+their content, so an interrupted run resumes where it stopped and a KB edit
+regenerates only the edited articles. The demo app loads the file into its
+question bank; serving a quiz never calls the LLM.
+
+Usage:
+    python llm_stub.py --port 5003
+    python quiz_generation.py --kb knowledge_base.json --base-url http://localhost:5003/v1
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+
+from quiz_bank import DIFFICULTIES, article_fingerprint, load_generated_questions
+
+logger = logging.getLogger(__name__)
+
+QUESTION_TYPES = ('multiple_choice', 'true_false', 'fill_blank')
+DEFAULT_OUTPUT = 'quiz_questions.jsonl'
+# Questions at least this similar to one already kept for the article are dropped
+DUPLICATE_SIMILARITY = 0.9
+
+SYSTEM_PROMPT = (
+    "You write quiz questions that check an IT support engineer's understanding of knowledge base articles. "
+    "For each article, write {count} varied questions covering different steps, causes and commands, mixing "
+    "the types multiple_choice, true_false and fill_blank and the difficulties easy, medium and hard. "
+    "Reply only with a JSON object {{\"questions\": [...]}} where each question has article_id, type, "
+    "difficulty, question, explanation and correct_answer. multiple_choice questions also have options "
+    "(4 strings) and correct_answer is the index of the right option; true_false correct_answer is a boolean; "
+    "fill_blank questions contain ______ and correct_answer is the missing text."
+)
+
+
+def as_bool(value):
+    if isinstance(value, str):
+        value = value.strip().lower()
+        if value not in ('true', 'false'):
+            raise ValueError(value)
+        return value == 'true'
+    if not isinstance(value, bool):
+        raise ValueError(value)
+    return value
+
+
+def validate_question(raw, article, rng):
+    """A bank question from one raw LLM question, or None if it is malformed"""
+    try:
+        kind = raw['type']
+        text = raw['question'].strip()
+        if kind not in QUESTION_TYPES or not text:
+            return None
+        question = {
+            'type': kind,
+            'difficulty': raw.get('difficulty') if raw.get('difficulty') in DIFFICULTIES else 'medium',
+            'question': text,
+            'explanation': (raw.get('explanation') or '').strip() or f"See {article['id']}: {article['title']}."
+        }
+        if kind == 'multiple_choice':
+            options = [str(option).strip() for option in raw['options']]
+            index = int(raw['correct_answer'])
+            if not 2 <= len(options) <= 6 or len(set(options)) != len(options) or not all(options):
+                return None
+            if not 0 <= index < len(options):
+                return None
+            correct = options[index]
+            # Models favour the first slot for the right answer
+            rng.shuffle(options)
+            question['options'] = options
+            question['correct_answer'] = options.index(correct)
+        elif kind == 'true_false':
+            question['correct_answer'] = as_bool(raw['correct_answer'])
+        else:
+            answer = str(raw['correct_answer']).strip()
+            if not answer or '___' not in text:
+                return None
+            question['correct_answer'] = answer
+    except (KeyError, IndexError, TypeError, ValueError, AttributeError):
+        return None
+    return question
+
+
+def answer_text(question):
+    answer = question['correct_answer']
+    return question['options'][answer] if question['type'] == 'multiple_choice' else str(answer)
+
+
+def dedupe(questions, vectors, threshold=DUPLICATE_SIMILARITY):
+    """Greedily keep questions whose embedding is not too close to one already kept"""
+    if not questions:
+        return []
+    vectors = np.asarray(vectors, dtype=np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    similarity = vectors @ vectors.T
+    kept = []
+    for i in range(len(questions)):
+        if not kept or similarity[i, kept].max() < threshold:
+            kept.append(i)
+    return [questions[i] for i in kept]
+
+
+class QuestionGenerator:
+    def __init__(self, client, model, embedding_model, questions_per_article=6, batch_size=4, workers=4,
+                 max_retries=3, similarity=DUPLICATE_SIMILARITY, max_chars=1500):
+        self.client = client
+        self.model = model
+        self.embedding_model = embedding_model
+        self.questions_per_article = questions_per_article
+        self.batch_size = max(1, int(batch_size))
+        self.workers = max(1, int(workers))
+        self.max_retries = max_retries
+        self.similarity = similarity
+        self.max_chars = max_chars
+        self._lock = threading.Lock()
+        self.stats = {
+            'articles': 0, 'skipped': 0, 'empty': 0, 'failed': 0, 'calls': 0, 'retries': 0,
+            'questions': 0, 'invalid': 0, 'duplicates': 0
+        }
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.stats[key] += n
+
+    def _retrying(self, call, *args):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._count('calls')
+                return call(*args)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                self._count('retries')
+                logger.warning(f"LLM call failed ({e}); retrying")
+                time.sleep(min(2 ** attempt, 30) * (0.5 + random.random()))
+
+    def _complete(self, batch):
+        listing = "\n\n".join(
+            f"article_id: {article['id']}\ntitle: {article['title']}\ncategory: {article['category']}\n"
+            f"content: {article['content'][:self.max_chars]}"
+            for article in batch
+        )
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT.format(count=self.questions_per_article)},
+                {"role": "user", "content": f"Articles:\n\n{listing}"}
+            ],
+            temperature=0.7
+        )
+        text = response.choices[0].message.content
+        return json.loads(text[text.index('{'):text.rindex('}') + 1])['questions']
+
+    def _embed(self, texts):
+        response = self.client.embeddings.create(model=self.embedding_model, input=texts)
+        return [item.embedding for item in response.data]
+
+    def generate_batch(self, batch):
+        """Generation records for a batch of articles, one LLM call plus one embedding call"""
+        articles = {article['id']: article for article in batch}
+        by_article = {article_id: [] for article_id in articles}
+        invalid = 0
+        for raw in self._retrying(self._complete, batch):
+            article = articles.get(raw.get('article_id')) if isinstance(raw, dict) else None
+            if article is None:
+                invalid += 1
+                continue
+            question = validate_question(raw, article, random.Random(f"{article['id']}-{len(by_article[article['id']])}"))
+            if question is None:
+                invalid += 1
+                continue
+            by_article[article['id']].append(question)
+        self._count('invalid', invalid)
+
+        candidates = [q for questions in by_article.values() for q in questions]
+        vectors = self._retrying(self._embed, [f"{q['question']} {answer_text(q)}" for q in candidates]) if candidates else []
+
+        records = []
+        offset = 0
+        generated_at = datetime.now().isoformat()
+        for article in batch:
+            questions = by_article[article['id']]
+            kept = dedupe(questions, vectors[offset:offset + len(questions)], self.similarity)
+            offset += len(questions)
+            self._count('duplicates', len(questions) - len(kept))
+            for i, question in enumerate(kept):
+                question.update({
+                    'bank_id': f"{article['id']}-LLM{i + 1}",
+                    'kb_reference': article['id'],
+                    'category': article['category'],
+                    'source': 'llm'
+                })
+            records.append({
+                'article_id': article['id'],
+                'fingerprint': article_fingerprint(article),
+                'model': self.model,
+                'generated_at': generated_at,
+                'questions': kept
+            })
+        return records
+
+    def run(self, articles, path=DEFAULT_OUTPUT):
+        """Generate for every article without an up-to-date record in path; returns stats"""
+        existing = load_generated_questions(path)
+        pending = [
+            article for article in articles
+            if existing.get(article['id'], {}).get('fingerprint') != article_fingerprint(article)
+        ]
+        self._count('skipped', len(articles) - len(pending))
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        logger.info(f"Generating questions for {len(pending)} articles in {len(batches)} batches")
+
+        start = time.perf_counter()
+        with open(path, 'a') as out, ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self.generate_batch, batch): batch for batch in batches}
+            for future in as_completed(futures):
+                try:
+                    records = future.result()
+                except Exception as e:
+                    logger.error(f"Batch of {len(futures[future])} articles failed: {e}")
+                    self._count('failed', len(futures[future]))
+                    continue
+                # Articles that got no usable questions stay pending for the next run
+                records = [record for record in records if record['questions']]
+                self._count('empty', len(futures[future]) - len(records))
+                # Each finished batch is durable before the next, so a rerun resumes after it
+                for record in records:
+                    out.write(json.dumps(record) + '\n')
+                out.flush()
+                os.fsync(out.fileno())
+                self._count('articles', len(records))
+                self._count('questions', sum(len(r['questions']) for r in records))
+        return dict(self.stats, elapsed_seconds=round(time.perf_counter() - start, 2))
+
+
+def load_articles(path):
+    with open(path) as f:
+        data = json.load(f)
+    return data['articles'] if isinstance(data, dict) else data
+
+
+if __name__ == '__main__':
+    import openai
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--kb', default='knowledge_base.json', help="JSON list of articles, or {'articles': [...]}")
+    parser.add_argument('--output', default=os.getenv('QUIZ_QUESTIONS_PATH', DEFAULT_OUTPUT))
+    parser.add_argument('--base-url', default=os.getenv('QUIZ_LLM_BASE_URL'))
+    parser.add_argument('--model', default=os.getenv('QUIZ_LLM_MODEL', 'gpt-4o-mini'))
+    parser.add_argument('--embedding-model', default=os.getenv('EMBEDDING_MODEL', 'text-embedding-ada-002'))
+    parser.add_argument('--questions-per-article', type=int, default=6)
+    parser.add_argument('--batch-size', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--similarity', type=float, default=DUPLICATE_SIMILARITY)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    client = openai.OpenAI(base_url=args.base_url, api_key=os.getenv('OPENAI_API_KEY') or 'mock', max_retries=0)
+    generator = QuestionGenerator(
+        client, args.model, args.embedding_model,
+        questions_per_article=args.questions_per_article,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        similarity=args.similarity
+    )
+    print(json.dumps(generator.run(load_articles(args.kb), args.output), indent=2))
@@ -0,0 +1,147 @@
+"""
+Issued quiz sessions
+
+Every generated quiz is stored under its QUIZ_... id with the answer key, so
+a submission is scored against the questions that were actually issued. The
+in-memory store is an LRU bounded by max_sessions with a TTL per session;
+with a SQLite path, sessions are also written through to disk, so they
+survive restarts and can be submitted to another worker. A submission is then
+claimed with a conditional UPDATE of the row's submitted_at, so a quiz is
+scored once however many workers or evictions it goes through.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from tracing import traced
+
+# Expired rows are purged from SQLite once per this many inserts
+PURGE_EVERY = 500
+
+
+def normalize_answer(answer):
+    return str(answer).strip().lower().lstrip('/')
+
+
+def is_correct(question, answer):
+    """Check one answer against the stored question"""
+    if answer is None:
+        return False
+    expected = question['correct_answer']
+    if question['type'] == 'multiple_choice':
+        try:
+            return int(answer) == expected
+        except (TypeError, ValueError):
+            return False
+    if question['type'] == 'true_false':
+        if isinstance(answer, str):
+            answer = answer.strip().lower() == 'true'
+        return bool(answer) == expected
+    return normalize_answer(answer) == normalize_answer(expected)
+
+
+class QuizSessionStore:
+    def __init__(self, ttl_seconds=7200, max_sessions=10000, path=None):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._inserts = 0
+        self.stats = {'created': 0, 'evicted': 0, 'expired': 0, 'loaded_from_disk': 0}
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS quiz_sessions ("
+                "id TEXT PRIMARY KEY, expires_at REAL, session TEXT, submitted_at TEXT)"
+            )
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(quiz_sessions)")]
+            if 'submitted_at' not in columns:
+                # Databases created before submissions were claimed in SQLite
+                self._db.execute("ALTER TABLE quiz_sessions ADD COLUMN submitted_at TEXT")
+                self._db.commit()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    @traced('quiz_sessions.put')
+    def put(self, session):
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._sessions[session['id']] = (expires_at, session)
+            self._sessions.move_to_end(session['id'])
+            self.stats['created'] += 1
+            # Oldest first: drop expired sessions, then trim to the size bound
+            while self._sessions:
+                oldest_expiry, _ = next(iter(self._sessions.values()))
+                if oldest_expiry > time.time() and len(self._sessions) <= self.max_sessions:
+                    break
+                self._sessions.popitem(last=False)
+                self.stats['expired' if oldest_expiry <= time.time() else 'evicted'] += 1
+            if self._db:
+                self._write(session['id'], expires_at, session)
+
+    def _write(self, quiz_id, expires_at, session):
+        self._db.execute(
+            "INSERT OR REPLACE INTO quiz_sessions (id, expires_at, session, submitted_at) VALUES (?, ?, ?, ?)",
+            (quiz_id, expires_at, json.dumps(session), session.get('submitted_at'))
+        )
+        self._inserts += 1
+        if self._inserts % PURGE_EVERY == 0:
+            self._db.execute("DELETE FROM quiz_sessions WHERE expires_at <= ?", (time.time(),))
+        self._db.commit()
+
+    def get(self, quiz_id):
+        """The live session for quiz_id, or None if unknown or expired"""
+        with self._lock:
+            entry = self._sessions.get(quiz_id)
+            if entry is None and self._db:
+                row = self._db.execute(
+                    "SELECT expires_at, session, submitted_at FROM quiz_sessions WHERE id = ?", (quiz_id,)
+                ).fetchone()
+                if row:
+                    session = json.loads(row[1])
+                    if row[2]:
+                        session['submitted_at'] = row[2]
+                    entry = (row[0], session)
+                    self._sessions[quiz_id] = entry
+                    self.stats['loaded_from_disk'] += 1
+            if entry is None:
+                return None
+            expires_at, session = entry
+            if expires_at <= time.time():
+                del self._sessions[quiz_id]
+                self.stats['expired'] += 1
+                return None
+            self._sessions.move_to_end(quiz_id)
+            return session
+
+    def mark_submitted(self, quiz_id, submitted_at):
+        """Claim the submission; returns False if the quiz was already submitted (by any worker) or expired"""
+        with self._lock:
+            entry = self._sessions.get(quiz_id)
+            if self._db:
+                # Atomic across processes: only one UPDATE finds submitted_at still unset
+                claimed = self._db.execute(
+                    "UPDATE quiz_sessions SET submitted_at = ? WHERE id = ? AND submitted_at IS NULL AND expires_at > ?",
+                    (submitted_at, quiz_id, time.time())
+                ).rowcount == 1
+                self._db.commit()
+            else:
+                claimed = entry is not None and not entry[1].get('submitted_at')
+            if claimed and entry is not None:
+                entry[1]['submitted_at'] = submitted_at
+            return claimed
+
+    def to_dict(self):
+        return {
+            'sessions': len(self._sessions),
+            'max_sessions': self.max_sessions,
+            'ttl_seconds': self.ttl_seconds,
+            'persistent': self._db is not None,
+            **self.stats
+        }
@@ -0,0 +1,201 @@
+"""
+Second-stage reranking for knowledge base search
+
+The vector search retrieves a wider candidate set cheaply; a reranker then
+re-scores those candidates and keeps the best k. Two scorers are available:
+a local lexical scorer (title/tag/content term overlap weighted by IDF over the
+candidates) and a single batched LLM call. A latency budget skips reranking
+when the request has already used its time or too many reranks are in flight;
+the scorer call itself is given the rest of the budget as its timeout. The
+scorer's expected latency decays while requests are skipped for budget, so one
+slow call can't switch reranking off for good.
+"""
+
+import json
+import logging
+import math
+import re
+import threading
+import time
+
+from metrics import record_stage
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Field weights for the lexical scorer
+TITLE_WEIGHT = 2.0
+TAG_WEIGHT = 2.0
+CONTENT_WEIGHT = 1.0
+
+# Factor applied to the expected scorer latency on every budget skip; the next
+# call that fits measures the scorer again
+SKIP_DECAY = 0.95
+
+
+def tokenize(text):
+    return set(TOKEN_PATTERN.findall(text.lower()))
+
+
+class LexicalScorer:
+    """Cheap local relevance scorer over a small candidate set"""
+    name = 'local'
+
+    def score(self, query, candidates, timeout=None):
+        # Local and over a few dozen candidates: well within any budget, so timeout is not needed
+        query_terms = tokenize(query)
+        fields = []
+        for article in candidates:
+            fields.append((
+                tokenize(article.get('title', '')),
+                tokenize(' '.join(article.get('tags', []))),
+                tokenize(article.get('content', ''))
+            ))
+
+        n = len(candidates)
+        idf = {}
+        for term in query_terms:
+            df = sum(1 for title, tags, content in fields if term in title or term in tags or term in content)
+            idf[term] = math.log((n + 1) / (df + 0.5))
+
+        scores = []
+        for title, tags, content in fields:
+            score = 0.0
+            for term in query_terms:
+                weight = (TITLE_WEIGHT if term in title else 0.0) + \
+                         (TAG_WEIGHT if term in tags else 0.0) + \
+                         (CONTENT_WEIGHT if term in content else 0.0)
+                score += weight * idf[term]
+            scores.append(score)
+
+        top = max(scores) if scores else 0.0
+        return [s / top if top > 0 else 0.0 for s in scores]
+
+
+class LLMScorer:
+    """Scores all candidates with one chat completion call"""
+    name = 'llm'
+
+    def __init__(self, client, model, max_chars=300):
+        self.client = client
+        self.model = model
+        self.max_chars = max_chars
+
+    def score(self, query, candidates, timeout=None):
+        listing = "\n".join(
+            f"[{i}] {article.get('title', '')}: {article.get('content', '')[:self.max_chars]}"
+            for i, article in enumerate(candidates)
+        )
+        with span('openai.chat.completions', 'client', model=self.model, purpose='rerank'):
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "You rank IT knowledge base articles for a support query. Reply only with a JSON array of relevance scores from 0 to 10, one per article, in the given order."
+                    },
+                    {
+                        "role": "user",
+                        "content": f"Query: {query}\n\nArticles:\n{listing}"
+                    }
+                ],
+                max_tokens=8 * len(candidates) + 16,
+                timeout=timeout
+            )
+        text = response.choices[0].message.content
+        scores = json.loads(text[text.index('['):text.rindex(']') + 1])
+        if len(scores) != len(candidates):
+            raise ValueError(f"Expected {len(candidates)} scores, got {len(scores)}")
+        return [min(max(float(s), 0.0), 10.0) / 10.0 for s in scores]
+
+
+class Reranker:
+    """Applies a scorer to first-stage candidates within a latency budget"""
+
+    def __init__(self, scorer, candidates=20, budget_ms=300.0, max_inflight=4, retrieval_weight=0.5):
+        self.scorer = scorer
+        self.candidates = candidates
+        self.budget_ms = budget_ms
+        self.retrieval_weight = retrieval_weight
+        self._slots = threading.BoundedSemaphore(max_inflight)
+        self._lock = threading.Lock()
+        # Moving average of scorer latency, used to predict whether it fits the budget
+        self.expected_ms = 0.0
+        self.stats = {'reranked': 0, 'skipped_budget': 0, 'skipped_load': 0, 'errors': 0, 'timeouts': 0,
+                      'total_ms': 0.0}
+
+    def rerank(self, query, results, top_k, elapsed_ms=0.0, timings=None):
+        """Return the best top_k of results; results carry 'relevance_score'.
+
+        elapsed_ms is the time the request has already spent, so reranking is
+        skipped when elapsed_ms plus the expected scorer time exceeds the budget.
+        """
+        timings = timings if timings is not None else {}
+        timings['rerank'] = self.scorer.name
+        if len(results) <= 1:
+            return results[:top_k]
+
+        if elapsed_ms + self.expected_ms > self.budget_ms:
+            with self._lock:
+                self.expected_ms *= SKIP_DECAY
+            return self._skip(results, top_k, timings, 'budget')
+        if not self._slots.acquire(blocking=False):
+            return self._skip(results, top_k, timings, 'load')
+
+        # The budget check only covers the start of the call; the timeout bounds the rest
+        timeout = (self.budget_ms - elapsed_ms) / 1000
+        start = time.perf_counter()
+        try:
+            scores = self.scorer.score(query, results, timeout=timeout)
+        except Exception as e:
+            if time.perf_counter() - start >= timeout:
+                logger.warning(f"Reranking with {self.scorer.name} scorer timed out after {timeout:.3f}s")
+                self._count('timeouts')
+                return self._skip(results, top_k, timings, 'timeout')
+            logger.error(f"Reranking with {self.scorer.name} scorer failed: {e}")
+            self._count('errors')
+            return self._skip(results, top_k, timings, 'error')
+        finally:
+            self._slots.release()
+            rerank_ms = (time.perf_counter() - start) * 1000
+            timings['rerank_ms'] = round(rerank_ms, 3)
+            record_stage('rerank', rerank_ms / 1000)
+            with self._lock:
+                self.expected_ms = rerank_ms if not self.expected_ms else 0.8 * self.expected_ms + 0.2 * rerank_ms
+
+        with self._lock:
+            self.stats['reranked'] += 1
+            self.stats['total_ms'] += rerank_ms
+        for article, score in zip(results, scores):
+            article['retrieval_score'] = article['relevance_score']
+            article['relevance_score'] = self.retrieval_weight * article['relevance_score'] + \
+                (1 - self.retrieval_weight) * score
+        results.sort(key=lambda a: a['relevance_score'], reverse=True)
+        timings['reranked'] = True
+        return results[:top_k]
+
+    def _skip(self, results, top_k, timings, reason):
+        if reason in ('budget', 'load'):
+            self._count(f'skipped_{reason}')
+        timings['reranked'] = False
+        timings['rerank_skipped'] = reason
+        return results[:top_k]
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def to_dict(self):
+        with self._lock:
+            stats = dict(self.stats)
+        total_ms = stats.pop('total_ms')
+        stats['mean_rerank_ms'] = round(total_ms / stats['reranked'], 3) if stats['reranked'] else 0.0
+        return {
+            'scorer': self.scorer.name,
+            'candidates': self.candidates,
+            'budget_ms': self.budget_ms,
+            'expected_ms': round(self.expected_ms, 3),
+            'stats': stats
+        }
@@ -0,0 +1,199 @@
+"""
+HTTP response helpers shared by the Flask apps
+
+Conditional GET (ETag / If-None-Match) is checked before the payload is built,
+so an unchanged resource costs neither serialization nor transfer, and bodies
+above a size threshold are compressed with the best encoding the client
+accepts (brotli when the package is installed, else gzip).
+
+configure_responses() applies the same to every jsonify() response: JSON is
+encoded with orjson when it is installed, falling back to the standard
+library, and an after_request hook compresses large JSON bodies. Search
+results are ScoredArticle views over the stored article, so a result costs
+one small dict of scores rather than a copy of the article.
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+from collections.abc import Mapping
+
+from flask import Response, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed; compression overhead isn't worth it
+GZIP_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+# Per-request brotli: a fast quality that still beats gzip on JSON
+BROTLI_QUALITY = 4
+COMPRESSIBLE_MIMETYPES = ('application/json',)
+# Content-codings a compressed body's ETag can be suffixed with
+ETAG_ENCODINGS = ('br', 'gzip')
+
+ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+
+
+class ScoredArticle(Mapping):
+    """A stored article plus per-result scores, without copying the article.
+
+    Reads fall through to the article; writes (a reranker's scores) go to the
+    overlay, so the stored article is never modified.
+    """
+    __slots__ = ('article', 'scores')
+
+    def __init__(self, article, **scores):
+        self.article = article
+        self.scores = scores
+
+    def __getitem__(self, key):
+        if key in self.scores:
+            return self.scores[key]
+        return self.article[key]
+
+    def __setitem__(self, key, value):
+        self.scores[key] = value
+
+    def __iter__(self):
+        yield from self.article
+        yield from (key for key in self.scores if key not in self.article)
+
+    def __len__(self):
+        return len(self.article) + sum(1 for key in self.scores if key not in self.article)
+
+    def to_dict(self):
+        return {**self.article, **self.scores}
+
+
+def encode_default(value):
+    """JSON fallback for types neither encoder handles natively"""
+    if isinstance(value, ScoredArticle):
+        return value.to_dict()
+    return DefaultJSONProvider.default(value)
+
+
+def dumps(payload):
+    """Compact JSON bytes, via orjson when available"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, default=encode_default, option=ORJSON_OPTIONS)
+        except TypeError:
+            # e.g. integers beyond 64 bits; the standard library handles them
+            pass
+    return json.dumps(payload, separators=(',', ':'), default=encode_default).encode()
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify() through dumps(), skipping the str round trip"""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, default=encode_default, **kwargs)
+        return dumps(obj).decode()
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
+
+
+def make_etag(*parts):
+    """Strong ETag derived from the values that determine a response body"""
+    return hashlib.sha1('|'.join(str(p) for p in parts).encode()).hexdigest()[:20]
+
+
+def not_modified(etag):
+    """304 response if the request's If-None-Match has etag in any content-coding, else None"""
+    if not etag:
+        return None
+    for candidate in (etag, *(f"{etag}-{encoding}" for encoding in ETAG_ENCODINGS)):
+        if candidate in request.if_none_match:
+            response = Response(status=304)
+            response.set_etag(candidate)
+            response.vary.add('Accept-Encoding')
+            return response
+    return None
+
+
+def preferred_encoding(available=('br', 'gzip')):
+    """The first of the available encodings the request accepts, or None"""
+    accepted = request.accept_encodings
+    for encoding in available:
+        if encoding == 'br' and brotli is None:
+            continue
+        if accepted[encoding]:
+            return encoding
+    return None
+
+
+def compress(body, encoding, best=False):
+    """body in the given encoding; best trades CPU for size, for content compressed once"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=11 if best else BROTLI_QUALITY)
+    return gzip.compress(body, 9 if best else GZIP_LEVEL)
+
+
+def compress_body(response, body):
+    if len(body) >= GZIP_MIN_BYTES:
+        encoding = preferred_encoding()
+        if encoding:
+            response.set_data(compress(body, encoding))
+            response.headers['Content-Encoding'] = encoding
+            etag, weak = response.get_etag()
+            if etag:
+                # Each encoding is a distinct representation, so it gets its own ETag
+                response.set_etag(f"{etag}-{encoding}", weak)
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def json_response(payload, status=200, etag=None, compress=True):
+    """Serialize payload to a JSON response with optional ETag and compression"""
+    body = dumps(payload)
+    response = Response(body, status=status, mimetype='application/json')
+    if etag:
+        response.set_etag(etag)
+    if compress:
+        compress_body(response, body)
+    return response
+
+
+def compress_response(response):
+    """after_request hook: compress buffered JSON bodies the route left uncompressed"""
+    if (response.is_streamed or response.direct_passthrough or 'Content-Encoding' in response.headers
+            or response.status_code in (204, 304) or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    return compress_body(response, response.get_data())
+
+
+def configure_responses(app):
+    """Fast JSON encoding and response compression for every route of app"""
+    app.json = FastJSONProvider(app)
+    app.after_request(compress_response)
+
+
+def encode_cursor(position):
+    return base64.urlsafe_b64encode(json.dumps({'after': position}).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Position encoded in a pagination cursor, raising ValueError if malformed"""
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded))['after']
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(position, int) or position < 0:
+        raise ValueError('Invalid cursor')
+    return position
@@ -0,0 +1,183 @@
+"""
+Local stand-in for the ServiceNow Table API
+
+Serves /api/now/table/incident with the subset of the API the sync uses:
+sysparm_query with =, > and >= conditions, ^NQ alternatives and ORDERBY
+clauses, sysparm_limit / sysparm_offset paging, sysparm_display_value (date
+fields are displayed in the instance timezone, --display-offset-hours from
+the stored UTC values, as a real instance does) and an X-Total-Count header. POST creates an incident
+and PATCH updates one, both stamping sys_updated_on, so incremental syncs can
+be exercised end to end.
+
+Usage:
+    python servicenow_stub.py --incidents 5000 --port 5002
+    SERVICENOW_URL=http://localhost:5002 python demo_app.py
+"""
+
+import argparse
+import random
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from flask import Flask, request, jsonify
+
+app = Flask(__name__)
+
+INCIDENTS = {}
+_lock = threading.Lock()
+
+SAMPLE_ISSUES = [
+    ("Outlook not connecting to Exchange server", "Email", "Outlook shows 'Cannot connect to Microsoft Exchange' on startup"),
+    ("Computer running very slow", "Performance", "Machine takes several minutes to boot and applications respond slowly"),
+    ("Network printer offline", "Hardware", "Shared printer shows offline status, users cannot print"),
+    ("VPN keeps disconnecting", "Network", "Remote user loses VPN connection every few minutes"),
+    ("Blue screen after Windows update", "Software", "Laptop shows BSOD with MEMORY_MANAGEMENT after latest update"),
+    ("MacBook cannot join Wi-Fi", "Network", "MacBook fails to connect to the corporate wireless network"),
+]
+STATES = ["New", "Open", "In Progress", "On Hold", "Resolved"]
+PRIORITIES = ["1 - Critical", "2 - High", "3 - Medium", "4 - Low"]
+ASSIGNEES = ["L1 Support", "L2 Support", "Network Team", "Desktop Team"]
+DATE_FIELDS = ('opened_at', 'sys_updated_on')
+# Offset of the instance's display timezone from the stored UTC values
+DISPLAY_OFFSET = timedelta(hours=-5)
+
+
+def timestamp(moment=None):
+    return (moment or datetime.now()).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def seed(count, rng):
+    start = datetime.now() - timedelta(days=30)
+    for i in range(count):
+        title, category, description = rng.choice(SAMPLE_ISSUES)
+        opened = start + timedelta(minutes=i * 5)
+        number = f"INC{1000000 + i}"
+        INCIDENTS[number] = {
+            'sys_id': uuid.uuid4().hex,
+            'number': number,
+            'short_description': title,
+            'description': description,
+            'state': rng.choice(STATES),
+            'priority': rng.choice(PRIORITIES),
+            'category': category,
+            'assigned_to': rng.choice(ASSIGNEES),
+            'opened_at': timestamp(opened),
+            'caller_id': f"user{rng.randint(1, 500)}@company.com",
+            'sys_updated_on': timestamp(opened + timedelta(minutes=rng.randint(0, 600)))
+        }
+
+
+CONDITION_OPERATORS = ('>=', '>', '=')
+
+
+def parse_query(query):
+    """Split an encoded query into ^NQ alternatives of (field, operator, value) conditions and order fields"""
+    alternatives, order_by = [], []
+    for part in (query or '').split('^NQ'):
+        conditions = []
+        for clause in filter(None, part.split('^')):
+            if clause.startswith('ORDERBY'):
+                order_by.append(clause[len('ORDERBY'):])
+                continue
+            for operator in CONDITION_OPERATORS:
+                field, found, value = clause.partition(operator)
+                if found:
+                    conditions.append((field, operator, value))
+                    break
+        if conditions:
+            alternatives.append(conditions)
+    return alternatives, order_by
+
+
+def display(field, value):
+    if field in DATE_FIELDS and value:
+        return timestamp(datetime.strptime(value, '%Y-%m-%d %H:%M:%S') + DISPLAY_OFFSET)
+    return value
+
+
+def render(record, fields, display_value):
+    """A record as the Table API returns it for sysparm_fields and sysparm_display_value"""
+    fields = fields or list(record)
+    if display_value == 'all':
+        return {f: {'display_value': display(f, record.get(f, '')), 'value': record.get(f, '')} for f in fields}
+    if display_value == 'true':
+        return {f: display(f, record.get(f, '')) for f in fields}
+    return {f: record.get(f, '') for f in fields}
+
+
+def matches(record, conditions):
+    # Timestamps and sys_ids compare correctly as strings
+    for field, operator, value in conditions:
+        actual = record.get(field, '')
+        if not (actual >= value if operator == '>=' else actual > value if operator == '>' else actual == value):
+            return False
+    return True
+
+
+@app.route('/api/now/table/incident', methods=['GET'])
+def list_incidents():
+    alternatives, order_by = parse_query(request.args.get('sysparm_query'))
+    limit = int(request.args.get('sysparm_limit', 10000))
+    offset = int(request.args.get('sysparm_offset', 0))
+    fields = [f for f in request.args.get('sysparm_fields', '').split(',') if f]
+
+    with _lock:
+        records = [r for r in INCIDENTS.values()
+                   if not alternatives or any(matches(r, conditions) for conditions in alternatives)]
+    if order_by:
+        records.sort(key=lambda r: tuple(r.get(field, '') for field in order_by) + (r['number'],))
+    display_value = request.args.get('sysparm_display_value', 'false')
+    page = [render(r, fields, display_value) for r in records[offset:offset + limit]]
+
+    response = jsonify({'result': page})
+    response.headers['X-Total-Count'] = str(len(records))
+    return response
+
+
+@app.route('/api/now/table/incident', methods=['POST'])
+def create_incident():
+    data = request.get_json() or {}
+    with _lock:
+        number = f"INC{1000000 + len(INCIDENTS)}"
+        record = {
+            'sys_id': uuid.uuid4().hex,
+            'number': number,
+            'short_description': data.get('short_description', ''),
+            'description': data.get('description', ''),
+            'state': data.get('state', 'New'),
+            'priority': data.get('priority', '3 - Medium'),
+            'category': data.get('category', 'General'),
+            'assigned_to': data.get('assigned_to', 'L1 Support'),
+            'opened_at': timestamp(),
+            'caller_id': data.get('caller_id', 'system@company.com'),
+            'sys_updated_on': timestamp()
+        }
+        INCIDENTS[number] = record
+    return jsonify({'result': record}), 201
+
+
+@app.route('/api/now/table/incident/<number>', methods=['PATCH'])
+def update_incident(number):
+    data = request.get_json() or {}
+    with _lock:
+        record = INCIDENTS.get(number)
+        if record is None:
+            return jsonify({'error': {'message': 'No Record found'}}), 404
+        record.update({k: v for k, v in data.items() if k not in ('sys_id', 'number')})
+        record['sys_updated_on'] = timestamp()
+    return jsonify({'result': record})
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--incidents', type=int, default=500)
+    parser.add_argument('--port', type=int, default=5002)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--display-offset-hours', type=float, default=-5.0)
+    args = parser.parse_args()
+
+    DISPLAY_OFFSET = timedelta(hours=args.display_offset_hours)
+
+    seed(args.incidents, random.Random(args.seed))
+    app.run(host='0.0.0.0', port=args.port, threaded=True)
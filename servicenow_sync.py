@@ -0,0 +1,291 @@
+"""
+Incremental ServiceNow incident sync
+
+Polls a ServiceNow-compatible Table API for incidents updated since the last
+sys_updated_on watermark, paging under a rate limit, upserts changed records
+into the local incident store and hands only new or changed incidents to an
+analysis callback.
+
+Pages are fetched by keyset on (sys_updated_on, sys_id), each one starting
+after the previous page's last record. Offset paging over a list ordered by
+sys_updated_on skips records whenever an incident is updated mid-poll (it
+moves to the end and shifts the rest down a slot), and the watermark would
+then pass the skipped ones for good.
+
+Each page is applied and the watermark advanced before the next one is
+requested, so memory is bounded by the page size and a poll that fails
+halfway keeps the pages it got. Records are requested with
+sysparm_display_value=all: the keyset and watermark use the raw UTC values
+the instance filters and sorts on, while the local incident keeps the display
+values of the other fields.
+
+Run servicenow_stub.py for a local endpoint to sync against.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+from tracing import span, traced
+
+logger = logging.getLogger(__name__)
+
+SYNC_FIELDS = (
+    'sys_id', 'number', 'short_description', 'description', 'state', 'priority',
+    'category', 'assigned_to', 'opened_at', 'caller_id', 'close_notes', 'sys_updated_on'
+)
+
+# Fields whose change makes an incident worth re-analyzing
+ANALYZED_FIELDS = ('short_description', 'description', 'state', 'priority', 'category')
+
+
+class RateLimiter:
+    """Token bucket shared by the fetch threads"""
+
+    def __init__(self, rate_per_second, burst=None):
+        self.rate = rate_per_second
+        self.capacity = burst or max(1.0, rate_per_second)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent; returns seconds spent waiting"""
+        if not self.rate:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+def display_value(value):
+    """Table API reference fields may come back as {'display_value': ...}"""
+    if isinstance(value, dict):
+        return value.get('display_value') or value.get('value', '')
+    return value or ''
+
+
+def raw_value(value):
+    """The stored value of a field requested with sysparm_display_value=all"""
+    if isinstance(value, dict):
+        return value.get('value', '')
+    return value or ''
+
+
+def to_local_incident(record):
+    """Map a Table API incident record onto the demo's incident shape"""
+    return {
+        'number': display_value(record.get('number')),
+        'short_description': display_value(record.get('short_description')),
+        'description': display_value(record.get('description')),
+        'state': display_value(record.get('state')),
+        'priority': display_value(record.get('priority')),
+        'category': display_value(record.get('category')) or 'General',
+        'assigned_to': display_value(record.get('assigned_to')),
+        'created_on': display_value(record.get('opened_at')),
+        'caller': display_value(record.get('caller_id')),
+        'close_notes': display_value(record.get('close_notes')),
+        'sys_id': raw_value(record.get('sys_id')),
+        'sys_updated_on': raw_value(record.get('sys_updated_on'))
+    }
+
+
+class ServiceNowSync:
+    def __init__(self, base_url, store, on_changed=None, auth=None, page_size=100,
+                 rate_limit=10.0, timeout=30, max_retries=3, watermark=None):
+        self.base_url = base_url.rstrip('/')
+        self.store = store
+        self.on_changed = on_changed
+        self.page_size = page_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.limiter = RateLimiter(rate_limit)
+        self.watermark = watermark
+        self.session = requests.Session()
+        if auth:
+            self.session.auth = auth
+        self.session.headers['Accept'] = 'application/json'
+        self._poll_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {
+            'polls': 0,
+            'requests': 0,
+            'retries': 0,
+            'rate_limit_wait_seconds': 0.0,
+            'records_fetched': 0,
+            'incidents_created': 0,
+            'incidents_updated': 0,
+            'incidents_unchanged': 0,
+            'analyses_triggered': 0,
+            'last_poll_seconds': None,
+            'last_poll_at': None,
+            'last_error': None
+        }
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def _get_page(self, after=None):
+        params = {
+            'sysparm_query': self._query(after),
+            'sysparm_fields': ','.join(SYNC_FIELDS),
+            # Display values for the incident, raw values for the keyset and watermark
+            'sysparm_display_value': 'all',
+            'sysparm_exclude_reference_link': 'true',
+            'sysparm_limit': self.page_size
+        }
+        for attempt in range(self.max_retries + 1):
+            self._count('rate_limit_wait_seconds', self.limiter.acquire())
+            self._count('requests')
+            with span('servicenow.get_incidents', 'client', after=' '.join(after or ()), attempt=attempt) as call:
+                headers = {'traceparent': call.traceparent()} if call.sampled else None
+                response = self.session.get(f"{self.base_url}/api/now/table/incident", params=params,
+                                            headers=headers, timeout=self.timeout)
+                call.set_attribute('http.response.status_code', response.status_code)
+            if response.status_code == 429 or response.status_code >= 500:
+                if attempt == self.max_retries:
+                    response.raise_for_status()
+                self._count('retries')
+                time.sleep(float(response.headers.get('Retry-After', 2 ** attempt)))
+                continue
+            response.raise_for_status()
+            return response.json().get('result', [])
+        return []
+
+    def _query(self, after=None):
+        """Encoded query for the records after the (sys_updated_on, sys_id) key, or from the watermark"""
+        order = 'ORDERBYsys_updated_on^ORDERBYsys_id'
+        if after:
+            updated_on, sys_id = after
+            return f"sys_updated_on>{updated_on}^NQsys_updated_on={updated_on}^sys_id>{sys_id}^{order}"
+        # >= rather than > so records sharing the watermark second are not missed;
+        # already-seen revisions are skipped on upsert
+        if self.watermark:
+            return f"sys_updated_on>={self.watermark}^{order}"
+        return order
+
+    def _pages(self):
+        """Yield the records changed since the watermark, one keyset page at a time"""
+        after = None
+        while True:
+            page = self._get_page(after)
+            yield page
+            if len(page) < self.page_size:
+                return
+            last = page[-1]
+            key = (raw_value(last.get('sys_updated_on')), raw_value(last.get('sys_id')))
+            if after and key <= after:
+                # The instance ignored the keyset condition; paging on would never end
+                raise RuntimeError(f'ServiceNow returned records at or before {after} when paging after it')
+            after = key
+
+    @traced('servicenow_sync.poll')
+    def poll_once(self):
+        """Fetch every incident changed since the watermark; returns a summary"""
+        with self._poll_lock:
+            start = time.perf_counter()
+            self._count('polls')
+            try:
+                summary = {'fetched': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'analysis_triggered': 0}
+                for page in self._pages():
+                    # Applied page by page, so the watermark covers everything up to the last page fetched
+                    for key, value in self._apply(page).items():
+                        if key in summary:
+                            summary[key] += value
+                summary['watermark'] = self.watermark
+                with self._stats_lock:
+                    self.stats['last_error'] = None
+                return summary
+            except Exception as e:
+                logger.error(f"ServiceNow sync failed: {e}")
+                with self._stats_lock:
+                    self.stats['last_error'] = str(e)
+                raise
+            finally:
+                with self._stats_lock:
+                    self.stats['last_poll_seconds'] = round(time.perf_counter() - start, 3)
+                    self.stats['last_poll_at'] = datetime.now().isoformat()
+
+    def _apply(self, records):
+        self._count('records_fetched', len(records))
+        changed = []
+        created = updated = unchanged = 0
+        watermark = self.watermark
+        for record in records:
+            incident = to_local_incident(record)
+            existing = self.store.get(incident['number'])
+            if existing and existing.get('sys_updated_on') == incident['sys_updated_on']:
+                unchanged += 1
+                continue
+            needs_analysis = existing is None or any(existing.get(f) != incident[f] for f in ANALYZED_FIELDS)
+            if self.store.upsert(dict(existing or {}, **incident)):
+                created += 1
+            else:
+                updated += 1
+            if needs_analysis:
+                changed.append(self.store.get(incident['number']))
+            if incident['sys_updated_on'] and (not watermark or incident['sys_updated_on'] > watermark):
+                watermark = incident['sys_updated_on']
+
+        self.watermark = watermark
+        self._count('incidents_created', created)
+        self._count('incidents_updated', updated)
+        self._count('incidents_unchanged', unchanged)
+        if changed and self.on_changed:
+            self._count('analyses_triggered', len(changed))
+            self.on_changed(changed)
+        return {
+            'fetched': len(records),
+            'created': created,
+            'updated': updated,
+            'unchanged': unchanged,
+            'analysis_triggered': len(changed),
+            'watermark': self.watermark
+        }
+
+    def start(self, interval_seconds):
+        """Poll in a background thread every interval_seconds"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(interval_seconds,), name='servicenow-sync', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self, interval_seconds):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception:
+                pass
+            self._stop.wait(interval_seconds)
+
+    def to_dict(self):
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['rate_limit_wait_seconds'] = round(stats['rate_limit_wait_seconds'], 3)
+        return {
+            'base_url': self.base_url,
+            'watermark': self.watermark,
+            'page_size': self.page_size,
+            'rate_limit_per_second': self.limiter.rate,
+            'polling': bool(self._thread and self._thread.is_alive()),
+            'stats': stats
+        }
@@ -0,0 +1,101 @@
+"""
+Prebuilt UI pages and static assets
+
+Each app's UI lives in a directory holding index.html and the files it links
+to. At startup every file is read once, given a content-hashed URL
+(app.3f2a9c1d7e.js) and compressed with gzip and, when the brotli package is
+installed, brotli; index.html is rendered once with asset_url() resolving to
+those URLs. Requests are then served from memory: the encoding is picked from
+Accept-Encoding, hashed assets are cacheable for a year because any change
+gives them a new URL, and the page itself is revalidated by ETag so a
+returning browser gets a 304 and reuses everything it already has.
+"""
+
+import hashlib
+import mimetypes
+import os
+
+from flask import Response, abort
+from jinja2 import Template
+
+from responses import GZIP_MIN_BYTES, brotli, compress, not_modified, preferred_encoding
+
+PAGE = 'index.html'
+# Hashed URLs never change content, so browsers and proxies may keep them
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+# The page is small and names the current hashed URLs, so always revalidate it
+REVALIDATE_CACHE = 'no-cache'
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+
+class Asset:
+    """One file's bytes in every encoding it is served in"""
+
+    def __init__(self, body, mimetype, cache_control):
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+        self.etag = hashlib.sha1(body).hexdigest()[:20]
+        self.encodings = {'identity': body}
+        if mimetype.startswith(COMPRESSIBLE_TYPES) and len(body) >= GZIP_MIN_BYTES:
+            self.encodings['gzip'] = compress(body, 'gzip', best=True)
+            if brotli is not None:
+                self.encodings['br'] = compress(body, 'br', best=True)
+
+    def response(self):
+        encoding = preferred_encoding([e for e in ('br', 'gzip') if e in self.encodings]) or 'identity'
+        # Each encoding is a distinct representation, so it gets its own ETag
+        etag = self.etag if encoding == 'identity' else f"{self.etag}-{encoding}"
+        response = not_modified(etag)
+        if response is None:
+            response = Response(self.encodings[encoding], mimetype=self.mimetype)
+            response.set_etag(etag)
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+        response.headers['Cache-Control'] = self.cache_control
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+class AssetBundle:
+    def __init__(self, directory, url_prefix):
+        self.url_prefix = url_prefix.rstrip('/')
+        self._urls = {}
+        self._assets = {}
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if name == PAGE or not os.path.isfile(path):
+                continue
+            with open(path, 'rb') as f:
+                body = f.read()
+            mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+            asset = Asset(body, mimetype, IMMUTABLE_CACHE)
+            stem, ext = os.path.splitext(name)
+            hashed = f"{stem}.{asset.etag[:10]}{ext}"
+            self._assets[hashed] = asset
+            self._urls[name] = f"{self.url_prefix}/{hashed}"
+
+        with open(os.path.join(directory, PAGE), encoding='utf-8') as f:
+            html = Template(f.read()).render(asset_url=self.asset_url)
+        self.page = Asset(html.encode('utf-8'), 'text/html', REVALIDATE_CACHE)
+
+    def asset_url(self, name):
+        return self._urls[name]
+
+    def page_response(self):
+        return self.page.response()
+
+    def asset_response(self, filename):
+        asset = self._assets.get(filename)
+        if asset is None:
+            abort(404)
+        return asset.response()
+
+    def to_dict(self):
+        return {
+            'assets': {
+                name: {encoding: len(body) for encoding, body in self._assets[url.rsplit('/', 1)[1]].encodings.items()}
+                for name, url in self._urls.items()
+            },
+            'page': {encoding: len(body) for encoding, body in self.page.encodings.items()},
+            'brotli': brotli is not None
+        }
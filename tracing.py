@@ -0,0 +1,382 @@
+"""
+Request tracing
+
+Spans follow the OpenTelemetry data model and the W3C Trace Context headers,
+without depending on the OpenTelemetry SDK. instrument_app() opens a server
+span per request, continuing the trace named by an incoming traceparent
+header, and returns the trace in a traceresponse header. Nested work is
+wrapped with span() or the traced() decorator; spans started while a sampled
+span is current become its children.
+
+Sampling is parent-based with a trace-id ratio for new traces, as in the
+OpenTelemetry default sampler: a caller that sends a sampled traceparent is
+always traced, other requests are traced at the configured rate. Unsampled
+requests still carry their trace id, but their spans are a shared no-op
+object, so leaving tracing on with a low rate costs a contextvar lookup per
+span.
+
+Finished spans are batched by a background thread and written as OTLP/JSON
+export requests, one per line, which the OpenTelemetry Collector's
+otlpjsonfile receiver reads as is; they can also be POSTed to an OTLP/HTTP
+endpoint (a collector's /v1/traces).
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_PATTERN = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+INVALID_TRACE_ID = '0' * 32
+INVALID_SPAN_ID = '0' * 16
+SAMPLED_FLAG = 0x01
+
+# OTLP span kinds and status codes
+KINDS = {'internal': 1, 'server': 2, 'client': 3, 'producer': 4, 'consumer': 5}
+STATUS_UNSET, STATUS_OK, STATUS_ERROR = 0, 1, 2
+
+# Spans waiting for export beyond this are dropped rather than queued without bound
+MAX_QUEUED_SPANS = 10000
+EXPORT_BATCH = 512
+EXPORT_INTERVAL_SECONDS = 2.0
+
+_current = contextvars.ContextVar('current_span', default=None)
+_random = random.SystemRandom()
+
+
+def new_trace_id():
+    return f'{_random.getrandbits(128):032x}'
+
+
+def new_span_id():
+    return f'{_random.getrandbits(64):016x}'
+
+
+def parse_traceparent(header):
+    """(trace_id, parent_span_id, sampled) from a W3C traceparent header, or None if it is invalid"""
+    match = TRACEPARENT_PATTERN.match((header or '').strip().lower())
+    if not match:
+        return None
+    trace_id, span_id, flags = match.groups()
+    if trace_id == INVALID_TRACE_ID or span_id == INVALID_SPAN_ID:
+        return None
+    return trace_id, span_id, bool(int(flags, 16) & SAMPLED_FLAG)
+
+
+def format_traceparent(trace_id, span_id, sampled):
+    return f'00-{trace_id}-{span_id}-{SAMPLED_FLAG if sampled else 0:02x}'
+
+
+def restore(token):
+    try:
+        _current.reset(token)
+    except ValueError:
+        # A streamed response can be closed from another context than it was opened in
+        pass
+
+
+def otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class Span:
+    __slots__ = ('name', 'kind', 'trace_id', 'span_id', 'parent_id', 'start_ns', 'end_ns',
+                 'attributes', 'status', 'message', '_token')
+    sampled = True
+
+    def __init__(self, name, trace_id, parent_id=None, kind='internal', attributes=None):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = new_span_id()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes or {}
+        self.status = STATUS_UNSET
+        self.message = ''
+        self._token = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_error(self, message):
+        self.status = STATUS_ERROR
+        self.message = message
+
+    def traceparent(self):
+        return format_traceparent(self.trace_id, self.span_id, True)
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.set_error(f'{exc_type.__name__}: {exc}')
+        restore(self._token)
+        self.end()
+        return False
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            tracer.export(self)
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': KINDS[self.kind],
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [{'key': key, 'value': otlp_value(value)} for key, value in self.attributes.items()],
+            'status': {'code': self.status, 'message': self.message} if self.status else {}
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+class UnsampledSpan:
+    """Stands in for spans of a trace that isn't recorded; keeps the trace id for propagation"""
+    __slots__ = ('trace_id', 'span_id', '_token')
+    sampled = False
+
+    def __init__(self, trace_id, span_id):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self._token = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_error(self, message):
+        pass
+
+    def traceparent(self):
+        return format_traceparent(self.trace_id, self.span_id, False)
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        restore(self._token)
+        return False
+
+    def end(self):
+        pass
+
+
+class NoopSpan:
+    """Returned for child spans of unsampled traces; entering it changes nothing"""
+    __slots__ = ()
+    sampled = False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_error(self, message):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def end(self):
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+class Tracer:
+    def __init__(self):
+        self.service_name = 'it-support'
+        self.sample_rate = 0.0
+        self.export_path = None
+        self.otlp_endpoint = None
+        self.stats = {'started': 0, 'exported': 0, 'dropped': 0, 'export_errors': 0}
+        self._queue = queue.Queue(maxsize=MAX_QUEUED_SPANS)
+        self._exporter = None
+        self._lock = threading.Lock()
+
+    def configure(self, service_name, sample_rate=0.0, export_path=None, otlp_endpoint=None):
+        self.service_name = service_name
+        self.sample_rate = min(max(float(sample_rate), 0.0), 1.0)
+        self.export_path = export_path or None
+        self.otlp_endpoint = otlp_endpoint or None
+        with self._lock:
+            if self._exporter is None and (self.export_path or self.otlp_endpoint):
+                self._exporter = threading.Thread(target=self._export_loop, name='trace-exporter', daemon=True)
+                self._exporter.start()
+
+    @property
+    def enabled(self):
+        return self._exporter is not None
+
+    def should_sample(self, trace_id):
+        # Decided from the trace id, so every service sampling at the same rate agrees
+        return int(trace_id[16:], 16) < self.sample_rate * 2 ** 64
+
+    def start_span(self, name, kind='internal', parent=None, **attributes):
+        """A span under parent (default: the current span), or a new trace's root span"""
+        parent = parent if parent is not None else _current.get()
+        if parent is None:
+            trace_id = new_trace_id()
+            if not (self.enabled and self.should_sample(trace_id)):
+                return UnsampledSpan(trace_id, new_span_id())
+            self.stats['started'] += 1
+            return Span(name, trace_id, None, kind, attributes)
+        if not parent.sampled or not self.enabled:
+            return NOOP_SPAN
+        self.stats['started'] += 1
+        return Span(name, parent.trace_id, parent.span_id, kind, attributes)
+
+    def start_request_span(self, name, traceparent, **attributes):
+        """Server span continuing the caller's trace when traceparent is valid"""
+        context = parse_traceparent(traceparent)
+        if context is None:
+            return self.start_span(name, 'server', **attributes)
+        trace_id, parent_id, sampled = context
+        if not (self.enabled and (sampled or self.should_sample(trace_id))):
+            return UnsampledSpan(trace_id, new_span_id())
+        self.stats['started'] += 1
+        return Span(name, trace_id, parent_id, 'server', attributes)
+
+    def export(self, span):
+        if not self.enabled:
+            return
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.stats['dropped'] += 1
+
+    def _export_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + EXPORT_INTERVAL_SECONDS
+            while len(batch) < EXPORT_BATCH:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self.flush(batch)
+
+    def flush(self, spans):
+        body = json.dumps({'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': otlp_value(self.service_name)}]},
+            'scopeSpans': [{'scope': {'name': __name__}, 'spans': [span.to_otlp() for span in spans]}]
+        }]}, separators=(',', ':'))
+        try:
+            if self.export_path:
+                with open(self.export_path, 'a') as f:
+                    f.write(body + '\n')
+            if self.otlp_endpoint:
+                urllib.request.urlopen(urllib.request.Request(
+                    self.otlp_endpoint, data=body.encode(), headers={'Content-Type': 'application/json'}
+                ), timeout=5).close()
+            self.stats['exported'] += len(spans)
+        except Exception as e:
+            logger.error(f"Exporting {len(spans)} spans failed: {e}")
+            self.stats['export_errors'] += 1
+
+    def to_dict(self):
+        return {
+            'service_name': self.service_name,
+            'sample_rate': self.sample_rate,
+            'export_path': self.export_path,
+            'otlp_endpoint': self.otlp_endpoint,
+            'queued': self._queue.qsize(),
+            **self.stats
+        }
+
+
+tracer = Tracer()
+
+
+def current_span():
+    return _current.get()
+
+
+def span(name, kind='internal', **attributes):
+    """Context manager for a child of the current span"""
+    return tracer.start_span(name, kind, **attributes)
+
+
+def traced(name):
+    """Decorator running the function inside a span"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.start_span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def in_current_context(func):
+    """Wrap func to run in the caller's context, so spans it opens on a pool thread keep their parent"""
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # A context can only be entered by one thread at a time, so each call gets its own copy
+        return context.copy().run(func, *args, **kwargs)
+    return wrapper
+
+
+def _start_request():
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    request_span = tracer.start_request_span(
+        f'{request.method} {route}', request.headers.get('traceparent'),
+        **{'http.request.method': request.method, 'http.route': route, 'url.path': request.path}
+    )
+    g.trace_span = request_span.__enter__()
+
+
+def _finish_request(response):
+    request_span = g.get('trace_span')
+    if request_span is not None:
+        request_span.set_attribute('http.response.status_code', response.status_code)
+        if response.status_code >= 500:
+            request_span.set_error(f'HTTP {response.status_code}')
+        response.headers['traceresponse'] = request_span.traceparent()
+    return response
+
+
+def _end_request(exc):
+    request_span = g.pop('trace_span', None)
+    if request_span is not None:
+        request_span.__exit__(type(exc) if exc else None, exc, None)
+
+
+def trace_requests(app, service_name, sample_rate=0.0, export_path=None, otlp_endpoint=None):
+    """Open a server span around every request of app"""
+    tracer.configure(service_name, sample_rate, export_path, otlp_endpoint)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_end_request)
@@ -0,0 +1,181 @@
+"""
+Compact in-memory storage for KB embedding matrices
+
+Vectors are L2-normalized once at build time so cosine similarity becomes a
+dot product. The matrix can be held as float32, float16 or int8 (symmetric
+per-row scale). Reduced-precision matrices are scored block by block and the
+top candidates are re-scored against full-precision vectors kept in a
+memory-mapped .npy file, so only the compact codes stay resident in RAM.
+"""
+
+import os
+import numpy as np
+
+PRECISIONS = ('float32', 'float16', 'int8')
+
+# Rows upcast per block when scoring float16/int8 codes; small blocks keep the
+# float32 scratch buffer cache-resident
+SCORE_BLOCK_ROWS = 256
+
+
+def normalize_rows(vectors):
+    """Return float32 copy of vectors with unit L2 norm per row"""
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class EmbeddingMatrix:
+    """Embedding matrix with optional float16/int8 scalar quantization"""
+
+    def __init__(self, codes, scales=None, exact=None, exact_path=None, precision='float32'):
+        self.codes = codes
+        self.scales = scales
+        self.exact = exact
+        self.exact_path = exact_path
+        self.precision = precision
+
+    @classmethod
+    def build(cls, vectors, precision='float32', exact_path=None):
+        """Build a matrix from raw vectors.
+
+        For reduced precisions, exact_path names a .npy file that receives the
+        normalized float32 vectors for re-ranking and saving; without it the
+        matrix only keeps the quantized codes.
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown embedding precision '{precision}', expected one of {PRECISIONS}")
+        if vectors is None or len(vectors) == 0:
+            return cls(np.zeros((0, 0), dtype=np.float32), precision=precision)
+
+        normalized = normalize_rows(vectors)
+        if precision == 'float32':
+            return cls(normalized, exact=normalized, precision=precision)
+
+        exact = None
+        if exact_path:
+            # Write beside and rename so readers of a previous mapping keep their inode
+            tmp_path = f"{exact_path}.tmp.npy"
+            np.save(tmp_path, normalized)
+            os.replace(tmp_path, exact_path)
+            exact = np.load(exact_path, mmap_mode='r')
+
+        if precision == 'float16':
+            return cls(normalized.astype(np.float16), exact=exact, exact_path=exact_path, precision=precision)
+
+        scales = np.abs(normalized).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.rint(normalized / scales[:, None]).astype(np.int8)
+        return cls(codes, scales=scales.astype(np.float32), exact=exact, exact_path=exact_path, precision=precision)
+
+    def __len__(self):
+        return self.codes.shape[0]
+
+    @property
+    def dimensions(self):
+        return self.codes.shape[1] if len(self) else 0
+
+    @property
+    def nbytes(self):
+        """Resident bytes; the memory-mapped exact vectors are not counted"""
+        resident = self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+        if self.precision == 'float32':
+            return resident
+        if isinstance(self.exact, np.ndarray) and not isinstance(self.exact, np.memmap):
+            resident += self.exact.nbytes
+        return resident
+
+    def scores(self, query, rows=None):
+        """Approximate cosine similarity of query against every row, or only
+        the given row numbers (scores are then aligned with rows)"""
+        query = normalize_rows(query)[0]
+        n_rows = len(self) if rows is None else len(rows)
+        if self.precision == 'float32':
+            return self.codes @ query if rows is None else self.codes[rows] @ query
+
+        scores = np.empty(n_rows, dtype=np.float32)
+        if n_rows == 0:
+            return scores
+        scratch = np.empty((min(SCORE_BLOCK_ROWS, n_rows), self.dimensions), dtype=np.float32)
+        for start in range(0, n_rows, SCORE_BLOCK_ROWS):
+            if rows is None:
+                block = self.codes[start:start + SCORE_BLOCK_ROWS]
+            else:
+                block = self.codes[rows[start:start + SCORE_BLOCK_ROWS]]
+            upcast = scratch[:len(block)]
+            np.copyto(upcast, block)
+            scores[start:start + len(block)] = upcast @ query
+        if self.scales is not None:
+            scores *= self.scales if rows is None else self.scales[rows]
+        return scores
+
+    def exact_scores(self, query, rows):
+        """Full-precision cosine similarity for the given rows"""
+        query = normalize_rows(query)[0]
+        if self.exact is None:
+            return self.scores(query, rows)
+        return np.asarray(self.exact[rows], dtype=np.float32) @ query
+
+    def search(self, query, top_k=3, rerank_candidates=20, rows=None, boost=None):
+        """Return (indices, scores) of the top_k rows, best first.
+
+        rows restricts scoring to a pre-filtered subset of row numbers; boost
+        is an optional per-row multiplier applied before ranking.
+        Reduced-precision matrices pick max(top_k, rerank_candidates) rows by
+        approximate score and re-rank them with exact scores.
+        """
+        if rows is not None:
+            rows = np.asarray(rows, dtype=np.int64)
+            rows = rows[rows < len(self)]
+        n_rows = len(self) if rows is None else len(rows)
+        if n_rows == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+
+        scores = self.scores(query, rows)
+        if boost is not None:
+            scores *= boost if rows is None else boost[rows]
+        exact_rerank = self.precision != 'float32' and self.exact is not None
+        n_candidates = min(n_rows, max(top_k, rerank_candidates) if exact_rerank else top_k)
+        candidates = top_indices(scores, n_candidates)
+        if rows is not None:
+            scores = None
+            candidates = rows[candidates]
+
+        if exact_rerank:
+            # Sorted row order keeps memory-mapped reads sequential
+            candidates = np.sort(candidates)
+            candidate_scores = self.exact_scores(query, candidates)
+        elif scores is not None:
+            candidate_scores = scores[candidates]
+        else:
+            candidate_scores = self.scores(query, candidates)
+        if boost is not None and (exact_rerank or scores is None):
+            candidate_scores = candidate_scores * boost[candidates]
+
+        order = np.argsort(-candidate_scores, kind='stable')[:top_k]
+        return candidates[order], candidate_scores[order]
+
+    def to_list(self):
+        """Vectors as nested lists, exact where available, for JSON persistence"""
+        if len(self) == 0:
+            return []
+        if self.exact is not None:
+            return np.asarray(self.exact, dtype=np.float32).tolist()
+        if self.scales is not None:
+            return (self.codes.astype(np.float32) * self.scales[:, None]).tolist()
+        return self.codes.astype(np.float32).tolist()
+
+
+def top_indices(scores, k):
+    """Indices of the k highest scores in descending order"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.array([], dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind='stable')]